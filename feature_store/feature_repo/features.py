@@ -13,7 +13,7 @@ applicant = Entity(
 
 source = FileSource(
     name="applicant_features_source",
-    path="../../data/feature_store/customer_features.parquet",
+    path="../../data/feature_store/customer_features",
     timestamp_field="event_timestamp",
     created_timestamp_column="created_timestamp",
 )
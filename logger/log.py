@@ -1,6 +1,13 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
 from datetime import datetime
+from typing import Dict, Optional
 
 
 LOG_DIR = "logs"
@@ -9,12 +16,169 @@ LOG_DIR = os.path.join(os.getcwd(), LOG_DIR)
 os.makedirs(LOG_DIR, exist_ok=True)
 
 CURRENT_TIME_STAMP = f"{datetime.now().strftime('%Y-%m-%d-%H-%M-%S')}"
-file_name = f"log_{CURRENT_TIME_STAMP}.log"
 
-log_file_path = os.path.join(LOG_DIR, file_name)
+
+def process_log_file_path() -> str:
+    # Workers started in the same second each get their own file
+    return os.path.join(LOG_DIR, f"log_{CURRENT_TIME_STAMP}_{os.getpid()}.log")
+
+
+log_file_path = process_log_file_path()
 
 
 logging.basicConfig(filename=log_file_path,
                     filemode='w',
                     format='[%(asctime)s] %(name)s - %(levelname)s - %(message)s',
-                    level=logging.NOTSET)
\ No newline at end of file
+                    level=logging.NOTSET)
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message and, when
+    present, the formatted exception.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a `rate` share of INFO-and-below records from the given
+    logger (and its children); warnings and errors always pass.
+    """
+
+    def __init__(self, logger_name: str, rate: float):
+        super().__init__()
+        self.logger_name = logger_name
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        if record.name != self.logger_name and not record.name.startswith(self.logger_name + "."):
+            return True
+        return random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a bounded queue without blocking. When the writer
+    falls behind, records are dropped and counted instead of slowing the
+    caller. Exceptions are formatted on the writer thread, not here.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingLogWriter:
+    """
+    Background thread that drains the log queue and writes JSON lines in
+    batches of up to `batch_size`, flushing at least every
+    `flush_interval_ms`.
+    """
+
+    def __init__(self, log_queue: queue.Queue, path: str, handler: DroppingQueueHandler,
+                 batch_size: int = 256, flush_interval_ms: float = 200):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.formatter = JsonFormatter()
+        self.stream = open(path, "a", encoding="utf-8")
+        self._reported_drops = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+            self.stream.close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+
+            while batch and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                stopping = True
+                batch = [record for record in batch if record is not None]
+
+            lines = [self.formatter.format(record) for record in batch]
+            if self.handler.dropped != self._reported_drops:
+                lines.append(json.dumps({
+                    "time": datetime.now().isoformat(timespec="milliseconds"),
+                    "level": "WARNING",
+                    "logger": __name__,
+                    "message": f"{self.handler.dropped - self._reported_drops} log records dropped, queue full"
+                }))
+                self._reported_drops = self.handler.dropped
+
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+
+
+_writer = None
+
+
+def configure_logging(level: str = "INFO", queue_size: int = 10000, batch_size: int = 256,
+                      flush_interval_ms: float = 200, sampling: Optional[Dict[str, float]] = None):
+    """
+    Route the root logger through a non-blocking queue to a background
+    writer that appends JSON lines to this process's log file, named
+    with its pid so a process forked after import does not share it.
+    `sampling` maps logger names to the share of their INFO records kept.
+    """
+    global _writer
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        existing.close()
+    if _writer is not None:
+        _writer.stop()
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    for logger_name, rate in (sampling or {}).items():
+        handler.addFilter(SamplingFilter(logger_name, rate))
+
+    _writer = BatchingLogWriter(log_queue, process_log_file_path(), handler, batch_size, flush_interval_ms)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    atexit.register(_writer.stop)
+
+
+def shutdown_logging():
+    if _writer is not None:
+        _writer.stop()
@@ -1,21 +1,26 @@
-import pandas as pd
 import numpy as np
+from src.data_pipeline.feature_definitions import REGISTRY, TRAINING_FEATURES, compute_frame, raw_inputs
+from src.data_pipeline.load_dataset import load_csv_cached, load_dataset, save_dataset
 
 RAW_PATH = "data/raw/transactions.csv"
-FEATURES_PATH = "data/feature_store/customer_features.parquet"
+FEATURES_PATH = "data/feature_store/customer_features"
 OUTPUT_PATH = "data/training/training_dataset.parquet"
-OUTPUT_PATH_CSV = "data/training/training_dataset.csv"
+# Read at full precision, as feature_store/build_features.py and the online
+# path read them, so derived features match the served ones
+FEATURE_INPUTS = raw_inputs(list(REGISTRY))
 
 def run():
-    df_raw = pd.read_csv(RAW_PATH)
-    features = pd.read_parquet(FEATURES_PATH)
+    df_raw = load_csv_cached(RAW_PATH, exclude=FEATURE_INPUTS)
+    features = load_dataset(FEATURES_PATH, ext="parquet")
+    # The feature table keeps every version of an applicant; train on the latest
+    features = (
+        features.sort_values('event_timestamp', kind='stable')
+        .drop_duplicates('SK_ID_CURR', keep='last')
+        .drop(columns=['date'], errors='ignore')
+    )
     
-    cohort = df_raw.copy()
-    cohort.rename(columns={'TARGET': 'label'}, inplace=True)
+    cohort = df_raw.rename(columns={'TARGET': 'label'})
 
-    cohort['is_cash_loan'] = (cohort['NAME_CONTRACT_TYPE'] == 'Cash loans').astype(int)
-    cohort['is_male'] = (cohort['CODE_GENDER'] == 'M').astype(int)
-    
     training_df = cohort.merge(
         features,
         on="SK_ID_CURR",
@@ -23,14 +28,7 @@ def run():
         suffixes=('', '_feat') 
     )
 
-    training_df['goods_to_credit_ratio'] = training_df['AMT_GOODS_PRICE'] / training_df['AMT_CREDIT']
-    
-    training_df['children_ratio'] = training_df['CNT_CHILDREN'] / training_df['CNT_FAM_MEMBERS']
-    
-    training_df['employed_to_age_ratio'] = training_df['DAYS_EMPLOYED'] / training_df['DAYS_BIRTH']
-    
-    training_df['ext_sources_sum'] = training_df[['ext_source_1', 'ext_source_2', 'ext_source_3']].sum(axis=1)
-    training_df['ext_sources_prod'] = training_df['ext_source_1'] * training_df['ext_source_2'] * training_df['ext_source_3']
+    training_df[TRAINING_FEATURES] = compute_frame(training_df, TRAINING_FEATURES)
 
     final_columns = training_df.select_dtypes(include=[np.number]).columns.tolist()
     
@@ -42,8 +40,7 @@ def run():
 
     print(f"Final training set shape: {training_df.shape}")
 
-    training_df.to_parquet(OUTPUT_PATH, index=False)
-    training_df.to_csv(OUTPUT_PATH_CSV, index=False)
+    save_dataset(training_df, OUTPUT_PATH)
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -1,73 +1,224 @@
+"""
+Drops duplicate columns from the training dataset, reports near-constant
+and collinear ones and keeps the features most correlated with the label.
+
+    python -m src.data_pipeline.clean_features
+"""
+import hashlib
+import numpy as np
 import pandas as pd
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from src.data_pipeline.load_dataset import load_dataset, save_dataset
+
+INPUT_PATH = "data/training/training_dataset.parquet"
+CLEAN_PATH = "data/training/training_dataset_clean.parquet"
+FINAL_PATH = "data/training/training_dataset_final.parquet"
+SELECTED_FEATURES_PATH = "data/training/selected_features_final.txt"
+ID_COLUMNS = ['SK_ID_CURR', 'label']
+N_FEATURES = 20
+# Columns converted to a contiguous array at a time
+BLOCK_COLUMNS = 256
+
+
+def _blocks(df: pd.DataFrame, columns: Sequence[str], block_columns: int = BLOCK_COLUMNS
+            ) -> Iterator[Tuple[List[str], Optional[np.ndarray]]]:
+    """
+    Yields columns of one NumPy dtype with their values as a (columns, rows)
+    array, and every other column alone with None.
+    """
+    by_dtype: Dict[np.dtype, List[str]] = {}
+    for col in columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+            by_dtype.setdefault(dtype, []).append(col)
+        else:
+            yield [col], None
+
+    for dtype, cols in by_dtype.items():
+        for start in range(0, len(cols), block_columns):
+            names = cols[start:start + block_columns]
+            yield names, np.ascontiguousarray(df[names].to_numpy(dtype=dtype).T)
+
+
+def column_fingerprints(df: pd.DataFrame, columns: Sequence[str], block_columns: int = BLOCK_COLUMNS
+                        ) -> Dict[str, Tuple[str, bytes]]:
+    """
+    (dtype, hash of the values) per column. NaNs hash alike whatever their
+    payload and -0.0 hashes as 0.0, so columns that `Series.equals` would
+    match always share a fingerprint.
+    """
+    fingerprints = {}
+    for names, block in _blocks(df, columns, block_columns):
+        if block is None:
+            values = pd.util.hash_pandas_object(df[names[0]], index=False).to_numpy()
+            fingerprints[names[0]] = (str(df[names[0]].dtype), hashlib.blake2b(values.tobytes()).digest())
+            continue
 
-df = pd.read_parquet("data/training/training_dataset.parquet")
+        if block.dtype.kind == "f":
+            block = np.where(np.isnan(block), np.nan, block + 0.0).astype(block.dtype, copy=False)
+        for col, values in zip(names, block):
+            fingerprints[col] = (str(block.dtype), hashlib.blake2b(values.tobytes()).digest())
+    return fingerprints
+
+
+def find_duplicate_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                           block_columns: int = BLOCK_COLUMNS) -> Dict[str, List[str]]:
+    """
+    Groups of identical columns (same dtype and values, NaN equal to NaN),
+    keyed by the first column of each group. Columns are hashed in one pass
+    and only columns with the same hash are compared.
+    """
+    columns = list(df.columns if columns is None else columns)
+    buckets: Dict[Tuple[str, bytes], List[str]] = {}
+    for col, fingerprint in column_fingerprints(df, columns, block_columns).items():
+        buckets.setdefault(fingerprint, []).append(col)
+
+    duplicate_groups = {}
+    for bucket in buckets.values():
+        # A hash collision must not merge different columns
+        while len(bucket) > 1:
+            keep, rest = bucket[0], bucket[1:]
+            duplicates = [col for col in rest if df[keep].equals(df[col])]
+            if duplicates:
+                duplicate_groups[keep] = [keep] + duplicates
+            bucket = [col for col in rest if col not in duplicates]
+
+    order = {col: i for i, col in enumerate(columns)}
+    return dict(sorted(duplicate_groups.items(), key=lambda item: order[item[0]]))
+
+
+def find_near_constant_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                               threshold: float = 0.999, block_columns: int = BLOCK_COLUMNS) -> Dict[str, float]:
+    """
+    Columns whose most common value (NaN counts as a value) fills at least
+    `threshold` of the rows, with that share. `threshold` must be above 0.5,
+    which makes the most common value the median of the column.
+    """
+    columns = list(df.columns if columns is None else columns)
+    shares = {}
+    for names, block in _blocks(df, columns, block_columns):
+        if block is None:
+            share = df[names[0]].value_counts(dropna=False, normalize=True)
+            block_shares = [share.iloc[0] if len(share) else 1.0]
+        elif block.shape[1] == 0:
+            block_shares = [1.0] * len(names)
+        else:
+            # NaN sorts last, so it is the median when it fills most rows
+            median = np.partition(block, block.shape[1] // 2, axis=1)[:, block.shape[1] // 2:block.shape[1] // 2 + 1]
+            same = block == median
+            if block.dtype.kind == "f":
+                same |= np.isnan(block) & np.isnan(median)
+            block_shares = same.mean(axis=1)
+
+        for col, share in zip(names, block_shares):
+            if share >= threshold:
+                shares[col] = float(share)
+    return shares
+
+
+def find_collinear_columns(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                           threshold: float = 0.98) -> Dict[str, List[str]]:
+    """
+    Groups of numeric columns whose absolute correlation with the first
+    column of the group is at least `threshold`, from one correlation
+    matrix product. Missing values count as the column mean, and constant
+    columns are left out.
+    """
+    columns = list(df.columns if columns is None else columns)
+    numeric = [col for col in columns if pd.api.types.is_numeric_dtype(df[col].dtype)]
+    if not numeric:
+        return {}
+
+    values = df[numeric].to_numpy(dtype=np.float32, na_value=np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+    varying = np.flatnonzero(std > 0)
+    if len(varying) < len(numeric):
+        values, mean, std = values[:, varying], mean[varying], std[varying]
+    # In place: the value matrix is the largest allocation here
+    values -= mean
+    values /= std
+    np.nan_to_num(values, copy=False)
+    products = values.T @ values
+    # Normalized by the products' own diagonal, so columns with gaps still
+    # correlate exactly with themselves and their copies
+    norms = np.sqrt(np.diag(products))
+    correlated = np.abs(products / norms[:, None] / norms[None, :]) >= threshold
+
+    collinear_groups, grouped = {}, set()
+    for i in range(len(varying)):
+        if i in grouped:
+            continue
+        partners = [j for j in np.flatnonzero(correlated[i, i + 1:]) + i + 1 if j not in grouped]
+        if partners:
+            collinear_groups[numeric[varying[i]]] = [numeric[varying[k]] for k in [i] + partners]
+            grouped.update(partners)
+    return collinear_groups
 
-columns_to_check = [col for col in df.columns if col not in ['SK_ID_CURR', 'label']]
 
-duplicate_groups = {}
-checked = set()
+def select_top_features(df: pd.DataFrame, n_features: int = N_FEATURES) -> List[str]:
+    y = df['label']
+    X = df.drop(ID_COLUMNS, axis=1)
 
-for i, col1 in enumerate(columns_to_check):
-    if col1 in checked:
-        continue
+    correlations = X.corrwith(y).abs().sort_values(ascending=False)
 
-    duplicates = [col1]
-    for col2 in columns_to_check[i+1:]:
-        if col2 in checked:
-            continue
+    print(f"\nTop 30 features by correlation with target:")
+    for i, (feat, corr) in enumerate(correlations.head(30).items(), 1):
+        print(f"{i:2d}. {feat:45s} {corr:.6f}")
 
-        if df[col1].equals(df[col2]):
-            duplicates.append(col2)
-            checked.add(col2)
+    return correlations.head(n_features).index.tolist()
 
-    if len(duplicates) > 1:
-        duplicate_groups[col1] = duplicates
-        for dup in duplicates:
-            checked.add(dup)
 
-if duplicate_groups:
-    print(f"\nFound {len(duplicate_groups)} groups of duplicate columns:")
+def run():
+    df = load_dataset(INPUT_PATH, ext="parquet")
 
-    columns_to_drop = []
-    for keep, dups in duplicate_groups.items():
-        columns_to_drop.extend([d for d in dups if d != keep])
+    columns_to_check = [col for col in df.columns if col not in ID_COLUMNS]
 
-    df_clean = df.drop(columns=columns_to_drop)
-else:
-    df_clean = df.copy()
+    duplicate_groups = find_duplicate_columns(df, columns_to_check)
+    if duplicate_groups:
+        print(f"\nFound {len(duplicate_groups)} groups of duplicate columns:")
 
+        columns_to_drop = []
+        for keep, dups in duplicate_groups.items():
+            columns_to_drop.extend([d for d in dups if d != keep])
 
-df_clean.to_parquet("data/training/training_dataset_clean.parquet", index=False)
-df_clean.to_csv("data/training/training_dataset_clean.csv", index=False)
+        df_clean = df.drop(columns=columns_to_drop)
+    else:
+        df_clean = df.copy()
 
+    remaining = [col for col in df_clean.columns if col not in ID_COLUMNS]
+    near_constant = find_near_constant_columns(df_clean, remaining)
+    if near_constant:
+        print(f"\nNear-constant columns: {', '.join(f'{col} ({share:.2%})' for col, share in near_constant.items())}")
+    collinear_groups = find_collinear_columns(df_clean, remaining)
+    if collinear_groups:
+        print(f"\nFound {len(collinear_groups)} groups of collinear columns:")
+        for keep, group in collinear_groups.items():
+            print(f"  {keep}: {', '.join(group[1:])}")
 
-print("\n" + "="*60)
-print("Running feature selection on clean data...")
-print("="*60)
+    save_dataset(df_clean, CLEAN_PATH)
 
-y = df_clean['label']
-X = df_clean.drop(['SK_ID_CURR', 'label'], axis=1)
+    print("\n" + "="*60)
+    print("Running feature selection on clean data...")
+    print("="*60)
 
-correlations = X.corrwith(y).abs().sort_values(ascending=False)
+    selected_features = select_top_features(df_clean)
 
-print(f"\nTop 30 features by correlation with target:")
-for i, (feat, corr) in enumerate(correlations.head(30).items(), 1):
-    print(f"{i:2d}. {feat:45s} {corr:.6f}")
+    print(f"\n{'='*60}")
+    print(f"Selected TOP {N_FEATURES} FEATURES:")
+    print(f"{'='*60}")
+    for i, feat in enumerate(selected_features, 1):
+        print(f"{i:2d}. {feat}")
 
-n_features = 20
-selected_features = correlations.head(n_features).index.tolist()
+    df_final = df_clean[ID_COLUMNS + selected_features]
 
-print(f"\n{'='*60}")
-print(f"Selected TOP {n_features} FEATURES:")
-print(f"{'='*60}")
-for i, feat in enumerate(selected_features, 1):
-    print(f"{i:2d}. {feat}")
+    save_dataset(df_final, FINAL_PATH)
 
-df_final = df_clean[['SK_ID_CURR', 'label'] + selected_features]
+    with open(SELECTED_FEATURES_PATH, 'w') as f:
+        for feat in selected_features:
+            f.write(f"{feat}\n")
 
-df_final.to_parquet("data/training/training_dataset_final.parquet", index=False)
-df_final.to_csv("data/training/training_dataset_final.csv", index=False)
 
-with open("data/training/selected_features_final.txt", 'w') as f:
-    for feat in selected_features:
-        f.write(f"{feat}\n")
+if __name__ == "__main__":
+    run()
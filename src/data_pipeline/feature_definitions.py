@@ -0,0 +1,202 @@
+"""
+Single definition of every engineered feature, shared by the feature store
+build, the training dataset and serving.
+
+Each feature is a kernel over its named inputs. The same kernel runs
+vectorized on whole columns (`compute_frame`, for batch jobs) and on the
+values of one request (`compute_row`, which writes into a preallocated row
+without touching pandas). Missing inputs are NaN, and ratios with a zero
+denominator are NaN rather than inf.
+"""
+import math
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+DAYS_PER_YEAR = 365.25
+DAYS_EMPLOYED_UNKNOWN = 365243
+
+
+class FeatureDefinition(NamedTuple):
+    name: str
+    inputs: Tuple[str, ...]
+    kernel: Callable[..., Any]
+    numeric: bool = True
+
+
+REGISTRY: Dict[str, FeatureDefinition] = {}
+
+
+def feature(name: str, *inputs: str, numeric: bool = True):
+    """
+    Register `kernel` as the definition of `name`. Features may use
+    features registered before them as inputs.
+    """
+    def register(kernel):
+        REGISTRY[name] = FeatureDefinition(name, inputs, kernel, numeric)
+        return kernel
+    return register
+
+
+# Kernels are built from plain arithmetic and the helpers below, which take
+# either float64 arrays (`compute_frame`) or Python floats (`compute_row`).
+# NumPy calls on scalars cost about a microsecond each, so the helpers use
+# plain float arithmetic for a single row.
+
+def safe_divide(numerator, denominator):
+    if isinstance(denominator, float) and isinstance(numerator, float):
+        return numerator / denominator if denominator != 0 else math.nan
+    out = np.full(np.broadcast_shapes(np.shape(numerator), np.shape(denominator)), np.nan)
+    return np.divide(numerator, denominator, out=out, where=denominator != 0)
+
+
+def nan_to_zero(value):
+    if isinstance(value, float):
+        return 0.0 if value != value else value
+    return np.where(np.isnan(value), 0.0, value)
+
+
+def is_present(value):
+    if isinstance(value, float):
+        return 0.0 if value != value else 1.0
+    return (~np.isnan(value)).astype(np.float64)
+
+
+def replace_with_nan(value, sentinel: float):
+    if isinstance(value, float):
+        return math.nan if value == sentinel else value
+    return np.where(value == sentinel, np.nan, value)
+
+
+def equals(value, expected: str):
+    if isinstance(value, np.ndarray):
+        return (value == expected).astype(np.int64)
+    return int(value == expected)
+
+
+def _ratio(name: str, numerator: str, denominator: str):
+    feature(name, numerator, denominator)(safe_divide)
+
+
+_ratio("credit_to_income_ratio", "AMT_CREDIT", "AMT_INCOME_TOTAL")
+_ratio("annuity_to_income_ratio", "AMT_ANNUITY", "AMT_INCOME_TOTAL")
+_ratio("credit_term_approx", "AMT_CREDIT", "AMT_ANNUITY")
+_ratio("goods_price_to_credit_ratio", "AMT_GOODS_PRICE", "AMT_CREDIT")
+
+
+@feature("age_years", "DAYS_BIRTH")
+def _age_years(days_birth):
+    return days_birth / -DAYS_PER_YEAR
+
+
+@feature("years_employed", "DAYS_EMPLOYED")
+def _years_employed(days_employed):
+    return replace_with_nan(days_employed, DAYS_EMPLOYED_UNKNOWN) / -DAYS_PER_YEAR
+
+
+_ratio("employed_to_age_ratio", "years_employed", "age_years")
+_ratio("income_per_person", "AMT_INCOME_TOTAL", "CNT_FAM_MEMBERS")
+_ratio("children_ratio", "CNT_CHILDREN", "CNT_FAM_MEMBERS")
+
+for _n in (1, 2, 3):
+    feature(f"ext_source_{_n}", f"EXT_SOURCE_{_n}")(lambda value: value)
+
+
+@feature("ext_sources_sum", "ext_source_1", "ext_source_2", "ext_source_3")
+def _ext_sources_sum(first, second, third):
+    return nan_to_zero(first) + nan_to_zero(second) + nan_to_zero(third)
+
+
+@feature("ext_source_mean", "EXT_SOURCE_1", "EXT_SOURCE_2", "EXT_SOURCE_3")
+def _ext_source_mean(first, second, third):
+    present = is_present(first) + is_present(second) + is_present(third)
+    return safe_divide(_ext_sources_sum(first, second, third), present)
+
+
+@feature("ext_sources_prod", "ext_source_1", "ext_source_2", "ext_source_3")
+def _ext_sources_prod(first, second, third):
+    return first * second * third
+
+
+feature("flag_own_car", "FLAG_OWN_CAR", numeric=False)(lambda value: equals(value, "Y"))
+feature("flag_own_realty", "FLAG_OWN_REALTY", numeric=False)(lambda value: equals(value, "Y"))
+feature("is_male", "CODE_GENDER", numeric=False)(lambda value: equals(value, "M"))
+feature("is_cash_loan", "NAME_CONTRACT_TYPE", numeric=False)(lambda value: equals(value, "Cash loans"))
+
+# Columns of the applicant_risk_features view, in its schema order
+FEATURE_VIEW_FEATURES = [
+    "credit_to_income_ratio", "annuity_to_income_ratio", "credit_term_approx",
+    "goods_price_to_credit_ratio", "age_years", "years_employed", "employed_to_age_ratio",
+    "income_per_person", "ext_source_1", "ext_source_2", "ext_source_3", "ext_source_mean",
+    "flag_own_car", "flag_own_realty"
+]
+
+# Added to the training cohort after it is joined to the feature view
+TRAINING_FEATURES = ["is_cash_loan", "is_male", "children_ratio", "ext_sources_sum", "ext_sources_prod"]
+
+# Recomputed at serving time from the request merged with online features
+REQUEST_TIME_FEATURES = ["goods_price_to_credit_ratio", "ext_sources_sum", "ext_sources_prod"]
+
+
+def compute_frame(df: pd.DataFrame, names: Sequence[str]) -> pd.DataFrame:
+    """
+    Compute `names` over every row of `df`. Inputs missing from `df` are NaN.
+    """
+    computed = {}
+    for name in names:
+        definition = REGISTRY[name]
+        args = []
+        for col in definition.inputs:
+            if col in computed:
+                args.append(computed[col])
+            elif col not in df.columns:
+                args.append(np.full(len(df), np.nan))
+            elif definition.numeric:
+                args.append(pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan))
+            else:
+                args.append(df[col].to_numpy(dtype=object))
+        computed[name] = np.broadcast_to(definition.kernel(*args), len(df))
+
+    return pd.DataFrame(computed, index=df.index)
+
+
+def compute_row(values: Dict[str, Any], names: Sequence[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute `names` for a single record into `out` (float64, one slot per
+    name), with the same kernels and coercion as `compute_frame`.
+    """
+    row = np.empty(len(names), dtype=np.float64) if out is None else out
+    computed = {}
+    for i, name in enumerate(names):
+        definition = REGISTRY[name]
+        args = []
+        for col in definition.inputs:
+            if col in computed:
+                args.append(computed[col])
+            elif definition.numeric:
+                args.append(_to_float(values.get(col)))
+            else:
+                args.append(values.get(col))
+        computed[name] = row[i] = definition.kernel(*args)
+
+    return row
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return math.nan
+    if not isinstance(value, (int, float, np.number)):
+        value = pd.to_numeric(value, errors="coerce")
+    return float(value)
+
+
+def raw_inputs(names: Sequence[str]) -> list:
+    """
+    Source columns `names` are computed from, excluding other features.
+    """
+    inputs = []
+    for name in names:
+        for col in REGISTRY[name].inputs:
+            if col not in REGISTRY and col not in inputs:
+                inputs.append(col)
+    return inputs
@@ -1,10 +1,83 @@
+"""
+Typed columnar storage for the pipeline's datasets.
+
+Every stage writes its output once, as Parquet with compact dtypes (float32,
+the smallest integer type that holds each integer column, categoricals for
+strings), and later stages read only the columns they need. The raw CSV is
+converted the same way on first use and reread from that cache until the
+CSV changes. Set WRITE_CSV=1 to also get a CSV copy of each saved dataset.
+"""
+import hashlib
+import os
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+from pathlib import Path
+
+CACHE_DIR = "data/cache"
+WRITE_CSV = os.getenv("WRITE_CSV", "0") == "1"
+
+
+def downcast(df: pd.DataFrame, exclude=()) -> pd.DataFrame:
+    """
+    Floats to float32, integers to the smallest signed type that holds
+    their range (0/1 flags become int8) and strings to categoricals.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in exclude:
+            pass
+        elif pd.api.types.is_float_dtype(series.dtype):
+            series = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            series = series.astype("category")
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
 
+def save_dataset(df: pd.DataFrame, filepath: str, csv: bool = WRITE_CSV, exclude=()) -> pd.DataFrame:
+    """
+    Downcast `df` and write it to `filepath` (Parquet), plus a `.csv` copy
+    if asked. Returns the downcast frame.
+    """
+    df = downcast(df, exclude)
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(filepath, index=False)
+    if csv:
+        df.to_csv(Path(filepath).with_suffix(".csv"), index=False)
+    return df
 
-def load_dataset(filepath: str = 'data/training_processed/training_dataset_final.csv', ext: str = 'csv'):
+
+def load_dataset(filepath: str = 'data/training_processed/training_dataset_final.csv', ext: str = 'csv',
+                 columns=None, memory_map: bool = True):
+    """
+    Parquet files and directories are memory-mapped rather than copied into
+    a read buffer, and only `columns` (all by default) are decoded.
+    """
     if ext == 'csv':
-        return pd.read_csv(filepath)
+        return pd.read_csv(filepath, usecols=columns)
     if ext == 'parquet':
-        return pd.read_parquet(filepath)
-    
-    return pd.DataFrame({"Exception" : "Wrong file extension"})
\ No newline at end of file
+        table = pq.read_table(filepath, columns=columns, memory_map=memory_map)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    return pd.DataFrame({"Exception" : "Wrong file extension"})
+
+
+def load_csv_cached(filepath: str, columns=None, cache_dir: str = CACHE_DIR, exclude=()) -> pd.DataFrame:
+    """
+    Load a CSV through its downcast Parquet copy in `cache_dir`, which is
+    rebuilt whenever the CSV is newer than it. Columns in `exclude` keep
+    the dtype read from the CSV; each exclusion set has its own copy.
+    """
+    name = Path(filepath).stem
+    if exclude:
+        name += "-" + hashlib.sha256("\n".join(sorted(exclude)).encode()).hexdigest()[:8]
+    cache_path = os.path.join(cache_dir, f"{name}.parquet")
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(filepath):
+        print(f"Caching {filepath} as {cache_path}")
+        save_dataset(pd.read_csv(filepath, engine="pyarrow"), cache_path, csv=False, exclude=exclude)
+
+    return load_dataset(cache_path, ext="parquet", columns=columns)
@@ -0,0 +1,30 @@
+"""
+Publishes the final training dataset to the path train.py reads.
+
+    python -m src.data_pipeline.publish_dataset
+
+Copies clean_features' output to `training.data_path` from the training
+config, replacing the previous copy atomically.
+"""
+import os
+import shutil
+import yaml
+from pathlib import Path
+from src.data_pipeline.clean_features import FINAL_PATH
+
+TRAINING_CONFIG = "configs/training_config.yaml"
+
+
+def publish(source: str, destination: str):
+    Path(destination).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(destination), f".{os.path.basename(destination)}.tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+if __name__ == "__main__":
+    with open(TRAINING_CONFIG) as f:
+        config = yaml.safe_load(f)
+
+    publish(FINAL_PATH, config["training"]["data_path"])
+    print(f"Published {FINAL_PATH} to {config['training']['data_path']}")
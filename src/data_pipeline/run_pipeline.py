@@ -0,0 +1,356 @@
+"""
+Runs the data pipeline stages as a DAG, skipping the ones whose results are
+still valid.
+
+    python -m src.data_pipeline.run_pipeline                  # every stage
+    python -m src.data_pipeline.run_pipeline clean_features   # a stage and what it needs
+    python -m src.data_pipeline.run_pipeline --dry-run
+
+Each stage declares the files it reads (data and code), the config sections
+it depends on and the files it writes. Its key hashes all of those plus the
+keys of its upstream stages, so a change reruns the stage and everything
+downstream of it and nothing else. A stage is skipped when its key matches
+its last successful run and its outputs have not changed since.
+
+Stages run as separate processes, as many at a time as `--jobs` allows once
+their upstream stages are done. Wall time and peak RSS of every run are kept
+in `data/.pipeline/<stage>.json` and its output in `data/.pipeline/logs/`.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+import yaml
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+STATE_DIR = "data/.pipeline"
+TRAINING_CONFIG = "configs/training_config.yaml"
+
+RAW_PATH = "data/raw/transactions.csv"
+FEATURES_PATH = "data/feature_store/customer_features"
+FEATURES_STATE_PATH = "data/feature_store/customer_features_state"
+TRAINING_DATASET_PATH = "data/training/training_dataset.parquet"
+FINAL_DATASET_PATH = "data/training/training_dataset_final.parquet"
+
+FEATURE_DEFINITIONS = "src/data_pipeline/feature_definitions.py"
+LOAD_DATASET = "src/data_pipeline/load_dataset.py"
+# How often to check the running stages for one that finished
+POLL_SECONDS = 0.05
+
+
+class Stage(NamedTuple):
+    name: str
+    command: Tuple[str, ...]
+    deps: Tuple[str, ...] = ()
+    outs: Tuple[str, ...] = ()
+    # (config file, top-level section) pairs
+    params: Tuple[Tuple[str, str], ...] = ()
+    # Stages to run first that are not linked through a file
+    after: Tuple[str, ...] = ()
+
+
+def module_stage(name: str, module: str, **kwargs) -> Stage:
+    return Stage(name, (sys.executable, "-m", module), **kwargs)
+
+
+def default_stages(config_path: str = TRAINING_CONFIG) -> List[Stage]:
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+
+    return [
+        module_stage(
+            "build_features", "feature_store.build_features",
+            deps=(RAW_PATH, "feature_store/build_features.py", FEATURE_DEFINITIONS),
+            outs=(FEATURES_PATH, FEATURES_STATE_PATH)
+        ),
+        module_stage(
+            "build_training_dataset", "src.data_pipeline.build_training_dataset",
+            deps=(RAW_PATH, FEATURES_PATH, "src/data_pipeline/build_training_dataset.py",
+                  FEATURE_DEFINITIONS, LOAD_DATASET),
+            outs=(TRAINING_DATASET_PATH,)
+        ),
+        module_stage(
+            "clean_features", "src.data_pipeline.clean_features",
+            deps=(TRAINING_DATASET_PATH, "src/data_pipeline/clean_features.py", LOAD_DATASET),
+            outs=("data/training/training_dataset_clean.parquet", FINAL_DATASET_PATH,
+                  "data/training/selected_features_final.txt")
+        ),
+        module_stage(
+            "publish_training_dataset", "src.data_pipeline.publish_dataset",
+            deps=(FINAL_DATASET_PATH, "src/data_pipeline/publish_dataset.py"),
+            outs=(config["training"]["data_path"],)
+        ),
+        # Trains on the published dataset in training.data_path and logs to MLflow
+        module_stage(
+            "train", "src.training.train",
+            deps=(config["training"]["data_path"], "src/training/train.py", "src/training/models.py",
+                  "src/data_pipeline/data_pipeline.py", LOAD_DATASET),
+            params=((config_path, "model"), (config_path, "training"), (config_path, "mlflow"))
+        ),
+        module_stage(
+            "select_features", "src.data_pipeline.select_features",
+            deps=(TRAINING_DATASET_PATH, "src/data_pipeline/select_features.py", LOAD_DATASET),
+            outs=("data/training/selected_features.txt", "data/training/training_dataset_reduced.parquet"),
+            after=("train",)
+        )
+    ]
+
+
+def _write_json(path: str, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class Fingerprints:
+    """
+    Content hashes of files and directories. A file's hash is cached by its
+    size and mtime, so only files that changed are read again.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self._cache = {}
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self._cache = json.load(f)
+
+    def file(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self._cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, path: str) -> Optional[str]:
+        """None when `path` does not exist. Hidden (in-progress) files are skipped."""
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(f for f in files if not f.startswith(".")):
+                full_path = os.path.join(root, name)
+                digest.update(f"{os.path.relpath(full_path, path)}\0{self.file(full_path)}\0".encode())
+        return digest.hexdigest()
+
+    def save(self):
+        _write_json(self.cache_path, self._cache)
+
+
+def _contains(parent: str, path: str) -> bool:
+    parent, path = os.path.normpath(parent), os.path.normpath(path)
+    return path == parent or path.startswith(parent + os.sep)
+
+
+class PipelineRunner:
+    def __init__(self, stages: List[Stage], state_dir: str = STATE_DIR, jobs: int = os.cpu_count() or 1):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.state_dir = state_dir
+        self.jobs = jobs
+
+        self.upstream: Dict[str, set] = {}
+        for stage in stages:
+            unknown = set(stage.after) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage {stage.name} runs after unknown stages {sorted(unknown)}")
+            self.upstream[stage.name] = set(stage.after) | {
+                other.name for other in stages if other is not stage
+                and any(_contains(out, dep) or _contains(dep, out) for out in other.outs for dep in stage.deps)
+            }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, visiting = [], set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependencies form a cycle through {name}")
+            visiting.add(name)
+            for upstream in sorted(self.upstream[name]):
+                visit(upstream)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _with_upstream(self, names) -> set:
+        selected, stack = set(), list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage {name}")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.upstream[name])
+        return selected
+
+    def stage_key(self, stage: Stage, keys: Dict[str, str], fingerprints: Fingerprints) -> str:
+        digest = hashlib.sha256(json.dumps([stage.name, stage.command[1:], stage.outs]).encode())
+        for dep in sorted(stage.deps):
+            digest.update(f"dep\0{dep}\0{fingerprints.path(dep)}\0".encode())
+        configs = {}
+        for config_path, section in stage.params:
+            if config_path not in configs:
+                with open(config_path) as f:
+                    configs[config_path] = yaml.safe_load(f)
+            value = json.dumps(configs[config_path].get(section), sort_keys=True, default=str)
+            digest.update(f"param\0{config_path}\0{section}\0{value}\0".encode())
+        for upstream in sorted(self.upstream[stage.name]):
+            digest.update(f"upstream\0{upstream}\0{keys[upstream]}\0".encode())
+        return digest.hexdigest()
+
+    def _state_path(self, name: str) -> str:
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    def load_state(self, name: str) -> dict:
+        path = self._state_path(name)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def is_fresh(self, stage: Stage, key: str, fingerprints: Fingerprints) -> bool:
+        state = self.load_state(stage.name)
+        if state.get("key") != key:
+            return False
+        outs = {out: fingerprints.path(out) for out in stage.outs}
+        return None not in outs.values() and state.get("outs") == outs
+
+    def _start(self, stage: Stage) -> subprocess.Popen:
+        log_path = os.path.join(self.state_dir, "logs", f"{stage.name}.log")
+        with open(log_path, "w") as log:
+            return subprocess.Popen(stage.command, stdout=log, stderr=subprocess.STDOUT)
+
+    def _finish(self, stage: Stage, key: str, status: int, rusage, seconds: float,
+                fingerprints: Fingerprints) -> dict:
+        # ru_maxrss is in kilobytes on Linux
+        result = {"seconds": round(seconds, 3), "max_rss_mb": round(rusage.ru_maxrss / 1024, 1)}
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code != 0:
+            return {"status": "failed", "error": f"exited with {exit_code}", **result}
+
+        outs = {out: fingerprints.path(out) for out in stage.outs}
+        missing = [out for out, digest in outs.items() if digest is None]
+        if missing:
+            return {"status": "failed", "error": f"did not write {missing}", **result}
+
+        _write_json(self._state_path(stage.name), {
+            "key": key, "outs": outs, **result,
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        })
+        return {"status": "ran", **result}
+
+    @staticmethod
+    def _reap(running: Dict[int, tuple]):
+        """
+        (pid, status, rusage) of a finished stage, or None while all are
+        still running. wait4 rather than Popen.wait, for the child's own peak
+        RSS, and on the stages' own pids so no other child is reaped.
+        """
+        for pid in running:
+            finished_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+            if finished_pid == pid:
+                return pid, status, rusage
+        return None
+
+    def run(self, targets: Optional[List[str]] = None, force: bool = False, dry_run: bool = False) -> Dict[str, dict]:
+        """
+        Run `targets` (every stage by default) and the stages they depend
+        on. `force` reruns the targets even if they are fresh. Returns each
+        stage's status: ran, skipped, failed, blocked (an upstream stage
+        failed) or, with `dry_run`, stale.
+        """
+        targets = list(targets or self.stages)
+        selected = self._with_upstream(targets)
+        forced = set(targets) if force else set()
+        os.makedirs(os.path.join(self.state_dir, "logs"), exist_ok=True)
+        fingerprints = Fingerprints(os.path.join(self.state_dir, "fingerprints.json"))
+
+        pending = [name for name in self.order if name in selected]
+        running: Dict[int, tuple] = {}
+        keys: Dict[str, str] = {}
+        results: Dict[str, dict] = {}
+
+        while pending or running:
+            for name in list(pending):
+                upstream = self.upstream[name]
+                if any(results.get(up, {}).get("status") in ("failed", "blocked") for up in upstream):
+                    results[name] = {"status": "blocked"}
+                    pending.remove(name)
+                    continue
+                if not all(up in results for up in upstream) or len(running) >= self.jobs:
+                    continue
+
+                stage = self.stages[name]
+                pending.remove(name)
+                keys[name] = self.stage_key(stage, keys, fingerprints)
+                if name not in forced and self.is_fresh(stage, keys[name], fingerprints):
+                    results[name] = {"status": "skipped"}
+                elif dry_run:
+                    results[name] = {"status": "stale"}
+                else:
+                    print(f"Starting {name}")
+                    process = self._start(stage)
+                    running[process.pid] = (stage, process, time.perf_counter())
+
+            if not running:
+                continue
+
+            finished = self._reap(running)
+            if finished is None:
+                time.sleep(POLL_SECONDS)
+                continue
+            pid, status, rusage = finished
+            stage, process, started = running.pop(pid)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            results[stage.name] = self._finish(
+                stage, keys[stage.name], status, rusage, time.perf_counter() - started, fingerprints
+            )
+            print(f"Finished {stage.name}: {results[stage.name]['status']}")
+
+        fingerprints.save()
+        return {name: results[name] for name in self.order if name in results}
+
+
+def print_summary(results: Dict[str, dict], state_dir: str = STATE_DIR):
+    print(f"\n{'stage':25s} {'status':8s} {'seconds':>8s} {'peak MB':>8s}")
+    for name, result in results.items():
+        seconds = f"{result['seconds']:.1f}" if "seconds" in result else "-"
+        peak = f"{result['max_rss_mb']:.0f}" if "max_rss_mb" in result else "-"
+        print(f"{name:25s} {result['status']:8s} {seconds:>8s} {peak:>8s}")
+        if result["status"] == "failed":
+            print(f"  {result['error']}, see {os.path.join(state_dir, 'logs', name + '.log')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("stages", nargs="*", help="Stages to bring up to date (default: all)")
+    parser.add_argument("--force", action="store_true", help="Rerun the named stages even if they are up to date")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Stages to run at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run")
+    args = parser.parse_args()
+
+    runner = PipelineRunner(default_stages(), jobs=args.jobs)
+    results = runner.run(args.stages, force=args.force, dry_run=args.dry_run)
+    print_summary(results)
+    sys.exit(1 if any(result["status"] == "failed" for result in results.values()) else 0)
@@ -4,6 +4,7 @@ import mlflow.sklearn
 import yaml
 import matplotlib.pyplot as plt
 from pathlib import Path
+from src.data_pipeline.load_dataset import load_dataset, save_dataset
 
 with open("configs/training_config.yaml") as f:
     config = yaml.safe_load(f)
@@ -28,7 +29,7 @@ run_id = latest_run["run_id"]
 model_uri = f"runs:/{run_id}/model"
 model = mlflow.sklearn.load_model(model_uri)
 
-df = pd.read_parquet("data/training/training_dataset.parquet")
+df = load_dataset("data/training/training_dataset.parquet", ext="parquet")
 X = df.drop(['SK_ID_CURR', 'label'], axis=1)
 feature_names = X.columns.tolist()
 
@@ -102,8 +103,7 @@ if hasattr(model, 'feature_importances_'):
 
     reduced_df = df[['SK_ID_CURR', 'label'] + selected_features]
 
-    reduced_df.to_parquet("data/training/training_dataset_reduced.parquet", index=False)
-    reduced_df.to_csv("data/training/training_dataset_reduced.csv", index=False)
+    save_dataset(reduced_df, "data/training/training_dataset_reduced.parquet")
 
 else:
     print("Model does not have feature_importances_ attribute")
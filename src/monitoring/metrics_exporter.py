@@ -1,6 +1,12 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST, CollectorRegistry
+import os
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST, CollectorRegistry
+from prometheus_client import multiprocess
 from fastapi import Response
 
+# When set before this module is imported, every worker process writes its
+# samples to memory-mapped files in this directory and /metrics aggregates them
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
 registry = CollectorRegistry()
 
 predictions_total = Counter(
@@ -13,7 +19,15 @@ predictions_total = Counter(
 api_latency = Histogram(
     name='api_latency_seconds',
     documentation='API response time',
-    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5],
+    registry=registry
+)
+
+stage_latency = Histogram(
+    name='prediction_stage_seconds',
+    documentation='Time spent in each stage of a prediction request',
+    labelnames=['endpoint', 'stage'],  # stage: validation, executor_wait, feast_fetch, feature_assembly, inference, response
+    buckets=[0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0],
     registry=registry
 )
 
@@ -23,6 +37,121 @@ errors_total = Counter(
     registry=registry
 )
 
+batch_size = Histogram(
+    name='micro_batch_size',
+    documentation='Rows per micro-batched model call',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128, 256],
+    registry=registry
+)
+
+batch_queue_wait = Histogram(
+    name='micro_batch_queue_wait_seconds',
+    documentation='Time a request waited in the micro-batch queue',
+    buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025],
+    registry=registry
+)
+
+executor_pending = Gauge(
+    name='inference_executor_pending_jobs',
+    documentation='Jobs running or queued in the inference executor',
+    multiprocess_mode='livesum',
+    registry=registry
+)
+
+executor_capacity = Gauge(
+    name='inference_executor_capacity_jobs',
+    documentation='Workers plus queue slots of the inference executor',
+    multiprocess_mode='livesum',
+    registry=registry
+)
+
+executor_wait = Histogram(
+    name='inference_executor_wait_seconds',
+    documentation='Time a job waited for an inference worker',
+    buckets=[0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5],
+    registry=registry
+)
+
+executor_rejections_total = Counter(
+    name='inference_executor_rejections_total',
+    documentation='Requests rejected because the inference queue was full',
+    registry=registry
+)
+
+feature_cache_hits_total = Counter(
+    name='feature_cache_hits_total',
+    documentation='Online feature lookups served from the in-process cache',
+    registry=registry
+)
+
+feature_cache_misses_total = Counter(
+    name='feature_cache_misses_total',
+    documentation='Online feature lookups that went to the Feast online store',
+    registry=registry
+)
+
+feature_cache_evictions_total = Counter(
+    name='feature_cache_evictions_total',
+    documentation='Entries removed from the feature cache',
+    labelnames=['reason'],  # "expired", "size" or "invalidated"
+    registry=registry
+)
+
+feature_cache_entries = Gauge(
+    name='feature_cache_entries',
+    documentation='Entries currently held in the feature cache',
+    multiprocess_mode='livesum',
+    registry=registry
+)
+
+feature_cache_bytes = Gauge(
+    name='feature_cache_bytes',
+    documentation='Estimated memory used by the feature cache',
+    multiprocess_mode='livesum',
+    registry=registry
+)
+
+degraded_fetches_total = Counter(
+    name='feature_fetch_degraded_total',
+    documentation='Online feature reads answered with imputed values',
+    labelnames=['reason'],  # exception name, e.g. "TimeoutError"
+    registry=registry
+)
+
+model_load_phase_seconds = Gauge(
+    name='model_load_phase_seconds',
+    documentation='Duration of each phase of the last model load',
+    labelnames=['phase'],  # resolve_run, download_model, load_cache, build_predictor, total, ...
+    multiprocess_mode='livemax',
+    registry=registry
+)
+
+model_swaps_total = Counter(
+    name='model_swaps_total',
+    documentation='Models hot-swapped in without a restart',
+    registry=registry
+)
+
+shadow_predictions_total = Counter(
+    name='shadow_predictions_total',
+    documentation='Rows scored by shadow models',
+    labelnames=['run_id'],
+    registry=registry
+)
+
+shadow_dropped_total = Counter(
+    name='shadow_dropped_total',
+    documentation='Rows not shadow-scored because the shadow queue was full',
+    registry=registry
+)
+
+audit_records_total = Counter(
+    name='audit_records_total',
+    documentation='Scored applications handed to the audit log',
+    labelnames=['outcome'],  # written, dropped (buffer full) or failed (write error)
+    registry=registry
+)
+
 def track_prediction(is_fraud: bool):
     result = "fraud" if is_fraud else "ok"
     predictions_total.labels(result=result).inc()
@@ -32,9 +161,98 @@ def track_latency(seconds: float):
     api_latency.observe(seconds)
 
 
+_stage_children = {}
+
+
+def track_stage_latencies(endpoint: str, stage_seconds: dict):
+    # Labelled children are cached: resolving labels costs more than the observation itself
+    for stage, seconds in stage_seconds.items():
+        child = _stage_children.get((endpoint, stage))
+        if child is None:
+            child = _stage_children[(endpoint, stage)] = stage_latency.labels(endpoint=endpoint, stage=stage)
+        child.observe(seconds)
+
+
 def track_error():
     errors_total.inc()
 
 
+def track_batch(size: int, queue_waits: list):
+    batch_size.observe(size)
+    for seconds in queue_waits:
+        batch_queue_wait.observe(seconds)
+
+
+def set_executor_capacity(capacity: int):
+    executor_capacity.set(capacity)
+
+
+def track_executor_pending(pending: int):
+    executor_pending.set(pending)
+
+
+def track_executor_wait(seconds: float):
+    executor_wait.observe(seconds)
+
+
+def track_executor_rejection():
+    executor_rejections_total.inc()
+
+
+def track_cache_hit():
+    feature_cache_hits_total.inc()
+
+
+def track_cache_miss():
+    feature_cache_misses_total.inc()
+
+
+def track_cache_eviction(reason: str, count: int = 1):
+    feature_cache_evictions_total.labels(reason=reason).inc(count)
+
+
+def track_cache_size(entries: int, size_bytes: int):
+    feature_cache_entries.set(entries)
+    feature_cache_bytes.set(size_bytes)
+
+
+def track_degraded_fetch(reason: str):
+    degraded_fetches_total.labels(reason=reason).inc()
+
+
+def track_model_load(phase_seconds: dict):
+    for phase, seconds in phase_seconds.items():
+        model_load_phase_seconds.labels(phase=phase).set(seconds)
+
+
+def track_model_swap():
+    model_swaps_total.inc()
+
+
+def track_shadow_scored(run_id: str, rows: int):
+    shadow_predictions_total.labels(run_id=run_id).inc(rows)
+
+
+def track_shadow_dropped(rows: int):
+    shadow_dropped_total.inc(rows)
+
+
+def track_audit_records(outcome: str, rows: int):
+    audit_records_total.labels(outcome=outcome).inc(rows)
+
+
+def mark_worker_dead(pid: int = None):
+    """
+    Drop the live gauges of an exiting worker in multiprocess mode.
+    """
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid(), MULTIPROC_DIR)
+
+
 def get_metrics() -> Response:
+    if MULTIPROC_DIR:
+        scrape_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(scrape_registry, path=MULTIPROC_DIR)
+        return Response(content=generate_latest(scrape_registry), media_type=CONTENT_TYPE_LATEST)
+
     return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,40 +1,189 @@
-from collections import deque
+import contextlib
+import glob
+import math
+import os
+import threading
+import time
+import numpy as np
+from typing import Dict, Optional, Sequence
 from logger.log import logging
 
-class SimplePerformanceMonitor:
+# Columns of each slot row; latency bucket counts follow
+_EPOCH, _FAILED, _SUM_US = 0, 1, 2
+_HEADER = 3
 
-    def __init__(self):
-        self.total_requests = 0
-        self.failed_requests = 0
-        self.latencies = deque(maxlen=100)  #last 100 latencies
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+
+class RollingLatencyMonitor:
+    """
+    Request latency percentiles over rolling time windows in fixed memory.
+
+    Latencies are counted in log-spaced buckets (each `growth` times wider
+    than the last, so quantiles are within about (growth - 1) / 2 of the
+    true value) inside a ring of `slot_seconds` time slots long enough for
+    the largest window. A window is the sum of its most recent slots.
+    Memory does not grow with the request rate.
+
+    With `shared_dir`, each worker process keeps its ring in a memory-mapped
+    file there and `get_stats` merges the files of every worker, so the
+    numbers cover all uvicorn workers whichever one answers. Only the owning
+    process writes a file; recording is serialized by a lock within it.
+    """
+
+    def __init__(self, shared_dir: Optional[str] = None, slot_seconds: int = 10,
+                 windows: Optional[Dict[str, int]] = None, min_latency_seconds: float = 1e-5,
+                 max_latency_seconds: float = 60.0, growth: float = 1.04):
+        self.windows = windows or WINDOWS
+        self.slot_seconds = slot_seconds
+        self.n_slots = math.ceil(max(self.windows.values()) / slot_seconds) + 1
+        self.min_us = min_latency_seconds * 1e6
+        self.log_growth = math.log(growth)
+        self.n_buckets = math.ceil(math.log(max_latency_seconds / min_latency_seconds) / self.log_growth) + 1
+        self.shared_dir = shared_dir
+        self._lock = threading.Lock()
+
+        # One row per slot plus a final row of lifetime totals
+        shape = self._shape = (self.n_slots + 1, _HEADER + self.n_buckets)
+        if shared_dir is None:
+            self._data = np.zeros(shape, dtype=np.int64)
+        else:
+            os.makedirs(shared_dir, exist_ok=True)
+            self._remove_expired_files()
+            path = os.path.join(shared_dir, f"latency-{os.getpid()}.bin")
+            self._data = np.memmap(path, dtype=np.int64, mode="w+", shape=shape)
+        # Plain memoryview indexing is several times cheaper than NumPy scalar indexing
+        self._cells = memoryview(self._data.reshape(-1))
+        self._row_size = shape[1]
         logging.info("Performance monitor started")
 
+    def _bucket(self, latency_us: float) -> int:
+        if latency_us <= self.min_us:
+            return 0
+        return min(int(math.log(latency_us / self.min_us) / self.log_growth) + 1, self.n_buckets - 1)
+
+    def _bucket_value(self, bucket: int) -> float:
+        # Geometric midpoint of the bucket, in seconds
+        if bucket == 0:
+            return self.min_us / 1e6
+        return self.min_us * math.exp((bucket - 0.5) * self.log_growth) / 1e6
+
     def record_request(self, latency_seconds: float, success: bool = True):
-        self.total_requests += 1
-        if not success:
-            self.failed_requests += 1
-        self.latencies.append(latency_seconds)
+        latency_us = int(latency_seconds * 1e6)
+        bucket = _HEADER + self._bucket(latency_us)
+        epoch = int(time.time() // self.slot_seconds)
+        row = (epoch % self.n_slots) * self._row_size
+        totals = self.n_slots * self._row_size
+        failed = 0 if success else 1
+        cells = self._cells
+
+        with self._lock:
+            if cells[row + _EPOCH] != epoch:
+                self._data[epoch % self.n_slots] = 0
+                cells[row + _EPOCH] = epoch
+            cells[row + _FAILED] += failed
+            cells[row + _SUM_US] += latency_us
+            cells[row + bucket] += 1
+
+            cells[totals + _FAILED] += failed
+            cells[totals + _SUM_US] += latency_us
+            cells[totals + bucket] += 1
 
     def get_stats(self) -> dict:
-        if len(self.latencies) == 0:
-            avg_latency = 0.0
-        else:
-            avg_latency = sum(self.latencies) / len(self.latencies)
+        rings = self._rings()
+        totals = sum(ring[self.n_slots] for ring in rings)
+        now_epoch = int(time.time() // self.slot_seconds)
+
+        lifetime = self._summarize(totals)
+        stats = {
+            "total_requests": lifetime["requests"],
+            "failed_requests": lifetime["failed_requests"],
+            "error_rate_percent": lifetime["error_rate_percent"],
+            "avg_latency_seconds": round(lifetime["avg_latency_seconds"], 3),
+            "workers": len(rings),
+            "windows": {}
+        }
+        for name, seconds in self.windows.items():
+            n_window_slots = math.ceil(seconds / self.slot_seconds)
+            merged = np.zeros(self._shape[1], dtype=np.int64)
+            for ring in rings:
+                slots = ring[:self.n_slots]
+                live = (slots[:, _EPOCH] > now_epoch - n_window_slots) & (slots[:, _EPOCH] <= now_epoch)
+                merged += slots[live].sum(axis=0)
+            stats["windows"][name] = self._summarize(merged, quantiles=(0.5, 0.95, 0.99))
 
-        error_rate = 0.0
-        if self.total_requests > 0:
-            error_rate = (self.failed_requests / self.total_requests) * 100
+        return stats
 
-        return {
-            "total_requests": self.total_requests,
-            "failed_requests": self.failed_requests,
-            "error_rate_percent": round(error_rate, 2),
-            "avg_latency_seconds": round(avg_latency, 3)
+    def _summarize(self, row: np.ndarray, quantiles: Sequence[float] = ()) -> dict:
+        counts = row[_HEADER:]
+        requests = int(counts.sum())
+        failed = int(row[_FAILED])
+        summary = {
+            "requests": requests,
+            "failed_requests": failed,
+            "error_rate_percent": round(failed / requests * 100, 2) if requests else 0.0,
+            "avg_latency_seconds": float(row[_SUM_US]) / requests / 1e6 if requests else 0.0
         }
+        if not quantiles:
+            return summary
+
+        summary["avg_latency_seconds"] = round(summary["avg_latency_seconds"], 6)
+        cumulative = np.cumsum(counts)
+        for q in quantiles:
+            key = f"p{round(q * 100):d}_seconds"
+            if not requests:
+                summary[key] = 0.0
+                continue
+            bucket = int(np.searchsorted(cumulative, q * requests))
+            summary[key] = round(self._bucket_value(bucket), 6)
+        summary["max_seconds"] = round(self._bucket_value(int(np.flatnonzero(counts)[-1])), 6) if requests else 0.0
+        return summary
+
+    def _rings(self) -> list:
+        if self.shared_dir is None:
+            return [np.array(self._data)]
+
+        rings = []
+        for path in glob.glob(os.path.join(self.shared_dir, "latency-*.bin")):
+            try:
+                rings.append(np.array(np.memmap(path, dtype=np.int64, mode="r", shape=self._shape)))
+            except (OSError, ValueError):
+                continue
+        return rings
+
+    def _remove_expired_files(self):
+        """
+        Drop files of workers that have exited and have nothing left in any
+        window, or whose contents cannot be read as a ring. Another worker
+        starting at the same time may remove a file first.
+        """
+        oldest_live_epoch = int(time.time() // self.slot_seconds) - self.n_slots
+        for path in glob.glob(os.path.join(self.shared_dir, "latency-*.bin")):
+            try:
+                pid = int(os.path.basename(path)[len("latency-"):-len(".bin")])
+            except ValueError:
+                continue
+            if _pid_alive(pid):
+                continue
 
+            try:
+                ring = np.memmap(path, dtype=np.int64, mode="r").reshape(-1, self._shape[1])
+                expired = ring[:-1, _EPOCH].max() < oldest_live_epoch
+            except ValueError:
+                expired = True
+            except OSError:
+                continue
+            if expired:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
 
-_monitor = SimplePerformanceMonitor()
 
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
 
-def get_monitor():
-    return _monitor
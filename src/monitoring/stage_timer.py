@@ -0,0 +1,45 @@
+import time
+from typing import Optional
+from src.monitoring.metrics_exporter import track_stage_latencies
+
+
+class StageTimer:
+    """
+    Lap timer for one request. `mark(stage)` charges the time since the
+    previous mark (or since `start`) to `stage`, adding up repeated stages.
+    `observe` exports the stages as `prediction_stage_seconds` and
+    `server_timing` formats them as a Server-Timing header value.
+    """
+
+    __slots__ = ("endpoint", "stages", "_last")
+
+    def __init__(self, endpoint: str, start: Optional[float] = None):
+        self.endpoint = endpoint
+        self.stages = {}
+        self._last = start if start is not None else time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def observe(self):
+        track_stage_latencies(self.endpoint, self.stages)
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items())
+
+
+class RequestStartMiddleware:
+    """
+    Pure ASGI middleware that stamps `request.state.request_start` when a
+    request arrives, so handlers can time body parsing and validation.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["request_start"] = time.perf_counter()
+        await self.app(scope, receive, send)
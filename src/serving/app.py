@@ -1,31 +1,60 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Body, Request, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timezone
 import yaml
-import pandas as pd
 import numpy as np
 import time
+import asyncio
+from typing import List, Optional
 from src.serving.schemas import (
     PredictionRequest,
     PredictionResponse,
+    BatchPredictionRequest,
+    BatchPredictionItem,
+    BatchPredictionResponse,
     HealthResponse
 )
 from src.serving.model_loader import ModelLoader
+from src.serving.artifact_cache import ModelArtifactCache
+from src.serving.model_watcher import ModelWatcher
+from src.serving.shadow_scorer import ShadowScorer
+from src.serving.audit_log import AuditLogSink
 from src.serving.feature_service import FeatureService
+from src.serving.feature_cache import FeatureCache
+from src.serving.feature_assembly import (
+    EXPECTED_COLUMNS,
+    FeatureVectorBuilder,
+    merge_features,
+    build_feature_matrix
+)
+from src.serving.micro_batcher import MicroBatcher
+from src.serving.inference_executor import InferenceExecutor, ExecutorSaturatedError
 from src.monitoring.metrics_exporter import (
     get_metrics,
     track_prediction,
     track_latency,
-    track_error
+    track_error,
+    mark_worker_dead
 )
-from src.monitoring.performance_monitor import get_monitor
+from src.monitoring.performance_monitor import RollingLatencyMonitor
+from src.monitoring.stage_timer import StageTimer, RequestStartMiddleware
 from src.monitoring.alerting import alert_model_failure
-from logger.log import logging
+from logger.log import logging, configure_logging, shutdown_logging
 import os
 
 config_path = os.getenv("SERVING_CONFIG", "configs/serving_config.yaml")
 with open(config_path) as f:
     config = yaml.safe_load(f)
 
+configure_logging(
+    level=config["logging"]["level"],
+    queue_size=config["logging"]["queue_size"],
+    batch_size=config["logging"]["batch_size"],
+    flush_interval_ms=config["logging"]["flush_interval_ms"],
+    sampling=config["logging"]["sampling"]
+)
+request_log = logging.getLogger("serving.request")
+
 config["api"]["host"] = os.getenv("API_HOST", config["api"]["host"])
 config["api"]["port"] = int(os.getenv("API_PORT", config["api"]["port"]))
 config["mlflow"]["tracking_uri"] = os.getenv(
@@ -33,31 +62,138 @@ config["mlflow"]["tracking_uri"] = os.getenv(
     config["mlflow"]["tracking_uri"]
 )
 
+STAGE_TIMING_HEADER = config["instrumentation"]["server_timing_header"]
+
 REPO_PATH = os.getenv("FEAST_REPO_PATH", "feature_store/feature_repo")
 
 app = FastAPI(title="Fraud Detection API", version="2.0.0")
+app.add_middleware(RequestStartMiddleware)
 
-performance_monitor = get_monitor()
+performance_monitor = RollingLatencyMonitor(
+    shared_dir=config["performance_monitor"]["shared_dir"],
+    slot_seconds=config["performance_monitor"]["slot_seconds"]
+)
 
-feature_service = FeatureService(repo_path=REPO_PATH)
+cache_config = config["feature_cache"]
+feature_service = FeatureService(
+    repo_path=REPO_PATH,
+    cache=FeatureCache(
+        max_entries=cache_config["max_entries"],
+        ttl_seconds=cache_config["ttl_seconds"],
+        max_bytes=cache_config["max_bytes"]
+    ) if cache_config["enabled"] else None,
+    watermark_check_seconds=cache_config["watermark_check_seconds"]
+)
+if config["redis_fast_path"]["enabled"]:
+    feature_service.use_redis_fast_path(config["redis_fast_path"]["max_connections"])
+if config["async_features"]["enabled"]:
+    feature_service.use_async_reader(
+        max_connections=config["async_features"]["max_connections"],
+        timeout_ms=config["async_features"]["timeout_ms"],
+        impute_values=config["async_features"]["impute_values"]
+    )
 
+artifact_cache_config = config["model"]["artifact_cache"]
 model_loader = ModelLoader(
     tracking_uri=config["mlflow"]["tracking_uri"],
-    experiment_name=config["mlflow"]["experiment_name"]
+    experiment_name=config["mlflow"]["experiment_name"],
+    predictor=config["model"]["predictor"],
+    max_compiled_rows=config["model"]["max_compiled_rows"],
+    artifact_cache=ModelArtifactCache(
+        cache_dir=artifact_cache_config["dir"],
+        max_age_seconds=artifact_cache_config["max_age_seconds"]
+    ) if artifact_cache_config["enabled"] else None,
+    warmup_rows=config["model"]["hot_swap"]["warmup_rows"]
+)
+
+shadow_config = config["shadow"]
+shadow_scorer = ShadowScorer(
+    loaders=[
+        ModelLoader(
+            tracking_uri=config["mlflow"]["tracking_uri"],
+            experiment_name=config["mlflow"]["experiment_name"],
+            predictor=config["model"]["predictor"],
+            max_compiled_rows=config["model"]["max_compiled_rows"],
+            artifact_cache=model_loader.artifact_cache,
+            pinned_run_id=run_id
+        )
+        for run_id in shadow_config["run_ids"]
+    ],
+    log_dir=shadow_config["log_dir"],
+    sample_rate=shadow_config["sample_rate"],
+    max_batch_size=shadow_config["max_batch_size"],
+    max_wait_ms=shadow_config["max_wait_ms"],
+    max_queue_rows=shadow_config["max_queue_rows"]
+)
+
+audit_config = config["audit_log"]
+audit_log = AuditLogSink(
+    log_dir=audit_config["log_dir"],
+    feature_columns=EXPECTED_COLUMNS,
+    flush_rows=audit_config["flush_rows"],
+    flush_interval_seconds=audit_config["flush_interval_seconds"],
+    max_buffered_rows=audit_config["max_buffered_rows"],
+    rotate_bytes=audit_config["rotate_bytes"],
+    rotate_seconds=audit_config["rotate_seconds"]
+)
+
+model_watcher = ModelWatcher(
+    model_loader,
+    poll_seconds=config["model"]["hot_swap"]["poll_seconds"],
+    source=config["model"]["hot_swap"]["source"]
+)
+
+inference_executor = InferenceExecutor(
+    max_workers=config["inference_executor"]["max_workers"],
+    max_queue_size=config["inference_executor"]["max_queue_size"]
+)
+
+micro_batcher = MicroBatcher(
+    predict_fn=model_loader.predict_batch,
+    max_batch_size=config["micro_batching"]["max_batch_size"],
+    max_wait_us=config["micro_batching"]["max_wait_us"],
+    executor=inference_executor
 )
 
 @app.on_event("startup")
 async def startup():
     print("Starting API...")
+    if config["micro_batching"]["enabled"]:
+        await micro_batcher.start()
+    if audit_config["enabled"]:
+        audit_log.start()
+    shadow_load = None
+    if shadow_config["enabled"] and shadow_scorer.loaders:
+        shadow_load = asyncio.create_task(asyncio.to_thread(shadow_scorer.load))
     try:
         if model_loader.load_model():
             print("Model loaded successfully")
+            if model_loader.feature_order is not None and model_loader.feature_order != EXPECTED_COLUMNS:
+                print(f"WARNING: Model was trained on columns {model_loader.feature_order}, serving {EXPECTED_COLUMNS}")
         else:
             print("WARNING: Model failed to load")
             alert_model_failure("Model failed to load during startup")
     except Exception as e:
         print(f"ERROR loading model: {e}")
         alert_model_failure(f"Exception during model loading: {str(e)}")
+    if config["model"]["hot_swap"]["enabled"]:
+        await model_watcher.start()
+    if shadow_load is not None:
+        loaded = await shadow_load
+        print(f"Shadow models loaded: {sum(loaded)}/{len(loaded)}")
+        shadow_scorer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await model_watcher.stop()
+    await micro_batcher.stop()
+    await asyncio.to_thread(shadow_scorer.stop)
+    await asyncio.to_thread(audit_log.stop)
+    inference_executor.shutdown()
+    mark_worker_dead()
+    shutdown_logging()
+    if feature_service.async_reader is not None:
+        await feature_service.async_reader.close()
 
 @app.get("/health", response_model=HealthResponse)
 async def health():
@@ -69,68 +205,106 @@ async def health():
         feast_connected=feast_status
     )
 
-EXPECTED_COLUMNS = [
-    "SK_ID_CURR", "ext_source_mean", "ext_sources_prod", "EXT_SOURCE_3",
-    "ext_sources_sum", "EXT_SOURCE_2", "EXT_SOURCE_1", "DAYS_BIRTH",
-    "age_years", "years_employed", "goods_price_to_credit_ratio",
-    "REGION_RATING_CLIENT_W_CITY", "REGION_RATING_CLIENT",
-    "DAYS_LAST_PHONE_CHANGE", "is_male", "DAYS_ID_PUBLISH",
-    "REG_CITY_NOT_WORK_CITY", "FLAG_EMP_PHONE", "DAYS_EMPLOYED",
-    "REG_CITY_NOT_LIVE_CITY", "FLAG_DOCUMENT_3"
-]
+BATCH_MAX_SIZE = config["batch"]["max_batch_size"]
+BATCH_STREAM_CHUNK_SIZE = config["batch"]["stream_chunk_size"]
+
+feature_vector_builder = FeatureVectorBuilder(EXPECTED_COLUMNS)
+
+def _assemble_features(request_data: dict, feast_features: dict) -> np.ndarray:
+    merged_features = merge_features(request_data, feast_features)
+
+    request_log.info('features used for prediction: %s', merged_features)
+
+    return feature_vector_builder.build(merged_features)
+
+def _prepare_features(request_data: dict, timer: StageTimer) -> np.ndarray:
+    """
+    Blocking part of /predict: Feast lookup and feature assembly.
+    Runs on the inference executor, never on the event loop.
+    """
+    timer.mark("executor_wait")
+    feast_features = feature_service.get_online_features(request_data.get("SK_ID_CURR"))
+    timer.mark("feast_fetch")
+    return _assemble_features(request_data, feast_features)
+
+
+def _timed_response(model, timer: StageTimer) -> Response:
+    """
+    Serialize the response inside the handler so that serialization is
+    part of the "response" stage, then export the stage timings.
+    """
+    response = Response(content=model.model_dump_json(), media_type="application/json")
+    timer.mark("response")
+    timer.observe()
+    if STAGE_TIMING_HEADER:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest, http_request: Request):
     """
     Transasction prediction endpoint.
     """
     start_time = time.time()
     success = False
+    timer = StageTimer("predict", start=getattr(http_request.state, "request_start", None))
 
     try:
-        logging.info('=== Prediction started ===')
+        request_log.info('=== Prediction started ===')
         request_data = request.model_dump(exclude_unset=True)
+        timer.mark("validation")
+
+        degraded = False
+        if feature_service.async_reader is not None:
+            feast_features, degraded = await feature_service.get_online_features_async(
+                request_data.get("SK_ID_CURR")
+            )
+            timer.mark("feast_fetch")
+            features_row = _assemble_features(request_data, feast_features)
+        else:
+            features_row = await inference_executor.run(_prepare_features, request_data, timer)
+        clean_features_dict = feature_vector_builder.to_dict(features_row)
+        timer.mark("feature_assembly")
+
+        # One model snapshot scores the request and is recorded with it
+        bundle = model_loader.snapshot()
+        if micro_batcher.is_running():
+            prediction, probability = await micro_batcher.submit(features_row, bundle)
+        else:
+            prediction, probability = await inference_executor.run(
+                model_loader.predict, features_row.reshape(1, -1), bundle
+            )
+        timer.mark("inference")
 
-        feast_features = feature_service.get_online_features(request_data.get("SK_ID_CURR"))
-        merged_features = {**feast_features, **request_data}
-
-        amt_credit = request_data.get("AMT_CREDIT", 1.0)
-        amt_goods = request_data.get("AMT_GOODS_PRICE", 0.0)
-        merged_features["goods_price_to_credit_ratio"] = amt_goods / amt_credit
-        features_df = pd.DataFrame([merged_features])
-
-        logging.info('features used for prediction: ', features_df)
-
-        for col in EXPECTED_COLUMNS:
-            if col not in features_df.columns:
-                features_df[col] = np.nan
-
-        features_df = features_df[EXPECTED_COLUMNS]
-
-        for col in features_df.columns:
-            features_df[col] = pd.to_numeric(features_df[col], errors='coerce')
-
-        features_df = features_df.fillna(0)
-
-        clean_features_dict = features_df.iloc[0].to_dict()
-
-        prediction, probability = model_loader.predict(features_df)
         risk_level = model_loader.get_risk_level(probability)
+        if shadow_scorer.sampled():
+            shadow_scorer.submit(
+                [request.SK_ID_CURR], features_row.reshape(1, -1), bundle.run_id, [probability]
+            )
+        if audit_log.is_running():
+            audit_log.submit(
+                "predict", [request_data], features_row.reshape(1, -1), [probability], [prediction],
+                bundle.threshold, bundle.run_id
+            )
 
         track_prediction(is_fraud=(prediction == 1))
         success = True
 
-        return PredictionResponse(
+        return _timed_response(PredictionResponse(
             prediction=int(prediction),
             probability=round(float(probability), 4),
             risk_level=risk_level,
             used_features=clean_features_dict,
+            degraded=degraded,
             timestamp=datetime.now(timezone.utc)
-        )
+        ), timer)
+
+    except ExecutorSaturatedError as e:
+        track_error()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        request_log.exception("Prediction failed")
         track_error()
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
@@ -139,6 +313,179 @@ async def predict(request: PredictionRequest):
         track_latency(total_duration)
         performance_monitor.record_request(latency_seconds=total_duration, success=success)
 
+def _score_batch(instances: List[PredictionRequest], include_features: bool,
+                 timer: StageTimer) -> List[BatchPredictionItem]:
+    """
+    Score a list of applicants with one Feast call and one model call.
+    Rows that fail feature assembly are returned with an error instead
+    of failing the whole batch.
+    """
+    timer.mark("executor_wait")
+    request_rows = [instance.model_dump(exclude_unset=True) for instance in instances]
+    feast_rows = feature_service.get_online_features_batch(
+        [row["SK_ID_CURR"] for row in request_rows]
+    )
+    timer.mark("feast_fetch")
+
+    items = [None] * len(request_rows)
+    records, positions = [], []
+    for i, (request_data, feast_features) in enumerate(zip(request_rows, feast_rows)):
+        try:
+            records.append(merge_features(request_data, feast_features))
+            positions.append(i)
+        except Exception as e:
+            track_error()
+            items[i] = BatchPredictionItem(SK_ID_CURR=request_data["SK_ID_CURR"], error=str(e))
+
+    if records:
+        features_matrix = build_feature_matrix(records)
+        timer.mark("feature_assembly")
+        bundle = model_loader.snapshot()
+        predictions, probabilities = model_loader.predict_batch(features_matrix, bundle)
+        timer.mark("inference")
+        if shadow_scorer.sampled():
+            shadow_scorer.submit(
+                [request_rows[i]["SK_ID_CURR"] for i in positions],
+                features_matrix, bundle.run_id, probabilities
+            )
+        if audit_log.is_running():
+            audit_log.submit(
+                "predict_batch", [request_rows[i] for i in positions], features_matrix,
+                probabilities, predictions, bundle.threshold, bundle.run_id
+            )
+
+        for row, i in enumerate(positions):
+            probability = float(probabilities[row])
+            prediction = int(predictions[row])
+            track_prediction(is_fraud=(prediction == 1))
+
+            items[i] = BatchPredictionItem(
+                SK_ID_CURR=request_rows[i]["SK_ID_CURR"],
+                prediction=prediction,
+                probability=round(probability, 4),
+                risk_level=model_loader.get_risk_level(probability),
+                used_features=(
+                    dict(zip(EXPECTED_COLUMNS, features_matrix[row].tolist()))
+                    if include_features else None
+                )
+            )
+
+    return items
+
+
+async def _stream_batch(instances: List[PredictionRequest], include_features: bool):
+    """
+    Yield NDJSON lines chunk by chunk, so only one chunk of features and
+    results is held in memory at a time. Each chunk is scored on the
+    inference executor; a chunk it rejects is returned as error lines.
+    """
+    for start in range(0, len(instances), BATCH_STREAM_CHUNK_SIZE):
+        chunk = instances[start:start + BATCH_STREAM_CHUNK_SIZE]
+        timer = StageTimer("predict_batch_stream")
+        try:
+            items = await inference_executor.run(_score_batch, chunk, include_features, timer)
+        except Exception as e:
+            track_error()
+            items = [
+                BatchPredictionItem(SK_ID_CURR=instance.SK_ID_CURR, error=f"Prediction failed: {str(e)}")
+                for instance in chunk
+            ]
+
+        lines = "".join(item.model_dump_json(exclude_none=True) + "\n" for item in items)
+        timer.mark("response")
+        timer.observe()
+        yield lines
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest, http_request: Request, stream: bool = False):
+    """
+    Batch prediction endpoint. With ?stream=true results are streamed
+    back as NDJSON, one line per applicant.
+    """
+    timer = StageTimer("predict_batch", start=getattr(http_request.state, "request_start", None))
+    timer.mark("validation")
+    if stream:
+        if inference_executor.saturated:
+            track_error()
+            raise HTTPException(
+                status_code=503, detail="Inference queue is full", headers={"Retry-After": "1"}
+            )
+        return StreamingResponse(
+            _stream_batch(request.instances, request.include_features),
+            media_type="application/x-ndjson"
+        )
+
+    if len(request.instances) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.instances)} exceeds {BATCH_MAX_SIZE} rows, use ?stream=true"
+        )
+
+    start_time = time.time()
+    success = False
+
+    try:
+        items = await inference_executor.run(_score_batch, request.instances, request.include_features, timer)
+        n_failed = sum(1 for item in items if item.error is not None)
+        success = True
+
+        return _timed_response(BatchPredictionResponse(
+            results=items,
+            n_success=len(items) - n_failed,
+            n_failed=n_failed,
+            timestamp=datetime.now(timezone.utc)
+        ), timer)
+
+    except ExecutorSaturatedError as e:
+        track_error()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    except Exception as e:
+        request_log.exception("Batch prediction failed")
+        track_error()
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+    finally:
+        performance_monitor.record_request(latency_seconds=time.time() - start_time, success=success)
+
+
+@app.post("/admin/feature-cache/invalidate")
+async def invalidate_feature_cache(entity_ids: Optional[List[int]] = Body(None)):
+    """
+    Drop cached online features for the given SK_ID_CURRs, or all of them.
+    Only affects the worker that serves the call; materializations are
+    picked up by every worker through the registry watermark.
+    """
+    return {"invalidated": feature_service.invalidate_cache(entity_ids)}
+
+
+@app.get("/admin/model")
+async def model_status():
+    """
+    Active model run, how it was loaded and the last hot-swap.
+    """
+    bundle = model_loader.bundle
+    return {
+        "run_id": bundle.run_id if bundle else None,
+        "source": bundle.source if bundle else None,
+        "threshold": bundle.threshold if bundle else None,
+        "loaded_at": bundle.loaded_at if bundle else None,
+        "load_timings": bundle.load_timings if bundle else {},
+        "last_swap": model_loader.last_swap,
+        "watcher_running": model_watcher.is_running()
+    }
+
+
+@app.post("/admin/model/reload")
+async def reload_model():
+    """
+    Check for a newer model now instead of waiting for the next poll.
+    """
+    swapped = await model_watcher.check_now()
+    return {"swapped": swapped, "run_id": model_loader.run_id}
+
+
 @app.get("/metrics")
 async def metrics():
     """
@@ -150,7 +497,8 @@ async def metrics():
 @app.get("/performance")
 async def get_performance():
     """
-    Get current performance metrics.
+    Request counts and latency percentiles over 1m/5m/1h windows,
+    merged across workers when performance_monitor.shared_dir is set.
     """
     return performance_monitor.get_stats()
 
@@ -163,6 +511,7 @@ async def root():
         "endpoints": {
             "health": "/health",
             "predict": "/predict (POST)",
+            "predict_batch": "/predict/batch (POST, ?stream=true for NDJSON)",
             "metrics": "/metrics (Prometheus)",
             "performance": "/performance (JSON stats)",
             "docs": "/docs"
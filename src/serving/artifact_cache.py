@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import joblib
+from typing import Any, Dict, List, Optional, Tuple
+
+POINTER_FILE = "current.json"
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+
+
+class ModelArtifactCache:
+    """
+    Local copy of MLflow model artifacts, one directory per run id.
+
+    Each run directory holds the model as a joblib file, whose NumPy arrays
+    are memory-mapped on load, and a meta.json with `best_threshold` and the
+    feature order. `current.json` names the run the service last resolved
+    and when, so a restart within `max_age_seconds` never talks to MLflow.
+    Entries are written to a temporary directory and renamed into place,
+    so a crash mid-write never leaves a half-written run behind.
+    """
+
+    def __init__(self, cache_dir: str, max_age_seconds: Optional[float] = 3600):
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_seconds
+
+    def current(self) -> Optional[Tuple[str, float]]:
+        """
+        Returns the (run_id, resolved_at) of the last resolved run, if cached.
+        """
+        try:
+            with open(os.path.join(self.cache_dir, POINTER_FILE)) as f:
+                pointer = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not self.contains(pointer["run_id"]):
+            return None
+        return pointer["run_id"], pointer["resolved_at"]
+
+    def is_fresh(self, resolved_at: float) -> bool:
+        if self.max_age_seconds is None:
+            return True
+        return time.time() - resolved_at < self.max_age_seconds
+
+    def contains(self, run_id: str) -> bool:
+        run_dir = os.path.join(self.cache_dir, run_id)
+        return os.path.isfile(os.path.join(run_dir, MODEL_FILE)) and os.path.isfile(os.path.join(run_dir, META_FILE))
+
+    def load(self, run_id: str) -> Tuple[Any, Dict[str, Any]]:
+        run_dir = os.path.join(self.cache_dir, run_id)
+        with open(os.path.join(run_dir, META_FILE)) as f:
+            meta = json.load(f)
+        model = joblib.load(os.path.join(run_dir, MODEL_FILE), mmap_mode="r")
+        return model, meta
+
+    def store(self, run_id: str, model, threshold: float, feature_order: Optional[List[str]]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        run_dir = os.path.join(self.cache_dir, run_id)
+        tmp_dir = tempfile.mkdtemp(prefix=f".{run_id}-", dir=self.cache_dir)
+        try:
+            joblib.dump(model, os.path.join(tmp_dir, MODEL_FILE))
+            with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                json.dump({
+                    "run_id": run_id,
+                    "best_threshold": threshold,
+                    "feature_order": feature_order,
+                    "cached_at": time.time()
+                }, f)
+
+            # First writer wins: a run's artifacts never change, and replacing
+            # the directory under a concurrent `load` would break it
+            if not self.contains(run_id):
+                os.replace(tmp_dir, run_dir)
+        except OSError:
+            if not self.contains(run_id):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def mark_current(self, run_id: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".current-", dir=self.cache_dir)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"run_id": run_id, "resolved_at": time.time()}, f)
+        os.replace(tmp_path, os.path.join(self.cache_dir, POINTER_FILE))
@@ -0,0 +1,67 @@
+import asyncio
+import numpy as np
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Dict, List, Optional, Tuple
+from src.serving.redis_feature_reader import RedisFeatureReader, connection_pool_from_string
+from src.monitoring.metrics_exporter import track_degraded_fetch
+
+
+class AsyncRedisFeatureReader:
+    """
+    asyncio counterpart of RedisFeatureReader.
+
+    Uses the same key layout and decoding, but issues the pipelined HMGETs
+    from a pooled `redis.asyncio` client so concurrent requests overlap their
+    round trips instead of each blocking a worker. Every read is bounded by
+    `timeout_ms`; on timeout or a Redis error the rows are filled from
+    `impute_values` (NaN for features without one) and reported as degraded.
+    """
+
+    def __init__(self, layout: RedisFeatureReader, client: aioredis.Redis, timeout_ms: float = 20,
+                 impute_values: Optional[Dict[str, float]] = None):
+        self.layout = layout
+        self.client = client
+        self.timeout = timeout_ms / 1000
+        impute_values = impute_values or {}
+        self._imputed_row = np.array(
+            [impute_values.get(name, np.nan) for name in layout.feature_names], dtype=np.float32
+        )
+
+    @classmethod
+    def from_store(cls, store, feature_refs: List[str], max_connections: int = 64,
+                   timeout_ms: float = 20, impute_values: Optional[Dict[str, float]] = None):
+        layout = RedisFeatureReader.from_store(store, feature_refs, max_connections=1)
+        pool = connection_pool_from_string(
+            store.config.online_store.connection_string, max_connections, pool_class=aioredis.ConnectionPool
+        )
+        return cls(layout, aioredis.Redis(connection_pool=pool), timeout_ms, impute_values)
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.layout.feature_names
+
+    async def read(self, entity_ids: List[int]) -> Tuple[np.ndarray, bool]:
+        """
+        Returns the (n, n_features) float32 matrix and whether it was imputed.
+        """
+        try:
+            replies = await asyncio.wait_for(self._hmget(entity_ids), self.timeout)
+        except (asyncio.TimeoutError, RedisError, OSError) as e:
+            track_degraded_fetch(type(e).__name__)
+            return np.tile(self._imputed_row, (len(entity_ids), 1)), True
+
+        return self.layout.decode(replies), False
+
+    async def read_dicts(self, entity_ids: List[int]) -> Tuple[List[Dict[str, float]], bool]:
+        matrix, degraded = await self.read(entity_ids)
+        return [dict(zip(self.feature_names, row)) for row in matrix.tolist()], degraded
+
+    async def _hmget(self, entity_ids: List[int]) -> list:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for entity_id in entity_ids:
+                pipe.hmget(self.layout.redis_key(entity_id), self.layout.hash_fields)
+            return await pipe.execute()
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from src.monitoring.metrics_exporter import track_audit_records
+
+JOIN_KEY = "SK_ID_CURR"
+
+
+class AuditLogSink:
+    """
+    Persists every scored application to rotated, zstd-compressed Parquet.
+
+    `submit` appends the champion's results to an in-memory buffer and
+    returns; a background thread writes the buffer as one row group when
+    it holds `flush_rows` rows or every `flush_interval_seconds`. Past
+    `max_buffered_rows`, new submissions are dropped and counted.
+
+    Files are written under `log_dir/date=YYYY-MM-DD/` with a leading dot
+    and renamed once closed, after `rotate_bytes` or `rotate_seconds` or at
+    midnight UTC, so `pd.read_parquet(log_dir)` only ever sees complete
+    files. Each row holds the request payload as JSON, one column per
+    model feature, the probability, prediction, threshold and model run id.
+    """
+
+    def __init__(self, log_dir: str, feature_columns: Sequence[str], flush_rows: int = 5000,
+                 flush_interval_seconds: float = 5, max_buffered_rows: int = 100000,
+                 rotate_bytes: int = 128 * 1024 * 1024, rotate_seconds: float = 3600,
+                 compression: str = "zstd"):
+        self.log_dir = log_dir
+        self.feature_columns = list(feature_columns)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_seconds
+        self.max_buffered_rows = max_buffered_rows
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compression = compression
+
+        self._stored_features = [(i, name) for i, name in enumerate(self.feature_columns) if name != JOIN_KEY]
+        self.schema = pa.schema(
+            [
+                ("timestamp", pa.timestamp("us", tz="UTC")),
+                ("endpoint", pa.string()),
+                (JOIN_KEY, pa.int64()),
+                ("request_json", pa.string())
+            ]
+            + [(name, pa.float64()) for _, name in self._stored_features]
+            + [
+                ("probability", pa.float64()),
+                ("prediction", pa.int8()),
+                ("threshold", pa.float64()),
+                ("model_run_id", pa.string())
+            ]
+        )
+
+        self._buffer = []
+        self._buffered_rows = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._writer = None
+        self._path = None
+        self._in_progress_path = None
+        self._opened_at = None
+        self._opened_day = None
+        self._file_seq = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Write everything still buffered and close the current file.
+        """
+        if self._thread is not None:
+            self._stopping = True
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, endpoint: str, requests: List[Dict[str, Any]], features: np.ndarray,
+               probabilities: Sequence[float], predictions: Sequence[int], threshold: float,
+               model_run_id: Optional[str]) -> bool:
+        """
+        Buffer one scored request or batch. Safe to call from any thread;
+        never blocks on I/O. Returns False if the rows were dropped.
+        """
+        n_rows = len(requests)
+        if not n_rows:
+            return True
+        with self._lock:
+            if self._buffered_rows + n_rows > self.max_buffered_rows:
+                track_audit_records("dropped", n_rows)
+                return False
+            self._buffer.append((
+                datetime.now(timezone.utc), endpoint, requests, np.asarray(features),
+                np.asarray(probabilities, dtype=np.float64), np.asarray(predictions, dtype=np.int8),
+                threshold, model_run_id
+            ))
+            self._buffered_rows += n_rows
+            full = self._buffered_rows >= self.flush_rows
+
+        if full:
+            self._wake.set()
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping
+
+            self.flush()
+            if self._writer is not None and self._rotation_due():
+                self._close_file()
+
+            if stopping:
+                if self._writer is not None:
+                    self._close_file()
+                return
+
+    def flush(self):
+        with self._lock:
+            chunks, self._buffer = self._buffer, []
+            n_rows, self._buffered_rows = self._buffered_rows, 0
+        if not chunks:
+            return
+
+        try:
+            table = self._to_table(chunks)
+            if self._writer is None:
+                self._open_file()
+            self._writer.write_table(table)
+            track_audit_records("written", n_rows)
+        except Exception as e:
+            print(f"Audit log write failed: {e}")
+            track_audit_records("failed", n_rows)
+
+    def _to_table(self, chunks: list) -> pa.Table:
+        sizes = [len(chunk[2]) for chunk in chunks]
+        requests = [request for chunk in chunks for request in chunk[2]]
+        features = np.vstack([chunk[3] for chunk in chunks]).astype(np.float64, copy=False)
+
+        columns = [
+            pa.array(np.repeat([chunk[0] for chunk in chunks], sizes), type=self.schema.field("timestamp").type),
+            pa.array(np.repeat([chunk[1] for chunk in chunks], sizes).tolist(), type=pa.string()),
+            pa.array([request[JOIN_KEY] for request in requests], type=pa.int64()),
+            pa.array([json.dumps(request, default=str) for request in requests], type=pa.string())
+        ]
+        columns += [pa.array(features[:, i]) for i, _ in self._stored_features]
+        columns += [
+            pa.array(np.concatenate([chunk[4] for chunk in chunks])),
+            pa.array(np.concatenate([chunk[5] for chunk in chunks])),
+            pa.array(np.repeat([float(chunk[6]) for chunk in chunks], sizes)),
+            pa.array(np.repeat([chunk[7] for chunk in chunks], sizes).tolist(), type=pa.string())
+        ]
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def _open_file(self):
+        now = datetime.now(timezone.utc)
+        partition = os.path.join(self.log_dir, f"date={now:%Y-%m-%d}")
+        os.makedirs(partition, exist_ok=True)
+
+        self._file_seq += 1
+        name = f"audit-{now:%Y%m%dT%H%M%S}-{os.getpid()}-{self._file_seq}.parquet"
+        self._path = os.path.join(partition, name)
+        self._in_progress_path = os.path.join(partition, f".{name}.inprogress")
+        self._writer = pq.ParquetWriter(self._in_progress_path, self.schema, compression=self.compression)
+        self._opened_at = time.monotonic()
+        self._opened_day = now.date()
+
+    def _rotation_due(self) -> bool:
+        return (
+            time.monotonic() - self._opened_at >= self.rotate_seconds
+            or datetime.now(timezone.utc).date() != self._opened_day
+            or os.path.getsize(self._in_progress_path) >= self.rotate_bytes
+        )
+
+    def _close_file(self):
+        self._writer.close()
+        os.replace(self._in_progress_path, self._path)
+        self._writer = None
@@ -0,0 +1,224 @@
+"""
+Offline scoring of a whole applicant table.
+
+    python -m src.serving.bulk_score applications.parquet output_dir [--workers N]
+
+Reads the input Parquet in chunks of `--chunk-rows`, joins each chunk to the
+feature store's offline table with one vectorized merge instead of a Feast
+lookup per row, prepares it exactly as `/predict` does (only the fields of
+`PredictionRequest` are taken from the input) and scores it with the
+serving model. Chunks are scored across a pool of worker processes, each of
+which writes its own Parquet files, partitioned by `risk_level`, and is
+limited to its share of the CPU threads. The output is written to a sibling
+directory and swapped in for `output_dir` once every chunk is scored, so a
+rerun never mixes files from the previous one. At most two chunks per
+worker are in flight, so memory does not grow with the size of the input.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import yaml
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List
+from src.serving.feature_assembly import frame_to_feature_matrix, merge_feature_frames
+from src.serving.feature_service import FEATURE_REFS
+from src.serving.schemas import PredictionRequest
+
+FEATURES_PATH = "data/feature_store/customer_features"
+
+OUTPUT_SCHEMA = pa.schema([
+    ("SK_ID_CURR", pa.int64()),
+    ("prediction", pa.int8()),
+    ("probability", pa.float64()),
+    ("model_run_id", pa.string()),
+    ("risk_level", pa.string())
+])
+
+# Set in the parent before the pool forks, so workers share it copy-on-write
+_state = {}
+
+
+def load_offline_features(path: str) -> pd.DataFrame:
+    """
+    Latest row per applicant of the feature view's columns, indexed by
+    SK_ID_CURR, with float features rounded to the Float32 the online
+    store returns.
+    """
+    available = ds.dataset(path, format="parquet", partitioning="hive").schema.names
+    names = [ref.split(":")[-1] for ref in FEATURE_REFS]
+    columns = ["SK_ID_CURR"] + [col for col in names + ["event_timestamp"] if col in available]
+
+    features = pd.read_parquet(path, columns=columns)
+    if "event_timestamp" in features.columns:
+        features = features.sort_values("event_timestamp", kind="stable").drop(columns="event_timestamp")
+    features = features.drop_duplicates("SK_ID_CURR", keep="last").set_index("SK_ID_CURR")
+
+    float_columns = features.select_dtypes(include="floating").columns
+    features[float_columns] = features[float_columns].astype(np.float32)
+    return features
+
+
+def score_chunk(chunk_index: int, requests: pd.DataFrame) -> int:
+    """
+    Score one chunk and write it under the output directory. Returns the
+    number of rows scored.
+    """
+    model_loader = _state["model_loader"]
+    n_rows = len(requests)
+
+    merged = merge_feature_frames(requests, _state["features"])
+    bundle = model_loader.snapshot()
+    predictions, probabilities = model_loader.predict_batch(frame_to_feature_matrix(merged), bundle)
+
+    table = pa.Table.from_arrays([
+        pa.array(requests["SK_ID_CURR"].to_numpy(dtype=np.int64)),
+        pa.array(np.asarray(predictions, dtype=np.int8)),
+        pa.array(np.asarray(probabilities, dtype=np.float64)),
+        pa.array([bundle.run_id] * n_rows, type=pa.string()),
+        pa.array([model_loader.get_risk_level(probability) for probability in probabilities.tolist()], type=pa.string())
+    ], schema=OUTPUT_SCHEMA)
+
+    pq.write_to_dataset(
+        table,
+        _state["output_dir"],
+        partition_cols=["risk_level"],
+        basename_template=f"part-{chunk_index:06d}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore"
+    )
+    return n_rows
+
+
+def _limit_threads(n_threads: int):
+    """
+    Pool initializer: a forked worker inherits the model with every core
+    as its thread count, so `workers` of them would oversubscribe the CPU.
+    """
+    model = _state["model_loader"].bundle.model
+    if hasattr(model, "get_booster"):
+        model.get_booster().set_param({"nthread": n_threads})
+    if hasattr(model, "n_jobs"):
+        model.set_params(n_jobs=n_threads)
+
+
+def iter_chunks(path: str, chunk_rows: int, columns: List[str]):
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def bulk_score(input_path: str, output_dir: str, model_loader, features: pd.DataFrame,
+               chunk_rows: int = 50000, workers: int = 1, report_every: float = 10) -> dict:
+    """
+    Score every row of `input_path` and replace `output_dir` with the
+    result. With more than one worker the pool is forked, so the model and
+    feature table are shared with the workers rather than pickled.
+    """
+    input_columns = pq.read_schema(input_path).names
+    if "SK_ID_CURR" not in input_columns:
+        raise ValueError(f"{input_path} has no SK_ID_CURR column")
+    request_columns = [col for col in PredictionRequest.model_fields if col in input_columns]
+
+    parent, name = os.path.split(os.path.normpath(output_dir))
+    building_dir = os.path.join(parent, f".{name}.building")
+    previous_dir = os.path.join(parent, f".{name}.previous")
+    shutil.rmtree(building_dir, ignore_errors=True)
+    os.makedirs(building_dir)
+    _state.update(model_loader=model_loader, features=features, output_dir=building_dir)
+
+    n_rows = 0
+    started = last_report = time.perf_counter()
+
+    def collect(chunk_rows_scored):
+        nonlocal n_rows, last_report
+        n_rows += chunk_rows_scored
+        now = time.perf_counter()
+        if now - last_report >= report_every:
+            print(f"Scored {n_rows} rows ({n_rows / (now - started):.0f} rows/s)")
+            last_report = now
+
+    chunks = iter_chunks(input_path, chunk_rows, request_columns)
+    try:
+        if workers <= 1:
+            for chunk_index, requests in enumerate(chunks):
+                collect(score_chunk(chunk_index, requests))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+                initializer=_limit_threads, initargs=(max(1, (os.cpu_count() or 1) // workers),)
+            ) as pool:
+                in_flight = set()
+                for chunk_index, requests in enumerate(chunks):
+                    if len(in_flight) >= 2 * workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future.result())
+                    in_flight.add(pool.submit(score_chunk, chunk_index, requests))
+                for future in in_flight:
+                    collect(future.result())
+    except BaseException:
+        shutil.rmtree(building_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(output_dir):
+        os.replace(output_dir, previous_dir)
+    os.replace(building_dir, output_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": n_rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(n_rows / elapsed, 1) if elapsed else 0.0
+    }
+
+
+def main(args):
+    from src.serving.artifact_cache import ModelArtifactCache
+    from src.serving.model_loader import ModelLoader
+
+    with open(os.getenv("SERVING_CONFIG", "configs/serving_config.yaml")) as f:
+        config = yaml.safe_load(f)
+    artifact_cache_config = config["model"]["artifact_cache"]
+
+    model_loader = ModelLoader(
+        tracking_uri=os.getenv("MLFLOW_TRACKING_URI", config["mlflow"]["tracking_uri"]),
+        experiment_name=config["mlflow"]["experiment_name"],
+        predictor=config["model"]["predictor"],
+        max_compiled_rows=config["model"]["max_compiled_rows"],
+        artifact_cache=ModelArtifactCache(
+            cache_dir=artifact_cache_config["dir"],
+            max_age_seconds=artifact_cache_config["max_age_seconds"]
+        ) if artifact_cache_config["enabled"] else None
+    )
+    if not model_loader.load_model():
+        raise SystemExit("Model failed to load")
+
+    features = load_offline_features(args.features)
+    print(f"Loaded offline features for {len(features)} applicants")
+
+    stats = bulk_score(
+        args.input, args.output, model_loader, features,
+        chunk_rows=args.chunk_rows, workers=args.workers
+    )
+    print(
+        f"Scored {stats['rows']} rows in {stats['seconds']}s, "
+        f"{stats['rows_per_second']:.0f} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", help="Parquet file of applications")
+    parser.add_argument("output", help="Directory for the scored Parquet dataset")
+    parser.add_argument("--features", default=FEATURES_PATH)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    main(parser.parse_args())
@@ -0,0 +1,173 @@
+import json
+import numpy as np
+from typing import Callable, Optional
+
+PREDICTOR_MODES = ("sklearn", "inplace", "compiled")
+
+
+def _iteration_limit(model) -> Optional[int]:
+    # Mirrors XGBClassifier.predict_proba, which stops at best_iteration after early stopping
+    try:
+        return int(model.best_iteration) + 1
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class InplacePredictor:
+    """
+    Positive-class probabilities from `Booster.inplace_predict`, which skips
+    the sklearn wrapper and DMatrix construction.
+    """
+
+    def __init__(self, booster, n_iterations: Optional[int] = None):
+        self.booster = booster
+        self.iteration_range = (0, n_iterations or 0)
+
+    def __call__(self, features) -> np.ndarray:
+        return self.booster.inplace_predict(np.asarray(features), iteration_range=self.iteration_range)
+
+
+class CompiledTreeEnsemble:
+    """
+    A binary:logistic XGBoost booster flattened into NumPy arrays.
+
+    Every node of every tree lives at one global index. `children` holds the
+    (left, right) pair of each node at 2 * node and 2 * node + 1, and leaves
+    point back at themselves, so walking a fixed `max_depth` steps parks
+    every row on its leaf without per-step leaf checks. Prediction walks all
+    trees for all rows at once, then adds the leaf values to the base margin
+    and applies the sigmoid.
+    """
+
+    def __init__(self, roots, children, split_indices, split_conditions,
+                 default_left, leaf_values, base_margin: float, max_depth: int):
+        self.roots = roots
+        self.children = children
+        self.split_indices = split_indices
+        self.split_conditions = split_conditions
+        self.default_left = default_left
+        self.leaf_values = leaf_values
+        self.base_margin = base_margin
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_booster(cls, booster, n_iterations: Optional[int] = None) -> "CompiledTreeEnsemble":
+        learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"Compiled predictor supports binary:logistic only, got {objective}")
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        if n_iterations is not None:
+            trees = trees[:n_iterations]
+
+        roots, children, split_idx, split_cond, default_left, leaf_values = [], [], [], [], [], []
+        max_depth, offset = 0, 0
+        for tree in trees:
+            if tree.get("categories_nodes"):
+                raise ValueError("Compiled predictor does not support categorical splits")
+
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            right = np.asarray(tree["right_children"], dtype=np.int64)
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = left == -1
+            node_ids = np.arange(len(left)) + offset
+
+            roots.append(offset)
+            children.append(np.column_stack([
+                np.where(is_leaf, node_ids, left + offset),
+                np.where(is_leaf, node_ids, right + offset)
+            ]).ravel())
+            split_idx.append(np.where(is_leaf, 0, tree["split_indices"]))
+            split_cond.append(np.where(is_leaf, np.float32(np.inf), conditions))
+            default_left.append(tree["default_left"])
+            leaf_values.append(np.where(is_leaf, conditions, 0))
+            max_depth = max(max_depth, cls._depth(left, right))
+            offset += len(left)
+
+        base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+
+        return cls(
+            roots=np.asarray(roots, dtype=np.int64),
+            children=np.concatenate(children).astype(np.int64),
+            split_indices=np.concatenate(split_idx).astype(np.int64),
+            split_conditions=np.concatenate(split_cond).astype(np.float32),
+            default_left=np.concatenate(default_left).astype(bool),
+            leaf_values=np.concatenate(leaf_values).astype(np.float32),
+            base_margin=float(np.log(base_score / (1 - base_score))),
+            max_depth=max_depth
+        )
+
+    @staticmethod
+    def _depth(left_children: np.ndarray, right_children: np.ndarray) -> int:
+        depth, level = 0, [0]
+        while True:
+            level = [child for node in level for child in (left_children[node], right_children[node]) if child != -1]
+            if not level:
+                return depth
+            depth += 1
+
+    def margin(self, features) -> np.ndarray:
+        X = np.ascontiguousarray(features, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, len(self.roots))
+        nodes = np.tile(self.roots, n_rows)
+
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_offsets + self.split_indices.take(nodes))
+            go_right = np.where(
+                np.isnan(values),
+                ~self.default_left.take(nodes),
+                values >= self.split_conditions.take(nodes)
+            )
+            nodes = self.children.take(2 * nodes + go_right)
+
+        leaves = self.leaf_values.take(nodes).reshape(n_rows, len(self.roots))
+        return leaves.sum(axis=1, dtype=np.float64) + self.base_margin
+
+    def __call__(self, features) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-self.margin(features)))
+
+
+class SizeDispatchPredictor:
+    """
+    Uses the compiled ensemble for small batches, where it avoids XGBoost's
+    fixed per-call cost, and `inplace_predict` once batches are large enough
+    for XGBoost's native threads to win.
+    """
+
+    def __init__(self, compiled: CompiledTreeEnsemble, inplace: InplacePredictor, max_compiled_rows: int = 32):
+        self.compiled = compiled
+        self.inplace = inplace
+        self.max_compiled_rows = max_compiled_rows
+
+    def __call__(self, features) -> np.ndarray:
+        if len(features) <= self.max_compiled_rows:
+            return self.compiled(features)
+        return self.inplace(features)
+
+
+def build_predictor(model, mode: str = "sklearn", max_compiled_rows: int = 32) -> Optional[Callable]:
+    """
+    Return a callable mapping a feature matrix to positive-class
+    probabilities, or None to keep using `model.predict_proba`.
+    """
+    if mode not in PREDICTOR_MODES:
+        raise ValueError(f"Unknown predictor mode: {mode}")
+    if mode == "sklearn":
+        return None
+
+    if not hasattr(model, "get_booster"):
+        print(f"Predictor mode '{mode}' needs an XGBoost model, using predict_proba for {type(model).__name__}")
+        return None
+
+    booster = model.get_booster()
+    n_iterations = _iteration_limit(model)
+    inplace = InplacePredictor(booster, n_iterations)
+    if mode == "inplace":
+        return inplace
+
+    compiled = CompiledTreeEnsemble.from_booster(booster, n_iterations)
+    return SizeDispatchPredictor(compiled, inplace, max_compiled_rows)
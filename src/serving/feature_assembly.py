@@ -0,0 +1,113 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+from src.data_pipeline.feature_definitions import REQUEST_TIME_FEATURES, compute_frame, compute_row
+
+EXPECTED_COLUMNS = [
+    "SK_ID_CURR", "ext_source_mean", "ext_sources_prod", "EXT_SOURCE_3",
+    "ext_sources_sum", "EXT_SOURCE_2", "EXT_SOURCE_1", "DAYS_BIRTH",
+    "age_years", "years_employed", "goods_price_to_credit_ratio",
+    "REGION_RATING_CLIENT_W_CITY", "REGION_RATING_CLIENT",
+    "DAYS_LAST_PHONE_CHANGE", "is_male", "DAYS_ID_PUBLISH",
+    "REG_CITY_NOT_WORK_CITY", "FLAG_EMP_PHONE", "DAYS_EMPLOYED",
+    "REG_CITY_NOT_LIVE_CITY", "FLAG_DOCUMENT_3"
+]
+
+
+def merge_features(request_data: Dict[str, Any], feast_features: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge Feast features with the request payload (request values win)
+    and recompute the request-time features from the merged values. A
+    request-time feature whose inputs are missing keeps its Feast value.
+    """
+    merged_features = {**feast_features, **request_data}
+
+    request_time = compute_row(merged_features, REQUEST_TIME_FEATURES)
+    for name, value in zip(REQUEST_TIME_FEATURES, request_time.tolist()):
+        if not math.isnan(value) or name not in merged_features:
+            merged_features[name] = value
+
+    return merged_features
+
+
+def build_feature_matrix(records: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Build a (n_rows, len(EXPECTED_COLUMNS)) float64 matrix from merged
+    feature dicts: missing columns and non-numeric values become 0.
+    """
+    if not records:
+        return np.empty((0, len(EXPECTED_COLUMNS)), dtype=np.float64)
+
+    return frame_to_feature_matrix(pd.DataFrame.from_records(records))
+
+
+def merge_feature_frames(requests: pd.DataFrame, feast_features: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized `merge_features` for many requests at once. `feast_features`
+    is indexed by unique SK_ID_CURR; a null request value counts as unset,
+    like a field left out of a request body.
+    """
+    merged = feast_features.reindex(requests["SK_ID_CURR"].to_numpy()).reset_index(drop=True)
+    requests = requests.reset_index(drop=True)
+
+    for col in requests.columns:
+        merged[col] = requests[col].combine_first(merged[col]) if col in merged.columns else requests[col]
+
+    request_time = compute_frame(merged, REQUEST_TIME_FEATURES)
+    for name in REQUEST_TIME_FEATURES:
+        merged[name] = request_time[name].combine_first(merged[name]) if name in merged.columns else request_time[name]
+
+    return merged
+
+
+def frame_to_feature_matrix(features_df: pd.DataFrame) -> np.ndarray:
+    """
+    Same coercion as `build_feature_matrix`, for an already merged frame.
+    """
+    features_df = features_df.reindex(columns=EXPECTED_COLUMNS)
+    features_df = features_df.apply(pd.to_numeric, errors='coerce')
+
+    return features_df.fillna(0).to_numpy(dtype=np.float64)
+
+
+class FeatureVectorBuilder:
+    """
+    Pandas-free assembly of a single feature row.
+
+    Column positions are resolved once at construction; `build` then writes
+    each value straight into a NumPy row with the same coercion as
+    `pd.to_numeric(errors='coerce')` followed by `fillna(0)`: numbers are
+    cast to float, numeric strings are parsed, and missing, None, NaN or
+    unparsable values become 0.
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, dtype=np.float64):
+        self.columns = list(columns or EXPECTED_COLUMNS)
+        self.dtype = np.dtype(dtype)
+        self._slots = tuple(enumerate(self.columns))
+
+    def build(self, merged_features: Dict[str, Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        row = np.zeros(len(self.columns), dtype=self.dtype) if out is None else out
+
+        for i, col in self._slots:
+            value = merged_features.get(col)
+            if value is None:
+                row[i] = 0
+                continue
+
+            if not isinstance(value, (int, float, np.number)):
+                value = pd.to_numeric(value, errors='coerce')
+            value = float(value)
+            row[i] = 0 if math.isnan(value) else value
+
+        return row
+
+    def build_matrix(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        matrix = np.empty((len(records), len(self.columns)), dtype=self.dtype)
+        for i, merged_features in enumerate(records):
+            self.build(merged_features, out=matrix[i])
+        return matrix
+
+    def to_dict(self, row: np.ndarray) -> Dict[str, float]:
+        return dict(zip(self.columns, row.tolist()))
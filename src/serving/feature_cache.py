@@ -0,0 +1,107 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+from src.monitoring.metrics_exporter import (
+    track_cache_hit,
+    track_cache_miss,
+    track_cache_eviction,
+    track_cache_size
+)
+
+
+def _estimate_size(features: Dict[str, Any]) -> int:
+    # Feature names are shared between entries, so only the dict and the values are counted
+    return sys.getsizeof(features) + sum(sys.getsizeof(v) for v in features.values())
+
+
+class FeatureCache:
+    """
+    Thread-safe LRU cache of online features keyed by entity id.
+
+    Entries expire `ttl_seconds` after they are stored. The least recently
+    used entries are evicted once either `max_entries` or the estimated
+    `max_bytes` is exceeded. Cached dicts are shared and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl_seconds: float = 300,
+                 max_bytes: int = 64 * 1024 * 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, entity_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(entity_id)
+            if entry is None:
+                track_cache_miss()
+                return None
+
+            expires_at, features, size = entry
+            if expires_at <= self.clock():
+                self._remove(entity_id, size)
+                track_cache_eviction("expired")
+                track_cache_miss()
+                self._report_size()
+                return None
+
+            self._entries.move_to_end(entity_id)
+            track_cache_hit()
+            return features
+
+    def put(self, entity_id: int, features: Dict[str, Any]):
+        size = _estimate_size(features)
+        with self._lock:
+            if entity_id in self._entries:
+                self._remove(entity_id, self._entries[entity_id][2])
+
+            self._entries[entity_id] = (self.clock() + self.ttl_seconds, features, size)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                track_cache_eviction("size")
+
+            self._report_size()
+
+    def invalidate(self, entity_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Drop the given entity ids, or everything when none are given.
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            if entity_ids is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                removed = 0
+                for entity_id in entity_ids:
+                    entry = self._entries.get(entity_id)
+                    if entry is not None:
+                        self._remove(entity_id, entry[2])
+                        removed += 1
+
+            track_cache_eviction("invalidated", removed)
+            self._report_size()
+            return removed
+
+    def _remove(self, entity_id: int, size: int):
+        del self._entries[entity_id]
+        self._bytes -= size
+
+    def _report_size(self):
+        track_cache_size(len(self._entries), self._bytes)
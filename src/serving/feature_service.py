@@ -1,34 +1,156 @@
 from feast import FeatureStore
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import time
+from src.serving.feature_cache import FeatureCache
+
+FEATURE_VIEW = "applicant_risk_features"
+FEATURE_REFS = [
+    "applicant_risk_features:credit_to_income_ratio",
+    "applicant_risk_features:annuity_to_income_ratio",
+    "applicant_risk_features:credit_term_approx",
+    "applicant_risk_features:goods_price_to_credit_ratio",
+    "applicant_risk_features:age_years",
+    "applicant_risk_features:years_employed",
+    "applicant_risk_features:employed_to_age_ratio",
+    "applicant_risk_features:income_per_person",
+    "applicant_risk_features:ext_source_1",
+    "applicant_risk_features:ext_source_2",
+    "applicant_risk_features:ext_source_3",
+    "applicant_risk_features:ext_source_mean",
+    "applicant_risk_features:flag_own_car",
+    "applicant_risk_features:flag_own_realty"
+]
 
 class FeatureService:
-    def __init__(self, repo_path: str):
-        self.store = FeatureStore(repo_path=repo_path)
-        self.feature_refs = [
-            "applicant_risk_features:credit_to_income_ratio",
-            "applicant_risk_features:annuity_to_income_ratio",
-            "applicant_risk_features:credit_term_approx",
-            "applicant_risk_features:goods_price_to_credit_ratio",
-            "applicant_risk_features:age_years",
-            "applicant_risk_features:years_employed",
-            "applicant_risk_features:employed_to_age_ratio",
-            "applicant_risk_features:income_per_person",
-            "applicant_risk_features:ext_source_1",
-            "applicant_risk_features:ext_source_2",
-            "applicant_risk_features:ext_source_3",
-            "applicant_risk_features:ext_source_mean",
-            "applicant_risk_features:flag_own_car",
-            "applicant_risk_features:flag_own_realty"
-        ]
+    def __init__(self, repo_path: str, store: Optional[FeatureStore] = None,
+                 cache: Optional[FeatureCache] = None, watermark_check_seconds: Optional[float] = 30,
+                 reader=None):
+        self.store = store if store is not None else FeatureStore(repo_path=repo_path)
+        self.cache = cache
+        self.reader = reader
+        self.async_reader = None
+        self.watermark_check_seconds = watermark_check_seconds
+        self._watermark = None
+        self._watermark_checked_at = None
+        self.feature_refs = list(FEATURE_REFS)
 
     def get_online_features(self, entity_id: int) -> Dict[str, Any]:
+        return self.get_online_features_batch([entity_id])[0]
+
+    def get_online_features_batch(self, entity_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch features for several applicants in a single Feast call.
+        Returns one dict per entity id, in the same order. With a cache,
+        only ids that are not cached are sent to the online store.
+        """
+        if self.cache is None:
+            return self._fetch(entity_ids)
+
+        self._check_materialization()
+
+        results = [self.cache.get(entity_id) for entity_id in entity_ids]
+        missing = list(dict.fromkeys(
+            entity_id for entity_id, features in zip(entity_ids, results) if features is None
+        ))
+        if not missing:
+            return results
+
+        fetched = dict(zip(missing, self._fetch(missing)))
+        for entity_id, features in fetched.items():
+            if features:
+                self.cache.put(entity_id, features)
+
+        return [
+            features if features is not None else fetched[entity_id]
+            for entity_id, features in zip(entity_ids, results)
+        ]
+
+    async def get_online_features_async(self, entity_id: int) -> Tuple[Dict[str, Any], bool]:
+        """
+        Non-blocking lookup through the async Redis reader. Returns the
+        features and whether they were imputed; imputed rows are not cached.
+        """
+        if self.cache is not None:
+            if self._materialization_check_due():
+                await asyncio.to_thread(self._check_materialization)
+
+            features = self.cache.get(entity_id)
+            if features is not None:
+                return features, False
+
+        rows, degraded = await self.async_reader.read_dicts([entity_id])
+        if self.cache is not None and not degraded:
+            self.cache.put(entity_id, rows[0])
+
+        return rows[0], degraded
+
+    def invalidate_cache(self, entity_ids: Optional[List[int]] = None) -> int:
+        if self.cache is None:
+            return 0
+        return self.cache.invalidate(entity_ids)
+
+    def use_redis_fast_path(self, max_connections: int = 32):
+        """
+        Read features straight from Redis instead of through the Feast SDK.
+        """
+        from src.serving.redis_feature_reader import RedisFeatureReader
+        self.reader = RedisFeatureReader.from_store(self.store, self.feature_refs, max_connections)
+
+    def use_async_reader(self, max_connections: int = 64, timeout_ms: float = 20,
+                         impute_values: Optional[Dict[str, float]] = None):
+        from src.serving.async_feature_reader import AsyncRedisFeatureReader
+        self.async_reader = AsyncRedisFeatureReader.from_store(
+            self.store, self.feature_refs, max_connections, timeout_ms, impute_values
+        )
+
+    def _fetch(self, entity_ids: List[int]) -> List[Dict[str, Any]]:
+        if self.reader is not None:
+            try:
+                return self.reader.read_dicts(entity_ids)
+            except Exception as e:
+                print(f"Redis Fetch Error: {e}")
+                return [{} for _ in entity_ids]
+
         try:
             resp = self.store.get_online_features(
                 features=self.feature_refs,
-                entity_rows=[{"SK_ID_CURR": entity_id}]
+                entity_rows=[{"SK_ID_CURR": entity_id} for entity_id in entity_ids]
             ).to_dict()
-            
-            return {k.split(":")[-1]: v[0] for k, v in resp.items() if k != "SK_ID_CURR"}
+
+            columns = {k.split(":")[-1]: v for k, v in resp.items() if k != "SK_ID_CURR"}
+            return [
+                {name: values[i] for name, values in columns.items()}
+                for i in range(len(entity_ids))
+            ]
         except Exception as e:
             print(f"Feast Fetch Error: {e}")
-            return {}
\ No newline at end of file
+            return [{} for _ in entity_ids]
+
+    def _check_materialization(self):
+        """
+        Drop the cache when the feature view has been materialized since the
+        last check. The registry is read at most every watermark_check_seconds,
+        so every API worker notices a new materialization on its own.
+        """
+        if not self._materialization_check_due():
+            return
+        self._watermark_checked_at = time.monotonic()
+
+        try:
+            watermark = self.store.get_feature_view(FEATURE_VIEW).most_recent_end_time
+        except Exception as e:
+            print(f"Feast Registry Error: {e}")
+            return
+
+        if self._watermark is not None and watermark != self._watermark:
+            self.cache.invalidate()
+        self._watermark = watermark
+
+    def _materialization_check_due(self) -> bool:
+        if self.watermark_check_seconds is None:
+            return False
+        return (
+            self._watermark_checked_at is None
+            or time.monotonic() - self._watermark_checked_at >= self.watermark_check_seconds
+        )
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from src.monitoring.metrics_exporter import (
+    set_executor_capacity,
+    track_executor_pending,
+    track_executor_wait,
+    track_executor_rejection
+)
+
+
+class ExecutorSaturatedError(Exception):
+    pass
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking Feast lookups and model calls.
+
+    At most `max_workers` jobs run at once and at most `max_queue_size` more
+    wait for a worker; anything beyond that is rejected immediately with
+    ExecutorSaturatedError so the API can answer 503 instead of queueing.
+    A job counts as pending until it has finished in its thread, even if the
+    coroutine awaiting it was cancelled (e.g. the client disconnected).
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue_size: int = 64):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._pending = 0
+        self._lock = threading.Lock()
+        set_executor_capacity(self.capacity)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.capacity
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+            track_executor_pending(self._pending)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.capacity:
+                track_executor_rejection()
+                raise ExecutorSaturatedError(
+                    f"Inference queue is full ({self._pending}/{self.capacity} jobs pending)"
+                )
+            self._pending += 1
+            track_executor_pending(self._pending)
+        submitted = time.perf_counter()
+
+        def timed_call():
+            track_executor_wait(time.perf_counter() - submitted)
+            return fn(*args, **kwargs)
+
+        future = self._executor.submit(timed_call)
+        # Released when the job is done in its thread, or cancelled before it started
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+import numpy as np
+from typing import Callable, Optional
+from src.monitoring.metrics_exporter import track_batch
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one model call.
+
+    Requests are queued with `submit`; a background task waits for the first
+    row, collects more rows until `max_batch_size` is reached or `max_wait_us`
+    has passed, runs `predict_fn` once on the stacked matrix and resolves each
+    caller's future with its (prediction, probability). When an executor is
+    given, the model call runs there instead of on the event loop.
+
+    A row submitted with a `bundle` is scored with that model snapshot,
+    passed to `predict_fn` as `bundle=`; a batch that straddles a hot swap
+    makes one call per bundle.
+    """
+
+    def __init__(self, predict_fn: Callable, max_batch_size: int = 64, max_wait_us: int = 2000,
+                 executor=None):
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1_000_000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Rows taken off the queue whose futures are not resolved yet
+        self._batch: list = []
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+            # Fail every caller still waiting, so none hangs until its timeout
+            pending = self._batch
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._batch = []
+            for _, future, _, _ in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def submit(self, features_row: np.ndarray, bundle=None) -> tuple:
+        if not self.is_running():
+            raise RuntimeError("Micro-batcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features_row, future, time.perf_counter(), bundle))
+        return await future
+
+    async def _collect(self) -> list:
+        self._batch = batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            dispatch_time = time.perf_counter()
+            track_batch(len(batch), [dispatch_time - enqueued for _, _, enqueued, _ in batch])
+
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[3]), []).append(item)
+            for group in groups.values():
+                await self._score(group)
+            self._batch = []
+
+    async def _score(self, group: list):
+        try:
+            predictions, probabilities = await self._predict(np.vstack([row for row, _, _, _ in group]), group[0][3])
+        except Exception as e:
+            for _, future, _, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, future, _, _) in enumerate(group):
+            if not future.done():
+                future.set_result((predictions[i], probabilities[i]))
+
+    async def _predict(self, features: np.ndarray, bundle=None) -> tuple:
+        kwargs = {} if bundle is None else {"bundle": bundle}
+        if self.executor is None:
+            return self.predict_fn(features, **kwargs)
+        return await self.executor.run(self.predict_fn, features, **kwargs)
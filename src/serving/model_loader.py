@@ -1,53 +1,274 @@
+import threading
+import time
 import mlflow
 import mlflow.sklearn
+import numpy as np
 import pandas as pd
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 from sklearn.impute import SimpleImputer
+from src.serving.artifact_cache import ModelArtifactCache
+from src.serving.compiled_predictor import build_predictor
+from src.monitoring.metrics_exporter import track_model_load, track_model_swap
+
+DEFAULT_THRESHOLD = 0.5
+
+
+class ModelBundle(NamedTuple):
+    """
+    Everything a prediction needs from one run. Bundles are never mutated;
+    a new model is published by replacing the whole bundle.
+    """
+    run_id: str
+    model: Any
+    predictor: Optional[Callable]
+    threshold: float
+    feature_order: Optional[List[str]]
+    source: str
+    loaded_at: float
+    load_timings: Dict[str, float]
+
 
 class ModelLoader:
-    def __init__(self, tracking_uri: str, experiment_name: str):
+    """
+    Loads the latest run of an MLflow experiment, or `pinned_run_id` when
+    given, and scores feature matrices with it.
+    """
+
+    def __init__(self, tracking_uri: str, experiment_name: str, predictor: str = "sklearn",
+                 max_compiled_rows: int = 32, artifact_cache: Optional[ModelArtifactCache] = None,
+                 warmup_rows: int = 64, pinned_run_id: Optional[str] = None):
         self.tracking_uri = tracking_uri
         self.experiment_name = experiment_name
-        self.model = None
-        self.threshold = 0.5
+        self.predictor_mode = predictor
+        self.max_compiled_rows = max_compiled_rows
+        self.artifact_cache = artifact_cache
+        self.warmup_rows = warmup_rows
+        self.pinned_run_id = pinned_run_id
+        self.bundle: Optional[ModelBundle] = None
+        self.last_swap = None
         self.imputer = SimpleImputer(strategy='median')
         self.feature_names = None
+        self._load_lock = threading.Lock()
 
         mlflow.set_tracking_uri(tracking_uri)
 
+    @property
+    def model(self):
+        return self.bundle.model if self.bundle is not None else None
+
+    @property
+    def predictor(self) -> Optional[Callable]:
+        return self.bundle.predictor if self.bundle is not None else None
+
+    @property
+    def threshold(self) -> float:
+        return self.bundle.threshold if self.bundle is not None else DEFAULT_THRESHOLD
+
+    @property
+    def run_id(self) -> Optional[str]:
+        return self.bundle.run_id if self.bundle is not None else None
+
+    @property
+    def feature_order(self) -> Optional[List[str]]:
+        return self.bundle.feature_order if self.bundle is not None else None
+
+    @property
+    def model_source(self) -> Optional[str]:
+        return self.bundle.source if self.bundle is not None else None
+
+    @property
+    def load_timings(self) -> Dict[str, float]:
+        return self.bundle.load_timings if self.bundle is not None else {}
+
     def load_model(self) -> bool:
+        """
+        Load the model from the local artifact cache when its run was
+        resolved less than `max_age_seconds` ago, otherwise ask MLflow for
+        the latest run and download it unless that run is already cached.
+        A cached run is still used when MLflow cannot be reached.
+        """
         try:
-            mlflow.set_experiment(self.experiment_name)
-            experiment = mlflow.get_experiment_by_name(self.experiment_name)
+            with self._load_lock:
+                bundle = self._build_bundle(self._load_startup_run)
+        except Exception as e:
+            print(f"Error loading model: {str(e)}")
+            return False
 
-            if not experiment:
-                print(f"Experiment '{self.experiment_name}' not found")
-                return False
+        if bundle is None:
+            return False
 
-            runs = mlflow.search_runs(
-                experiment_ids=[experiment.experiment_id],
-                order_by=["start_time DESC"],
-                max_results=1
-            )
+        self.bundle = bundle
+        return True
 
-            if runs.empty:
-                print("No runs found")
+    def refresh(self, source: str = "mlflow") -> bool:
+        """
+        Load the newest run from MLflow, or the run the artifact cache
+        currently points at, when it differs from the active one. The new
+        model is warmed up before it replaces the active bundle, and
+        requests already scoring finish on the bundle they started with.
+        Returns whether the model was swapped.
+        """
+        with self._load_lock:
+            active_run_id = self.run_id
+            try:
+                if source == "artifact_cache":
+                    bundle = self._build_bundle(lambda timings: self._load_pointed_run(timings, active_run_id))
+                else:
+                    bundle = self._build_bundle(lambda timings: self._load_latest_run(timings, active_run_id))
+            except Exception as e:
+                print(f"Error checking for a new model: {str(e)}")
                 return False
 
-            latest_run = runs.iloc[0]
-            run_id = latest_run["run_id"]
-
-            model_uri = f"runs:/{run_id}/model"
-            self.model = mlflow.sklearn.load_model(model_uri)
+            if bundle is None:
+                return False
 
-            if "params.best_threshold" in latest_run.index:
-                self.threshold = float(latest_run["params.best_threshold"])
+            with self._phase(bundle.load_timings, "warmup"):
+                self._warm_up(bundle)
 
-            print(f"Model loaded: {run_id}")
+            self.bundle = bundle
+            self.last_swap = {
+                "previous_run_id": active_run_id,
+                "run_id": bundle.run_id,
+                "swapped_at": time.time(),
+                "timings": bundle.load_timings
+            }
+            track_model_swap()
+            print(f"Model swapped: {active_run_id} -> {bundle.run_id}")
 
             return True
+
+    def _build_bundle(self, load_run: Callable) -> Optional[ModelBundle]:
+        timings = {}
+        started = time.perf_counter()
+
+        loaded = load_run(timings)
+        if loaded is None:
+            return None
+        run_id, model, threshold, feature_order, source = loaded
+
+        with self._phase(timings, "build_predictor"):
+            predictor = build_predictor(model, self.predictor_mode, self.max_compiled_rows)
+
+        timings["total"] = time.perf_counter() - started
+        track_model_load(timings)
+        phases = ", ".join(f"{phase}={seconds * 1000:.0f}ms" for phase, seconds in timings.items())
+        print(f"Model loaded: {run_id} from {source} ({phases})")
+
+        return ModelBundle(run_id, model, predictor, threshold, feature_order, source, time.time(), timings)
+
+    def _load_startup_run(self, timings: Dict[str, float]):
+        if self.pinned_run_id is not None:
+            if self.artifact_cache is not None and self.artifact_cache.contains(self.pinned_run_id):
+                return self._load_cached_run(self.pinned_run_id, timings)
+            return self._load_latest_run(timings)
+
+        current = self.artifact_cache.current() if self.artifact_cache is not None else None
+        if current is not None and self.artifact_cache.is_fresh(current[1]):
+            return self._load_cached_run(current[0], timings)
+
+        try:
+            return self._load_latest_run(timings)
         except Exception as e:
-            print(f"Error loading model: {str(e)}")
-            return False
+            if current is None:
+                raise
+            print(f"MLflow unavailable ({e}), using cached run {current[0]}")
+            return self._load_cached_run(current[0], timings)
+
+    def _load_pointed_run(self, timings: Dict[str, float], active_run_id: Optional[str] = None):
+        current = self.artifact_cache.current() if self.artifact_cache is not None else None
+        if current is None or current[0] == active_run_id:
+            return None
+        return self._load_cached_run(current[0], timings)
+
+    def _load_latest_run(self, timings: Dict[str, float], active_run_id: Optional[str] = None):
+        with self._phase(timings, "resolve_run"):
+            latest_run = self._latest_run()
+
+        if latest_run is None or latest_run["run_id"] == active_run_id:
+            return None
+
+        run_id = latest_run["run_id"]
+        if self.artifact_cache is not None and self.artifact_cache.contains(run_id):
+            loaded = self._load_cached_run(run_id, timings)
+        else:
+            loaded = self._download_run(latest_run, timings)
+
+        if self.artifact_cache is not None and self.pinned_run_id is None:
+            self.artifact_cache.mark_current(run_id)
+        return loaded
+
+    def _latest_run(self):
+        mlflow.set_experiment(self.experiment_name)
+        experiment = mlflow.get_experiment_by_name(self.experiment_name)
+
+        if not experiment:
+            print(f"Experiment '{self.experiment_name}' not found")
+            return None
+
+        runs = mlflow.search_runs(
+            experiment_ids=[experiment.experiment_id],
+            filter_string=f"attributes.run_id = '{self.pinned_run_id}'" if self.pinned_run_id else "",
+            order_by=["start_time DESC"],
+            max_results=1
+        )
+
+        if runs.empty:
+            print("No runs found")
+            return None
+
+        return runs.iloc[0]
+
+    def _download_run(self, run, timings: Dict[str, float]):
+        run_id = run["run_id"]
+        with self._phase(timings, "download_model"):
+            model = mlflow.sklearn.load_model(f"runs:/{run_id}/model")
+
+        threshold = DEFAULT_THRESHOLD
+        if "params.best_threshold" in run.index:
+            threshold = float(run["params.best_threshold"])
+
+        feature_order = getattr(model, "feature_names_in_", None)
+        feature_order = list(feature_order) if feature_order is not None else None
+
+        if self.artifact_cache is not None:
+            try:
+                with self._phase(timings, "write_cache"):
+                    self.artifact_cache.store(run_id, model, threshold, feature_order)
+            except Exception as e:
+                print(f"Error caching model artifacts: {str(e)}")
+
+        return run_id, model, threshold, feature_order, "mlflow"
+
+    def _load_cached_run(self, run_id: str, timings: Dict[str, float]):
+        with self._phase(timings, "load_cache"):
+            model, meta = self.artifact_cache.load(run_id)
+        return run_id, model, meta["best_threshold"], meta["feature_order"], "cache"
+
+    def _warm_up(self, bundle: ModelBundle):
+        # A few synthetic predictions so the first real request does not pay for lazy initialisation
+        n_features = getattr(bundle.model, "n_features_in_", None) or len(bundle.feature_order or [])
+        if not n_features:
+            return
+
+        rng = np.random.default_rng(0)
+        for n_rows in (1, self.warmup_rows):
+            self._predict_proba(bundle, rng.normal(size=(n_rows, n_features)))
+
+    @staticmethod
+    def _predict_proba(bundle: ModelBundle, features) -> np.ndarray:
+        if bundle.predictor is not None:
+            return bundle.predictor(features)
+        return bundle.model.predict_proba(features)[:, 1]
+
+    @staticmethod
+    @contextmanager
+    def _phase(timings: Dict[str, float], name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = time.perf_counter() - started
 
     def prepare_features(self, request_data: dict) -> pd.DataFrame:
         df = pd.DataFrame([request_data])
@@ -63,15 +284,31 @@ class ModelLoader:
 
         return df_imputed
 
-    def predict(self, features: pd.DataFrame) -> tuple:
-        if self.model is None:
+    def snapshot(self) -> ModelBundle:
+        """
+        The active bundle. Callers that also record the run id or threshold
+        take one snapshot and score with it, so a hot swap in between cannot
+        attribute a probability to the wrong run.
+        """
+        bundle = self.bundle
+        if bundle is None:
             raise ValueError("Model not loaded")
+        return bundle
 
-        probabilities = self.model.predict_proba(features)[:, 1]
-        predictions = (probabilities >= self.threshold).astype(int)
+    def predict(self, features: pd.DataFrame, bundle: Optional[ModelBundle] = None) -> tuple:
+        predictions, probabilities = self.predict_batch(features, bundle)
 
         return predictions[0], probabilities[0]
 
+    def predict_batch(self, features, bundle: Optional[ModelBundle] = None) -> tuple:
+        if bundle is None:
+            bundle = self.snapshot()
+
+        probabilities = self._predict_proba(bundle, features)
+        predictions = (probabilities >= bundle.threshold).astype(int)
+
+        return predictions, probabilities
+
     def get_risk_level(self, probability: float) -> str:
         if probability < 0.3:
             return "low"
@@ -81,4 +318,4 @@ class ModelLoader:
             return "high"
 
     def is_loaded(self) -> bool:
-        return self.model is not None
+        return self.bundle is not None
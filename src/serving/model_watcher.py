@@ -0,0 +1,48 @@
+import asyncio
+from typing import Optional
+
+
+class ModelWatcher:
+    """
+    Polls for a newer model every `poll_seconds` and hot-swaps it in.
+
+    `source` is "mlflow" to follow the latest run of the experiment, or
+    "artifact_cache" to follow the run the local artifact cache points at
+    (e.g. a directory updated by a deploy job). Loading and warm-up run in
+    a worker thread, never on the event loop or the inference executor.
+    """
+
+    def __init__(self, model_loader, poll_seconds: float = 60, source: str = "mlflow"):
+        if source not in ("mlflow", "artifact_cache"):
+            raise ValueError(f"Unknown model watch source: {source}")
+        self.model_loader = model_loader
+        self.poll_seconds = poll_seconds
+        self.source = source
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def check_now(self) -> bool:
+        return await asyncio.to_thread(self.model_loader.refresh, self.source)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.check_now()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
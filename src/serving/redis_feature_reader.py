@@ -0,0 +1,171 @@
+import math
+import os
+import re
+import struct
+import time
+import numpy as np
+import redis
+from typing import Dict, List, Optional
+from feast import FeatureView
+from feast.infra.key_encoding_utils import serialize_entity_key
+from feast.infra.online_stores.helpers import _mmh3
+from feast.infra.online_stores.redis import RedisOnlineStore
+from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+from google.protobuf.timestamp_pb2 import Timestamp
+
+JOIN_KEY = "SK_ID_CURR"
+
+# Serialized feast.types.Value tags: field number << 3 | wire type
+_FLOAT_TAG = 0x35
+_DOUBLE_TAG = 0x29
+_VARINT_TAGS = (0x18, 0x20, 0x38)  # int32_val, int64_val, bool_val
+
+_FLOAT = struct.Struct("<f")
+_DOUBLE = struct.Struct("<d")
+_INT64 = struct.Struct("<q")
+
+_ENV_DEFAULT = re.compile(r"\$\{(\w+):([^}]*)\}")
+
+
+def _decode_varint(raw: bytes, pos: int) -> int:
+    result, shift = 0, 0
+    while True:
+        byte = raw[pos]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        pos += 1
+        shift += 7
+    return result - (1 << 64) if result >= 1 << 63 else result
+
+
+def _decode_value(raw: bytes) -> float:
+    """
+    Decode a serialized Feast ValueProto holding a scalar number.
+    The common float/double/int layouts are read directly; anything else
+    goes through protobuf. Null and non-numeric values give NaN.
+    """
+    tag = raw[0]
+    if tag == _FLOAT_TAG and len(raw) == 5:
+        return _FLOAT.unpack_from(raw, 1)[0]
+    if tag == _DOUBLE_TAG and len(raw) == 9:
+        return _DOUBLE.unpack_from(raw, 1)[0]
+    if tag in _VARINT_TAGS:
+        return float(_decode_varint(raw, 1))
+
+    value = ValueProto()
+    value.ParseFromString(raw)
+    kind = value.WhichOneof("val")
+    if kind in ("float_val", "double_val", "int32_val", "int64_val", "bool_val"):
+        return float(getattr(value, kind))
+    return math.nan
+
+
+def connection_pool_from_string(connection_string: str, max_connections: int = 32,
+                                pool_class=redis.ConnectionPool):
+    """
+    Build a redis-py pool (sync or asyncio, per `pool_class`) from a Feast
+    `host:port,param=value` connection string, resolving `${VAR:default}`
+    placeholders from the environment.
+    """
+    connection_string = _ENV_DEFAULT.sub(
+        lambda m: os.getenv(m.group(1), m.group(2)), connection_string
+    )
+    startup_nodes, params = RedisOnlineStore._parse_connection_string(connection_string)
+    return pool_class(
+        host=startup_nodes[0]["host"],
+        port=int(startup_nodes[0]["port"]),
+        max_connections=max_connections,
+        **params
+    )
+
+
+class RedisFeatureReader:
+    """
+    Reads one feature view straight from the Feast Redis online store.
+
+    Redis keys, hash fields and the TTL are resolved once from the
+    FeatureView; `read` then sends one pipelined HMGET per entity and
+    decodes the replies into a float32 matrix in `feature_names` order.
+    Missing, null and expired values are NaN.
+    """
+
+    def __init__(self, feature_view: FeatureView, feature_names: List[str], project: str,
+                 client: redis.Redis, entity_key_serialization_version: int = 3):
+        schema = {field.name for field in feature_view.features}
+        unknown = [name for name in feature_names if name not in schema]
+        if unknown:
+            raise ValueError(f"Features {unknown} are not in feature view '{feature_view.name}'")
+
+        self.feature_view = feature_view
+        self.feature_names = list(feature_names)
+        self.client = client
+        self.ttl_seconds = feature_view.ttl.total_seconds() if feature_view.ttl else 0.0
+
+        self.hash_fields = [_mmh3(f"{feature_view.name}:{name}") for name in self.feature_names]
+        self.hash_fields.append(f"_ts:{feature_view.name}".encode("utf8"))
+
+        self._project = project.encode("utf8")
+        self._version = entity_key_serialization_version
+        template = self._serialize_key(0)
+        self._key_prefix = template[:-_INT64.size]
+        if self._serialize_key(1) != self._key_prefix + _INT64.pack(1):
+            self._key_prefix = None
+
+    @classmethod
+    def from_store(cls, store, feature_refs: List[str], max_connections: int = 32) -> "RedisFeatureReader":
+        """
+        Resolve `applicant_risk_features` from the feature repo and connect
+        with the online store settings of an existing FeatureStore.
+        """
+        from feature_store.feature_repo.features import applicant_risk_features
+
+        pool = connection_pool_from_string(store.config.online_store.connection_string, max_connections)
+        return cls(
+            feature_view=applicant_risk_features,
+            feature_names=[ref.split(":")[-1] for ref in feature_refs],
+            project=store.config.project,
+            client=redis.Redis(connection_pool=pool),
+            entity_key_serialization_version=store.config.entity_key_serialization_version
+        )
+
+    def _serialize_key(self, entity_id: int) -> bytes:
+        entity_key = EntityKeyProto(join_keys=[JOIN_KEY], entity_values=[ValueProto(int64_val=entity_id)])
+        return serialize_entity_key(entity_key, entity_key_serialization_version=self._version) + self._project
+
+    def redis_key(self, entity_id: int) -> bytes:
+        if self._key_prefix is None:
+            return self._serialize_key(entity_id)
+        return self._key_prefix + _INT64.pack(entity_id)
+
+    def read(self, entity_ids: List[int]) -> np.ndarray:
+        with self.client.pipeline(transaction=False) as pipe:
+            for entity_id in entity_ids:
+                pipe.hmget(self.redis_key(entity_id), self.hash_fields)
+            replies = pipe.execute()
+
+        return self.decode(replies)
+
+    def decode(self, replies: List[List[Optional[bytes]]]) -> np.ndarray:
+        out = np.full((len(replies), len(self.feature_names)), np.nan, dtype=np.float32)
+        now = time.time()
+
+        for i, values in enumerate(replies):
+            if self._expired(values[-1], now):
+                continue
+            for j, raw in enumerate(values[:-1]):
+                if raw:
+                    out[i, j] = _decode_value(raw)
+
+        return out
+
+    def read_dicts(self, entity_ids: List[int]) -> List[Dict[str, float]]:
+        return [dict(zip(self.feature_names, row)) for row in self.read(entity_ids).tolist()]
+
+    def _expired(self, raw_ts: Optional[bytes], now: float) -> bool:
+        if not self.ttl_seconds or not raw_ts:
+            return False
+        ts = Timestamp()
+        ts.ParseFromString(raw_ts)
+        return now - (ts.seconds + ts.nanos / 1e9) > self.ttl_seconds
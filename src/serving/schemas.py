@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 
 class PredictionRequest(BaseModel):
@@ -24,6 +24,25 @@ class PredictionResponse(BaseModel):
     probability: float
     risk_level: str
     used_features: Dict[str, Any]  
+    degraded: bool = Field(False, description="Online features were imputed because the store was too slow")
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class BatchPredictionRequest(BaseModel):
+    instances: List[PredictionRequest] = Field(..., description="Applicants to score")
+    include_features: bool = Field(False, description="Return used_features for each row")
+
+class BatchPredictionItem(BaseModel):
+    SK_ID_CURR: int
+    prediction: Optional[int] = None
+    probability: Optional[float] = None
+    risk_level: Optional[str] = None
+    used_features: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    n_success: int
+    n_failed: int
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,181 @@
+import os
+import queue
+import random
+import threading
+import time
+import numpy as np
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+from src.monitoring.metrics_exporter import track_shadow_scored, track_shadow_dropped
+
+SHADOW_LOG_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("SK_ID_CURR", pa.int64()),
+    ("champion_run_id", pa.string()),
+    ("champion_probability", pa.float64()),
+    ("shadow_run_id", pa.string()),
+    ("shadow_probability", pa.float64())
+])
+
+
+class ShadowScorer:
+    """
+    Scores a sample of live traffic with challenger models off the response path.
+
+    `submit` only queues the champion's feature rows and returns; a
+    background thread gathers queued rows into batches of up to
+    `max_batch_size` (or whatever arrived within `max_wait_ms`), scores each
+    batch once per shadow model and appends one row per (applicant, shadow)
+    to an Arrow IPC stream in `log_dir`. Each process writes its own file,
+    readable with `pyarrow.ipc.open_stream(path).read_all()`. When more than
+    `max_queue_rows` rows are waiting, new submissions are dropped.
+    """
+
+    def __init__(self, loaders: Sequence, log_dir: str, sample_rate: float = 0.1,
+                 max_batch_size: int = 256, max_wait_ms: float = 500, max_queue_rows: int = 10000):
+        self.loaders = list(loaders)
+        self.log_dir = log_dir
+        self.sample_rate = sample_rate
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_rows = max_queue_rows
+        self._queue = queue.Queue()
+        self._queued_rows = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._writer = None
+        self._sink = None
+        self.log_path = None
+
+    @property
+    def run_ids(self) -> List[Optional[str]]:
+        return [loader.run_id for loader in self.loaders]
+
+    def load(self) -> List[bool]:
+        """
+        Load every shadow model concurrently. Returns whether each one loaded.
+        """
+        if not self.loaders:
+            return []
+        with ThreadPoolExecutor(max_workers=len(self.loaders)) as pool:
+            return list(pool.map(lambda loader: loader.load_model(), self.loaders))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Score whatever is still queued, then close the log file.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def sampled(self) -> bool:
+        return self.is_running() and random.random() < self.sample_rate
+
+    def submit(self, entity_ids: Sequence[int], features: np.ndarray, champion_run_id: Optional[str],
+               champion_probabilities: Sequence[float]) -> bool:
+        """
+        Queue rows the champion has already scored. Safe to call from any
+        thread; never blocks. Returns False if the rows were dropped.
+        """
+        n_rows = len(entity_ids)
+        with self._lock:
+            if self._queued_rows + n_rows > self.max_queue_rows:
+                track_shadow_dropped(n_rows)
+                return False
+            self._queued_rows += n_rows
+
+        self._queue.put((
+            datetime.now(timezone.utc),
+            np.asarray(entity_ids, dtype=np.int64),
+            np.asarray(features),
+            champion_run_id,
+            np.asarray(champion_probabilities, dtype=np.float64)
+        ))
+        return True
+
+    def _collect(self) -> tuple:
+        """
+        Returns the next batch of queued chunks and whether stop was requested.
+        """
+        first = self._queue.get()
+        if first is None:
+            return [], True
+
+        batch, n_rows = [first], len(first[1])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_size:
+            try:
+                chunk = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                break
+            if chunk is None:
+                return batch, True
+            batch.append(chunk)
+            n_rows += len(chunk[1])
+
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if not batch:
+                continue
+
+            with self._lock:
+                self._queued_rows -= sum(len(chunk[1]) for chunk in batch)
+
+            try:
+                self._score(batch)
+            except Exception as e:
+                print(f"Shadow scoring error: {e}")
+
+    def _score(self, batch: list):
+        timestamps = np.concatenate([np.full(len(chunk[1]), chunk[0]) for chunk in batch])
+        entity_ids = np.concatenate([chunk[1] for chunk in batch])
+        features = np.vstack([chunk[2] for chunk in batch])
+        champion_run_ids = np.concatenate([np.full(len(chunk[1]), chunk[3], dtype=object) for chunk in batch])
+        champion_probabilities = np.concatenate([chunk[4] for chunk in batch])
+
+        for loader in self.loaders:
+            if not loader.is_loaded():
+                continue
+            try:
+                _, probabilities = loader.predict_batch(features)
+            except Exception as e:
+                print(f"Shadow model {loader.run_id} failed: {e}")
+                continue
+
+            self._write(pa.record_batch([
+                pa.array(timestamps, type=SHADOW_LOG_SCHEMA.field("timestamp").type),
+                pa.array(entity_ids),
+                pa.array(champion_run_ids, type=pa.string()),
+                pa.array(champion_probabilities),
+                pa.array([loader.run_id] * len(entity_ids), type=pa.string()),
+                pa.array(np.asarray(probabilities, dtype=np.float64))
+            ], schema=SHADOW_LOG_SCHEMA))
+            track_shadow_scored(loader.run_id, len(entity_ids))
+
+    def _write(self, record_batch: pa.RecordBatch):
+        if self._writer is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            self.log_path = os.path.join(self.log_dir, f"shadow-{started}-{os.getpid()}.arrow")
+            self._sink = pa.OSFile(self.log_path, "wb")
+            self._writer = pa.ipc.new_stream(self._sink, SHADOW_LOG_SCHEMA)
+        self._writer.write_batch(record_batch)
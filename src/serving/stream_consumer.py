@@ -0,0 +1,407 @@
+"""
+Long-running consumer that scores loan applications from an event stream.
+
+    python -m src.serving.stream_consumer [--max-events N]
+
+Source, sink and batching come from the `stream_consumer` section of the
+serving config. Sources follow a Kafka-style poll/commit interface; the
+bundled ones are an NDJSON file tail (`file:path`) and a local TCP socket
+(`tcp://host:port`) standing in for a broker.
+
+Delivery is at-least-once: each micro-batch is written to the sink and
+fsynced before its last offset is checkpointed, so a crash in between
+replays the batch on restart. Decisions carry their source offset so
+downstream consumers can drop duplicates.
+"""
+import argparse
+import json
+import os
+import socket
+import time
+import yaml
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+from src.serving.feature_assembly import EXPECTED_COLUMNS, FeatureVectorBuilder, merge_features
+from src.serving.schemas import PredictionRequest
+
+
+class Event(NamedTuple):
+    offset: int
+    value: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+class FileTailSource:
+    """
+    Follows an NDJSON file. Offsets are byte positions just past each
+    line, and a line without its trailing newline is not read until the
+    writer finishes it.
+    """
+
+    def __init__(self, path: str, start_offset: int = 0):
+        self.path = path
+        self.position = start_offset
+        self._file = None
+
+    def poll(self, max_records: int, timeout: float) -> List[Event]:
+        deadline = time.monotonic() + timeout
+        events = []
+        while len(events) < max_records:
+            if self._file is None and os.path.exists(self.path):
+                self._file = open(self.path, "rb")
+                self._file.seek(self.position)
+
+            line = self._file.readline() if self._file is not None else b""
+            if line.endswith(b"\n"):
+                self.position += len(line)
+                events.append(_parse(self.position, line))
+                continue
+
+            if line:
+                self._file.seek(self.position)
+            if events or time.monotonic() >= deadline:
+                break
+            time.sleep(min(0.01, max(deadline - time.monotonic(), 0)))
+
+        return events
+
+    def commit(self, offset: int):
+        pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class SocketSource:
+    """
+    Accepts one producer at a time on a local TCP port and reads NDJSON
+    lines from it. Offsets count lines per connection; `commit` sends
+    `{"ack": offset}` back so the producer can forget everything up to it
+    and resend the rest after a reconnect.
+    """
+
+    def __init__(self, host: str, port: int):
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()
+        self._conn = None
+        self._buffer = b""
+        self._offset = 0
+
+    def poll(self, max_records: int, timeout: float) -> List[Event]:
+        deadline = time.monotonic() + timeout
+        events = []
+        while len(events) < max_records:
+            while b"\n" in self._buffer and len(events) < max_records:
+                line, self._buffer = self._buffer.split(b"\n", 1)
+                self._offset += 1
+                events.append(_parse(self._offset, line))
+            if len(events) >= max_records:
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (events and not self._buffer):
+                break
+            if not self._receive(remaining):
+                break
+
+        return events
+
+    def _receive(self, timeout: float) -> bool:
+        if self._conn is None:
+            self._server.settimeout(timeout)
+            try:
+                self._conn, _ = self._server.accept()
+            except socket.timeout:
+                return False
+            self._buffer, self._offset = b"", 0
+
+        self._conn.settimeout(timeout)
+        try:
+            data = self._conn.recv(65536)
+        except socket.timeout:
+            return False
+        if not data:
+            self._conn.close()
+            self._conn = None
+            return False
+
+        self._buffer += data
+        return True
+
+    def commit(self, offset: int):
+        if self._conn is not None:
+            try:
+                self._conn.sendall(json.dumps({"ack": offset}).encode() + b"\n")
+            except OSError:
+                pass
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._server.close()
+
+
+class FileSink:
+    """
+    Appends decisions as NDJSON and fsyncs each batch before returning.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, decisions: List[Dict[str, Any]]):
+        self._file.write("".join(json.dumps(decision) + "\n" for decision in decisions))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class Checkpoint:
+    """
+    Last offset whose decisions reached the sink, persisted atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> int:
+        try:
+            with open(self.path) as f:
+                return json.load(f)["offset"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def save(self, offset: int):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": offset, "saved_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def _parse(offset: int, line: bytes) -> Event:
+    """
+    Validates the event as a /predict request; only the request's own
+    fields are kept, so unknown keys cannot override online features.
+    """
+    try:
+        request = PredictionRequest.model_validate(json.loads(line))
+        return Event(offset, request.model_dump(exclude_unset=True))
+    except ValueError as e:
+        return Event(offset, None, f"Invalid event: {e}")
+
+
+def open_source(url: str, start_offset: int = 0):
+    if url.startswith("file:"):
+        return FileTailSource(url[len("file:"):], start_offset)
+    if url.startswith("tcp://"):
+        host, port = url[len("tcp://"):].rsplit(":", 1)
+        return SocketSource(host, int(port))
+    raise ValueError(f"Unsupported stream source: {url}")
+
+
+def open_sink(url: str):
+    if url.startswith("file:"):
+        return FileSink(url[len("file:"):])
+    raise ValueError(f"Unsupported stream sink: {url}")
+
+
+class StreamConsumer:
+    """
+    Polls micro-batches of up to `batch_size` events (waiting at most
+    `max_wait_ms` for a batch to fill), fetches their online features in
+    one call, scores them in one model call, writes the decisions and
+    checkpoints the batch's last offset. Scored events are also submitted
+    to `audit_log` when it is running.
+
+    An event whose online features could not be fetched is written with an
+    error instead of being scored on empty features.
+    """
+
+    def __init__(self, source, sink, checkpoint: Checkpoint, feature_service, model_loader,
+                 batch_size: int = 256, max_wait_ms: float = 50, audit_log=None):
+        self.source = source
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.feature_service = feature_service
+        self.model_loader = model_loader
+        self.audit_log = audit_log
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.builder = FeatureVectorBuilder(EXPECTED_COLUMNS)
+        self.events_processed = 0
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def run(self, max_events: Optional[int] = None, idle_timeout: Optional[float] = None,
+            report_every: float = 10):
+        idle_since = time.monotonic()
+        last_report = time.monotonic()
+        while max_events is None or self.events_processed < max_events:
+            n_events = self.process_batch()
+            now = time.monotonic()
+            if n_events:
+                idle_since = now
+            elif idle_timeout is not None and now - idle_since >= idle_timeout:
+                break
+
+            if now - last_report >= report_every:
+                print(self.throughput_report())
+                last_report = now
+
+    def process_batch(self) -> int:
+        events = self.source.poll(self.batch_size, self.max_wait)
+        if not events:
+            return 0
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+        self.sink.write(self.score(events))
+        self.checkpoint.save(events[-1].offset)
+        self.source.commit(events[-1].offset)
+
+        self.cpu_seconds += time.process_time() - cpu_start
+        self.wall_seconds += time.perf_counter() - wall_start
+        self.events_processed += len(events)
+        return len(events)
+
+    def score(self, events: List[Event]) -> List[Dict[str, Any]]:
+        scored_at = datetime.now(timezone.utc).isoformat()
+        decisions = [
+            {"offset": event.offset, "SK_ID_CURR": (event.value or {}).get("SK_ID_CURR"), "scored_at": scored_at}
+            for event in events
+        ]
+
+        valid = [i for i, event in enumerate(events) if event.error is None]
+        for i, event in enumerate(events):
+            if event.error is not None:
+                decisions[i]["error"] = event.error
+        if not valid:
+            return decisions
+
+        feast_rows = self.feature_service.get_online_features_batch([events[i].value["SK_ID_CURR"] for i in valid])
+        records, positions = [], []
+        for i, feast_features in zip(valid, feast_rows):
+            if not feast_features:
+                decisions[i]["error"] = "Online features unavailable"
+                continue
+            try:
+                records.append(merge_features(events[i].value, feast_features))
+                positions.append(i)
+            except Exception as e:
+                decisions[i]["error"] = str(e)
+
+        if records:
+            features_matrix = self.builder.build_matrix(records)
+            bundle = self.model_loader.snapshot()
+            predictions, probabilities = self.model_loader.predict_batch(features_matrix, bundle)
+            if self.audit_log is not None and self.audit_log.is_running():
+                self.audit_log.submit(
+                    "stream", [events[i].value for i in positions], features_matrix,
+                    probabilities, predictions, bundle.threshold, bundle.run_id
+                )
+            for row, i in enumerate(positions):
+                probability = float(probabilities[row])
+                decisions[i].update(
+                    prediction=int(predictions[row]),
+                    probability=round(probability, 4),
+                    risk_level=self.model_loader.get_risk_level(probability),
+                    model_run_id=bundle.run_id
+                )
+
+        return decisions
+
+    def throughput_report(self) -> str:
+        per_wall = self.events_processed / self.wall_seconds if self.wall_seconds else 0.0
+        per_core = self.events_processed / self.cpu_seconds if self.cpu_seconds else 0.0
+        return (
+            f"Stream consumer: {self.events_processed} events, "
+            f"{per_wall:.0f} events/s, {per_core:.0f} events per CPU-second"
+        )
+
+
+def main(args):
+    from src.serving.artifact_cache import ModelArtifactCache
+    from src.serving.audit_log import AuditLogSink
+    from src.serving.feature_cache import FeatureCache
+    from src.serving.feature_service import FeatureService
+    from src.serving.model_loader import ModelLoader
+
+    with open(os.getenv("SERVING_CONFIG", "configs/serving_config.yaml")) as f:
+        config = yaml.safe_load(f)
+    stream_config = config["stream_consumer"]
+    cache_config = config["feature_cache"]
+    artifact_cache_config = config["model"]["artifact_cache"]
+    audit_config = config["audit_log"]
+
+    feature_service = FeatureService(
+        repo_path=os.getenv("FEAST_REPO_PATH", "feature_store/feature_repo"),
+        cache=FeatureCache(
+            max_entries=cache_config["max_entries"],
+            ttl_seconds=cache_config["ttl_seconds"],
+            max_bytes=cache_config["max_bytes"]
+        ) if cache_config["enabled"] else None,
+        watermark_check_seconds=cache_config["watermark_check_seconds"]
+    )
+    if config["redis_fast_path"]["enabled"]:
+        feature_service.use_redis_fast_path(config["redis_fast_path"]["max_connections"])
+
+    model_loader = ModelLoader(
+        tracking_uri=os.getenv("MLFLOW_TRACKING_URI", config["mlflow"]["tracking_uri"]),
+        experiment_name=config["mlflow"]["experiment_name"],
+        predictor=config["model"]["predictor"],
+        max_compiled_rows=config["model"]["max_compiled_rows"],
+        artifact_cache=ModelArtifactCache(
+            cache_dir=artifact_cache_config["dir"],
+            max_age_seconds=artifact_cache_config["max_age_seconds"]
+        ) if artifact_cache_config["enabled"] else None
+    )
+    if not model_loader.load_model():
+        raise SystemExit("Model failed to load")
+
+    audit_log = AuditLogSink(
+        log_dir=audit_config["log_dir"],
+        feature_columns=EXPECTED_COLUMNS,
+        flush_rows=audit_config["flush_rows"],
+        flush_interval_seconds=audit_config["flush_interval_seconds"],
+        max_buffered_rows=audit_config["max_buffered_rows"],
+        rotate_bytes=audit_config["rotate_bytes"],
+        rotate_seconds=audit_config["rotate_seconds"]
+    )
+    if audit_config["enabled"]:
+        audit_log.start()
+
+    checkpoint = Checkpoint(stream_config["checkpoint_path"])
+    consumer = StreamConsumer(
+        source=open_source(stream_config["source"], checkpoint.load()),
+        sink=open_sink(stream_config["sink"]),
+        checkpoint=checkpoint,
+        feature_service=feature_service,
+        model_loader=model_loader,
+        batch_size=stream_config["batch_size"],
+        max_wait_ms=stream_config["max_wait_ms"],
+        audit_log=audit_log
+    )
+
+    try:
+        consumer.run(max_events=args.max_events, idle_timeout=args.idle_timeout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        consumer.source.close()
+        consumer.sink.close()
+        audit_log.stop()
+        print(consumer.throughput_report())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-events", type=int, default=None)
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Stop after this many idle seconds")
+    main(parser.parse_args())
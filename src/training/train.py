@@ -14,8 +14,7 @@ with open("configs/training_config.yaml") as f:
 tracking_uri = os.getenv("MLFLOW_TRACKING_URI", config["mlflow"]["tracking_uri"])
 mlflow.set_tracking_uri(tracking_uri)
 
-df = load_dataset(filepath="data/training_processed/training_dataset_final.parquet",
-                  ext="parquet")
+df = load_dataset(filepath=config["training"]["data_path"], ext="parquet")
 
 X_train, y_train, X_val, y_val, X_test, y_test = preprocess_data(df=df,
                                                                  target='label',
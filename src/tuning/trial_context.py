@@ -0,0 +1,99 @@
+"""
+Data shared by every tuning trial, prepared once per study.
+
+The training dataset is loaded, split and preprocessed once, optionally
+cached as .npy files that later studies memory-map instead of redoing the
+work. For XGBoost the matrices are also converted once into QuantileDMatrix
+objects, so a trial only pays for boosting.
+"""
+import copy
+import hashlib
+import json
+import os
+import numpy as np
+import xgboost as xgb
+import yaml
+from typing import Dict, Optional, Tuple
+from src.data_pipeline.data_pipeline import preprocess_data
+from src.data_pipeline.load_dataset import load_dataset
+from src.training.models import get_model
+
+DATA_PATH = "data/training/training_dataset.parquet"
+TRAINING_CONFIG = "configs/training_config.yaml"
+ARRAYS = ("X_train", "y_train", "X_val", "y_val")
+
+
+class TrialContext:
+    def __init__(self, data_path: str = DATA_PATH, config_path: str = TRAINING_CONFIG,
+                 cache_dir: Optional[str] = None, test_size: float = 0.15, val_size: float = 0.1):
+        with open(config_path) as f:
+            self.training_config = yaml.safe_load(f)
+        self.data_path = data_path
+        self.split_params = {
+            "test_size": test_size, "val_size": val_size,
+            "standardization": self.training_config["training"]["standardization"]
+        }
+
+        arrays = self._load_cached(cache_dir) if cache_dir else None
+        if arrays is None:
+            arrays = self._preprocess()
+            if cache_dir:
+                self._save_cache(cache_dir, arrays)
+        self.X_train, self.y_train, self.X_val, self.y_val = (arrays[name] for name in ARRAYS)
+
+        self.imbalance_ratio = (self.y_train == 0).sum() / (self.y_train == 1).sum()
+        self._dmatrices: Optional[Tuple[xgb.QuantileDMatrix, xgb.QuantileDMatrix]] = None
+
+    def _preprocess(self) -> Dict[str, np.ndarray]:
+        df = load_dataset(filepath=self.data_path, ext="parquet")
+        X_train, y_train, X_val, y_val, _, _ = preprocess_data(df, target='label', **self.split_params)
+        return {"X_train": X_train, "y_train": np.asarray(y_train), "X_val": X_val, "y_val": np.asarray(y_val)}
+
+    def _cache_path(self, cache_dir: str) -> str:
+        """Keyed by the dataset file and the split parameters."""
+        stat = os.stat(self.data_path)
+        key = json.dumps([os.path.abspath(self.data_path), stat.st_size, stat.st_mtime_ns, self.split_params])
+        return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest()[:16])
+
+    def _load_cached(self, cache_dir: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._cache_path(cache_dir)
+        if not all(os.path.exists(os.path.join(path, f"{name}.npy")) for name in ARRAYS):
+            return None
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+
+    def _save_cache(self, cache_dir: str, arrays: Dict[str, np.ndarray]):
+        path = self._cache_path(cache_dir)
+        os.makedirs(path, exist_ok=True)
+        # Each file is renamed into place once complete; the cache is used when all are there
+        for name in ARRAYS:
+            tmp_path = os.path.join(path, f".{name}.npy")
+            np.save(tmp_path, arrays[name])
+            os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+    def dmatrices(self) -> Tuple[xgb.QuantileDMatrix, xgb.QuantileDMatrix]:
+        """Training and validation matrices, quantized with the same bins."""
+        if self._dmatrices is None:
+            dtrain = xgb.QuantileDMatrix(self.X_train, self.y_train)
+            self._dmatrices = dtrain, xgb.QuantileDMatrix(self.X_val, self.y_val, ref=dtrain)
+        return self._dmatrices
+
+    def trial_config(self, params: Dict) -> Dict:
+        trial_config = copy.deepcopy(self.training_config)
+        model_name = trial_config["model"]["name"]
+        trial_config["model"][model_name].update(params)
+        return trial_config
+
+    def predict_val(self, trial_config: Dict) -> np.ndarray:
+        """
+        Fit the configured model and return its validation probabilities.
+        XGBoost trains on the shared matrices with the booster parameters
+        the XGBClassifier from `get_model` would use.
+        """
+        model = get_model(trial_config, xgb_scale_pos_weight=self.imbalance_ratio)
+        if trial_config["model"]["name"] != "xgboost":
+            model.fit(self.X_train, self.y_train)
+            return model.predict_proba(self.X_val)[:, 1]
+
+        dtrain, dval = self.dmatrices()
+        booster = xgb.train(model.get_xgb_params(), dtrain, num_boost_round=model.n_estimators)
+        return booster.predict(dval)
@@ -16,7 +16,7 @@ def objective_with_logging(trial):
         mlflow.log_metric("best_f1", result)
         return result
 
-objective = create_objective()
+objective = create_objective(cache_dir=tuning_config["cache_dir"])
 mlflow.end_run()  
 
 with mlflow.start_run(run_name="optuna_study"):
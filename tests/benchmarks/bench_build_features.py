@@ -0,0 +1,122 @@
+"""
+Feature store build: rows per second and peak memory.
+
+    python -m tests.benchmarks.bench_build_features [--rows 300000]
+
+Writes a synthetic raw CSV as wide as transactions.csv (the feature inputs
+plus `--filler-columns` others) and builds the feature table from it twice,
+each in a fresh process so ru_maxrss is that build's peak:
+
+- previous: whole-file read_csv, column-by-column features with row-wise
+  `apply` for the flags, written to Parquet and CSV
+- streaming: build_features.build_full, chunked read of the inputs only
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def previous_engineer_features(df):
+    features = pd.DataFrame()
+    features['SK_ID_CURR'] = df['SK_ID_CURR']
+    features['credit_to_income_ratio'] = df['AMT_CREDIT'] / df['AMT_INCOME_TOTAL']
+    features['annuity_to_income_ratio'] = df['AMT_ANNUITY'] / df['AMT_INCOME_TOTAL']
+    features['credit_term_approx'] = df['AMT_CREDIT'] / df['AMT_ANNUITY']
+    features['goods_price_to_credit_ratio'] = df['AMT_GOODS_PRICE'] / df['AMT_CREDIT']
+    features['age_years'] = df['DAYS_BIRTH'] / -365.25
+    features['years_employed'] = df['DAYS_EMPLOYED'].replace(365243, np.nan) / -365.25
+    features['employed_to_age_ratio'] = features['years_employed'] / features['age_years']
+    features['income_per_person'] = df['AMT_INCOME_TOTAL'] / df['CNT_FAM_MEMBERS']
+    features['ext_source_1'] = df['EXT_SOURCE_1']
+    features['ext_source_2'] = df['EXT_SOURCE_2']
+    features['ext_source_3'] = df['EXT_SOURCE_3']
+    features['ext_source_mean'] = df[['EXT_SOURCE_1', 'EXT_SOURCE_2', 'EXT_SOURCE_3']].mean(axis=1)
+    features['flag_own_car'] = df['FLAG_OWN_CAR'].apply(lambda x: 1 if x == 'Y' else 0)
+    features['flag_own_realty'] = df['FLAG_OWN_REALTY'].apply(lambda x: 1 if x == 'Y' else 0)
+    return features
+
+
+def run_previous(raw_path, workdir):
+    df_features = previous_engineer_features(pd.read_csv(raw_path))
+    df_features['event_timestamp'] = pd.Timestamp.now()
+    df_features['created_timestamp'] = pd.Timestamp.now()
+    df_features.to_parquet(os.path.join(workdir, "previous.parquet"), index=False)
+    df_features.to_csv(os.path.join(workdir, "previous.csv"), index=False)
+    return len(df_features)
+
+
+def run_streaming(raw_path, workdir):
+    from feature_store.build_features import build_full
+
+    stats = build_full(
+        raw_path, os.path.join(workdir, "streaming"), os.path.join(workdir, "streaming_state")
+    )
+    return stats["rows_written"]
+
+
+def write_raw(path, n_rows, filler_columns):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "SK_ID_CURR": np.arange(100000, 100000 + n_rows),
+        "AMT_CREDIT": rng.uniform(4.5e4, 4e6, n_rows).round(1),
+        "AMT_INCOME_TOTAL": rng.uniform(2.5e4, 1e6, n_rows).round(1),
+        "AMT_ANNUITY": rng.uniform(1.6e3, 2.5e5, n_rows).round(1),
+        "AMT_GOODS_PRICE": rng.uniform(4e4, 4e6, n_rows).round(1),
+        "DAYS_BIRTH": rng.integers(-25229, -7489, n_rows),
+        "DAYS_EMPLOYED": np.where(rng.random(n_rows) < 0.18, 365243, rng.integers(-17912, 0, n_rows)),
+        "CNT_FAM_MEMBERS": rng.integers(1, 6, n_rows).astype(float),
+        "EXT_SOURCE_1": np.where(rng.random(n_rows) < 0.56, np.nan, rng.uniform(0, 1, n_rows)),
+        "EXT_SOURCE_2": rng.uniform(0, 1, n_rows),
+        "EXT_SOURCE_3": np.where(rng.random(n_rows) < 0.2, np.nan, rng.uniform(0, 1, n_rows)),
+        "FLAG_OWN_CAR": rng.choice(["Y", "N"], n_rows),
+        "FLAG_OWN_REALTY": rng.choice(["Y", "N"], n_rows)
+    })
+    filler = pd.DataFrame({f"COLUMN_{i}": rng.normal(size=n_rows).round(4) for i in range(filler_columns)})
+    pd.concat([df, filler], axis=1).to_csv(path, index=False)
+
+
+def child(args):
+    started = time.perf_counter()
+    rows = {"previous": run_previous, "streaming": run_streaming}[args.variant](args.raw, args.workdir)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "rows": rows,
+        "seconds": elapsed,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        raw_path = os.path.join(workdir, "raw.csv")
+        write_raw(raw_path, args.rows, args.filler_columns)
+        print(f"{args.rows} rows, {os.path.getsize(raw_path) / 2**20:.0f} MB of CSV")
+        print(f"{'variant':10s} {'rows/s':>10s} {'peak MB':>9s}")
+
+        for variant in ("previous", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-m", "tests.benchmarks.bench_build_features",
+                 "--variant", variant, "--raw", raw_path, "--workdir", workdir],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{variant:10s} {result['rows'] / result['seconds']:10.0f} {result['peak_mb']:9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--filler-columns", type=int, default=100)
+    parser.add_argument("--variant", choices=["previous", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--raw", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    child(args) if args.variant else main(args)
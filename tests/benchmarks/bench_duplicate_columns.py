@@ -0,0 +1,83 @@
+"""
+Duplicate column detection: pairwise Series.equals against hashing.
+
+    python -m tests.benchmarks.bench_duplicate_columns [--rows 100000] [--columns 1000]
+
+Builds a table of float32, int8 and float64 columns where every tenth
+column duplicates an earlier one, then times the previous pairwise scan,
+find_duplicate_columns and the near-constant and collinearity checks.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_pipeline.clean_features import (
+    find_collinear_columns,
+    find_duplicate_columns,
+    find_near_constant_columns
+)
+
+
+def pairwise_duplicates(df):
+    duplicate_groups, checked = {}, set()
+    columns = list(df.columns)
+    for i, col1 in enumerate(columns):
+        if col1 in checked:
+            continue
+        duplicates = [col1]
+        for col2 in columns[i + 1:]:
+            if col2 not in checked and df[col1].equals(df[col2]):
+                duplicates.append(col2)
+                checked.add(col2)
+        if len(duplicates) > 1:
+            duplicate_groups[col1] = duplicates
+            checked.update(duplicates)
+    return duplicate_groups
+
+
+def make_table(n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    columns = {}
+    for i in range(n_columns):
+        if i % 10 == 9:
+            columns[f"col_{i}"] = columns[f"col_{rng.integers(0, i - 1)}"].copy()
+        elif i % 3 == 0:
+            columns[f"col_{i}"] = rng.integers(0, 2, n_rows).astype(np.int8)
+        elif i % 3 == 1:
+            columns[f"col_{i}"] = rng.normal(size=n_rows).astype(np.float32)
+        else:
+            columns[f"col_{i}"] = np.where(rng.random(n_rows) < 0.3, np.nan, rng.normal(size=n_rows))
+    return pd.DataFrame(columns)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main(args):
+    df = make_table(args.rows, args.columns)
+    print(f"{args.rows} rows x {args.columns} columns")
+
+    hashed, hashed_seconds = timed(lambda: find_duplicate_columns(df))
+    print(f"{'hashed duplicates':22s} {hashed_seconds:8.2f}s  {len(hashed)} groups")
+    if not args.skip_pairwise:
+        pairwise, pairwise_seconds = timed(lambda: pairwise_duplicates(df))
+        assert pairwise == hashed
+        print(f"{'pairwise duplicates':22s} {pairwise_seconds:8.2f}s")
+
+    near_constant, seconds = timed(lambda: find_near_constant_columns(df))
+    print(f"{'near-constant':22s} {seconds:8.2f}s  {len(near_constant)} columns")
+    collinear, seconds = timed(lambda: find_collinear_columns(df))
+    print(f"{'collinear':22s} {seconds:8.2f}s  {len(collinear)} groups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=1000)
+    parser.add_argument("--skip-pairwise", action="store_true", help="Skip the quadratic scan on wide tables")
+    main(parser.parse_args())
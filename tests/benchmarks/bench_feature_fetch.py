@@ -0,0 +1,115 @@
+"""
+Blocking vs asyncio online feature reads.
+
+    python -m tests.benchmarks.bench_feature_fetch --redis-url redis://localhost:6379
+
+Without --redis-url an in-process fakeredis is used, which has no network
+round trip and therefore understates what the async path saves.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from feature_store.feature_repo.features import applicant_risk_features
+from src.serving.async_feature_reader import AsyncRedisFeatureReader
+from src.serving.redis_feature_reader import RedisFeatureReader
+
+PROJECT = "loan_risk_prediction"
+FEATURES = [field.name for field in applicant_risk_features.features]
+
+
+def make_clients(redis_url):
+    if redis_url:
+        return redis.Redis.from_url(redis_url), aioredis.Redis.from_url(redis_url)
+
+    import fakeredis
+    server = fakeredis.FakeServer()
+    return fakeredis.FakeRedis(server=server), fakeredis.FakeAsyncRedis(server=server)
+
+
+def populate(reader, client, entity_ids):
+    ts = Timestamp()
+    ts.FromDatetime(datetime.now(timezone.utc))
+    with client.pipeline(transaction=False) as pipe:
+        for entity_id in entity_ids:
+            mapping = {field: ValueProto(float_val=entity_id / 1000).SerializeToString()
+                       for field in reader.hash_fields[:-1]}
+            mapping[reader.hash_fields[-1]] = ts.SerializeToString()
+            pipe.hset(reader.redis_key(entity_id), mapping=mapping)
+        pipe.execute()
+
+
+def summarize(name, latencies, wall):
+    latencies = np.array(latencies) * 1000
+    print(f"{name:28s} {len(latencies) / wall:10.0f} req/s   "
+          f"p50 {np.percentile(latencies, 50):7.3f} ms   p99 {np.percentile(latencies, 99):7.3f} ms")
+
+
+def timed_read(reader, entity_id):
+    start = time.perf_counter()
+    reader.read([entity_id])
+    return time.perf_counter() - start
+
+
+async def bench_blocking_on_loop(reader, ids):
+    start = time.perf_counter()
+    latencies = [timed_read(reader, entity_id) for entity_id in ids]
+    return latencies, time.perf_counter() - start
+
+
+async def bench_blocking_in_threads(reader, ids, workers):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*[
+            loop.run_in_executor(pool, timed_read, reader, entity_id) for entity_id in ids
+        ])
+        return latencies, time.perf_counter() - start
+
+
+async def bench_async(async_reader, ids, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(entity_id):
+        async with semaphore:
+            start = time.perf_counter()
+            await async_reader.read([entity_id])
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[one(entity_id) for entity_id in ids])
+    return latencies, time.perf_counter() - start
+
+
+async def main(args):
+    sync_client, async_client = make_clients(args.redis_url)
+    reader = RedisFeatureReader(applicant_risk_features, FEATURES, PROJECT, client=sync_client)
+    async_reader = AsyncRedisFeatureReader(reader, async_client, timeout_ms=1000)
+
+    entity_ids = list(range(100000, 100000 + args.entities))
+    populate(reader, sync_client, entity_ids)
+    ids = np.random.default_rng(0).choice(entity_ids, size=args.requests).tolist()
+
+    summarize("blocking, on event loop", *await bench_blocking_on_loop(reader, ids))
+    summarize(f"blocking, {args.workers} threads", *await bench_blocking_in_threads(reader, ids, args.workers))
+    summarize(f"async, concurrency {args.concurrency}", *await bench_async(async_reader, ids, args.concurrency))
+
+    await async_reader.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=64)
+    asyncio.run(main(parser.parse_args()))
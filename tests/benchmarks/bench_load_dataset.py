@@ -0,0 +1,69 @@
+"""
+Training table storage: write time, read time and in-memory size.
+
+    python -m tests.benchmarks.bench_load_dataset [--rows 300000]
+
+Builds a synthetic table shaped like training_dataset.parquet (ids, label,
+0/1 flags, small counts and float features) and compares the previous
+default-dtype Parquet + CSV writes with save_dataset, then reads it back
+whole and projected to the 20 columns train.py uses.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_pipeline.load_dataset import load_dataset, save_dataset
+
+
+def make_table(n_rows, n_flags, n_counts, n_floats):
+    rng = np.random.default_rng(0)
+    columns = {"SK_ID_CURR": np.arange(100002, 100002 + n_rows), "label": rng.integers(0, 2, n_rows)}
+    columns.update({f"FLAG_{i}": rng.integers(0, 2, n_rows) for i in range(n_flags)})
+    columns.update({f"CNT_{i}": rng.integers(0, 20, n_rows) for i in range(n_counts)})
+    columns.update({f"AMT_{i}": rng.lognormal(11, 1, n_rows).round(1) for i in range(n_floats)})
+    return pd.DataFrame(columns)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main(args):
+    df = make_table(args.rows, 30, 20, 70)
+    projected = ["SK_ID_CURR", "label"] + [f"AMT_{i}" for i in range(18)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        previous_path = os.path.join(workdir, "previous.parquet")
+        compact_path = os.path.join(workdir, "compact.parquet")
+
+        def write_previous():
+            df.to_parquet(previous_path, index=False)
+            df.to_csv(os.path.join(workdir, "previous.csv"), index=False)
+
+        _, previous_write = timed(write_previous)
+        _, compact_write = timed(lambda: save_dataset(df, compact_path))
+
+        print(f"{args.rows} rows x {df.shape[1]} columns")
+        print(f"{'variant':10s} {'write s':>8s} {'read s':>7s} {'MB':>6s} {'20 cols s':>10s}")
+        for variant, path, write_seconds, read in (
+            ("previous", previous_path, previous_write, lambda columns: pd.read_parquet(path, columns=columns)),
+            ("compact", compact_path, compact_write, lambda columns: load_dataset(path, "parquet", columns))
+        ):
+            full, read_seconds = timed(lambda: read(None))
+            _, projected_seconds = timed(lambda: read(projected))
+            print(
+                f"{variant:10s} {write_seconds:8.2f} {read_seconds:7.2f} "
+                f"{full.memory_usage(deep=True).sum() / 2**20:6.0f} {projected_seconds:10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300000)
+    main(parser.parse_args())
@@ -0,0 +1,60 @@
+"""
+Per-call latency of the serving predictor modes.
+
+    python -m tests.benchmarks.bench_predictor
+
+Trains an XGBoost model shaped like configs/training_config.yaml
+(300 trees, depth 6) on 21 synthetic features and times predict_proba,
+inplace_predict and the compiled ensemble for a batch of 1 and of 1024.
+"""
+import argparse
+import time
+
+import numpy as np
+from xgboost import XGBClassifier
+
+from src.serving.compiled_predictor import CompiledTreeEnsemble, build_predictor
+
+
+def time_call(fn, X, repeats):
+    fn(X)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1e6, np.percentile(samples, 99) * 1e6
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(20000, 21)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+
+    model = XGBClassifier(n_estimators=args.trees, max_depth=args.depth, learning_rate=0.05,
+                          tree_method="hist", random_state=42).fit(X, y)
+    reference = model.predict_proba(X[:1024])[:, 1]
+
+    predictors = {
+        "sklearn predict_proba": lambda batch: model.predict_proba(batch)[:, 1],
+        "inplace_predict": build_predictor(model, "inplace"),
+        "compiled ensemble": CompiledTreeEnsemble.from_booster(model.get_booster()),
+        "compiled (size dispatch)": build_predictor(model, "compiled"),
+    }
+
+    print(f"{'predictor':28s} {'batch':>6s} {'median us':>10s} {'p99 us':>10s} {'max |diff|':>11s}")
+    for name, predictor in predictors.items():
+        diff = np.abs(predictor(X[:1024]) - reference).max()
+        for batch_size in (1, 1024):
+            repeats = args.repeats if batch_size == 1 else max(args.repeats // 20, 10)
+            median, p99 = time_call(predictor, X[:batch_size], repeats)
+            print(f"{name:28s} {batch_size:6d} {median:10.1f} {p99:10.1f} {diff:11.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--repeats", type=int, default=500)
+    main(parser.parse_args())
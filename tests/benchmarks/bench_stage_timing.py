@@ -0,0 +1,63 @@
+"""
+Cost of the per-request stage instrumentation.
+
+    python -m tests.benchmarks.bench_stage_timing
+
+Times one request's worth of StageTimer work (six marks, exporting the
+Prometheus histograms and formatting the Server-Timing header) against
+the same six bare perf_counter calls.
+"""
+import argparse
+import time
+
+from src.monitoring.stage_timer import StageTimer
+
+STAGES = ("validation", "executor_wait", "feast_fetch", "feature_assembly", "inference", "response")
+
+
+def bare():
+    for _ in STAGES:
+        time.perf_counter()
+
+
+def marks_only():
+    timer = StageTimer("bench")
+    for stage in STAGES:
+        timer.mark(stage)
+
+
+def marks_and_observe():
+    timer = StageTimer("bench")
+    for stage in STAGES:
+        timer.mark(stage)
+    timer.observe()
+
+
+def marks_observe_and_header():
+    timer = StageTimer("bench")
+    for stage in STAGES:
+        timer.mark(stage)
+    timer.observe()
+    timer.server_timing()
+
+
+def per_call_us(fn, n):
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(args):
+    baseline = per_call_us(bare, args.requests)
+    print(f"{'variant':28s} {'us/request':>11s} {'over bare':>10s}")
+    for fn in (bare, marks_only, marks_and_observe, marks_observe_and_header):
+        cost = per_call_us(fn, args.requests)
+        print(f"{fn.__name__:28s} {cost:11.2f} {cost - baseline:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100000)
+    main(parser.parse_args())
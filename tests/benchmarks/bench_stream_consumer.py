@@ -0,0 +1,84 @@
+"""
+Stream consumer throughput, in events per second per core.
+
+    python -m tests.benchmarks.bench_stream_consumer
+
+Writes `--events` applications to an NDJSON file and consumes them through
+the file-tail source with a constant in-memory feature service and a
+logistic regression on the serving features, so the numbers cover the
+consumer's own overhead: parsing, feature assembly, scoring, the fsynced
+sink write and the checkpoint.
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from src.serving.feature_assembly import EXPECTED_COLUMNS
+from src.serving.stream_consumer import Checkpoint, FileSink, FileTailSource, StreamConsumer
+
+
+class ConstantFeatureService:
+    def get_online_features_batch(self, entity_ids):
+        return [{"EXT_SOURCE_1": 0.5, "EXT_SOURCE_2": 0.4, "DAYS_BIRTH": -12000} for _ in entity_ids]
+
+
+class Loader:
+    run_id = "bench"
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(500, len(EXPECTED_COLUMNS)))
+        self.model = LogisticRegression().fit(X, X[:, 1] > 0)
+
+    def snapshot(self):
+        return self
+
+    def predict_batch(self, features, bundle=None):
+        probabilities = self.model.predict_proba(features)[:, 1]
+        return (probabilities >= 0.5).astype(int), probabilities
+
+    def get_risk_level(self, probability):
+        return "HIGH" if probability >= 0.5 else "LOW"
+
+
+def run(n_events, batch_size, workdir):
+    events_path = os.path.join(workdir, f"events-{batch_size}.ndjson")
+    with open(events_path, "w") as f:
+        for entity_id in range(n_events):
+            f.write(json.dumps({"SK_ID_CURR": entity_id, "AMT_CREDIT": 250000.0, "AMT_GOODS_PRICE": 225000.0}) + "\n")
+
+    checkpoint = Checkpoint(os.path.join(workdir, f"checkpoint-{batch_size}.json"))
+    consumer = StreamConsumer(
+        source=FileTailSource(events_path),
+        sink=FileSink(os.path.join(workdir, f"decisions-{batch_size}.ndjson")),
+        checkpoint=checkpoint,
+        feature_service=ConstantFeatureService(),
+        model_loader=Loader(),
+        batch_size=batch_size,
+        max_wait_ms=0
+    )
+    consumer.run(max_events=n_events)
+    consumer.sink.close()
+    return consumer
+
+
+def main(args):
+    print(f"{'batch':>6s} {'events/s':>10s} {'events/CPU-s':>13s}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for batch_size in args.batch_sizes:
+            consumer = run(args.events, batch_size, workdir)
+            print(
+                f"{batch_size:6d} {consumer.events_processed / consumer.wall_seconds:10.0f} "
+                f"{consumer.events_processed / consumer.cpu_seconds:13.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256, 1024])
+    main(parser.parse_args())
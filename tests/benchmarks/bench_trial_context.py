@@ -0,0 +1,82 @@
+"""
+Per-trial cost of a tuning study: preparing data every trial or once.
+
+    python -m tests.benchmarks.bench_trial_context [--rows 100000] [--trials 5]
+
+Writes a synthetic training table and runs the same trial parameters
+through the previous objective body (load the table, preprocess_data,
+XGBClassifier.fit) and through one shared TrialContext, which prepares the
+splits and QuantileDMatrix objects once.
+"""
+import argparse
+import copy
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.data_pipeline.data_pipeline import preprocess_data
+from src.data_pipeline.load_dataset import load_dataset
+from src.training.models import get_model
+from src.tuning.trial_context import TrialContext
+
+
+def previous_trial(data_path, training_config, params):
+    df = load_dataset(filepath=data_path, ext="parquet")
+    trial_config = copy.deepcopy(training_config)
+    trial_config["model"]["xgboost"].update(params)
+    X_train, y_train, X_val, y_val, _, _ = preprocess_data(
+        df, target='label', test_size=0.15, val_size=0.1,
+        standardization=trial_config["training"]["standardization"]
+    )
+    model = get_model(trial_config, xgb_scale_pos_weight=(y_train == 0).sum() / (y_train == 1).sum())
+    model.fit(X_train, y_train)
+    return model.predict_proba(X_val)[:, 1]
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(args.rows, args.columns)).astype(np.float32)
+    df = pd.DataFrame(X, columns=[f"f{i}" for i in range(args.columns)])
+    df["label"] = (X[:, 0] + rng.normal(scale=2, size=args.rows) > 3).astype(np.int8)
+    training_config = {
+        "model": {"name": "xgboost", "xgboost": {"n_estimators": args.n_estimators, "max_depth": 6, "learning_rate": 0.05}},
+        "training": {"standardization": False}
+    }
+    trials = [{"max_depth": int(rng.integers(3, 10)), "subsample": float(rng.uniform(0.6, 1))} for _ in range(args.trials)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "training_dataset.parquet")
+        config_path = os.path.join(workdir, "training_config.yaml")
+        df.to_parquet(data_path)
+        with open(config_path, "w") as f:
+            yaml.safe_dump(training_config, f)
+
+        started = time.perf_counter()
+        for params in trials:
+            previous_trial(data_path, training_config, params)
+        previous = (time.perf_counter() - started) / len(trials)
+
+        started = time.perf_counter()
+        context = TrialContext(data_path=data_path, config_path=config_path)
+        setup = time.perf_counter() - started
+        started = time.perf_counter()
+        for params in trials:
+            context.predict_val(context.trial_config(params))
+        shared = (time.perf_counter() - started) / len(trials)
+
+    print(f"{args.rows} rows x {args.columns} columns, {args.n_estimators} trees, {args.trials} trials")
+    print(f"{'previous':10s} {previous:7.2f}s per trial")
+    print(f"{'shared':10s} {shared:7.2f}s per trial (+{setup:.2f}s once)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.monitoring.metrics_exporter import registry
+from src.serving.audit_log import AuditLogSink
+
+COLUMNS = ["SK_ID_CURR", "age_years", "EXT_SOURCE_1"]
+
+
+def submit_rows(sink, ids, endpoint="predict"):
+    features = np.array([[i, 30.0 + i, 0.5] for i in ids])
+    return sink.submit(
+        endpoint, [{"SK_ID_CURR": i, "AMT_CREDIT": 1000.0} for i in ids], features,
+        probabilities=[i / 100 for i in ids], predictions=[int(i >= 50) for i in ids],
+        threshold=0.5, model_run_id="run-1"
+    )
+
+
+def complete_files(log_dir):
+    return glob.glob(os.path.join(log_dir, "date=*", "*.parquet"))
+
+
+def test_rows_survive_graceful_shutdown(tmp_path):
+    sink = AuditLogSink(str(tmp_path), COLUMNS, flush_interval_seconds=60)
+    sink.start()
+    submit_rows(sink, range(10))
+    submit_rows(sink, range(60, 65), endpoint="predict_batch")
+    sink.stop()
+
+    df = pd.read_parquet(str(tmp_path)).sort_values("SK_ID_CURR")
+    assert df["SK_ID_CURR"].tolist() == list(range(10)) + list(range(60, 65))
+    assert df["age_years"].tolist() == [30.0 + i for i in df["SK_ID_CURR"]]
+    assert df["prediction"].tolist() == [0] * 10 + [1] * 5
+    assert set(df["endpoint"]) == {"predict", "predict_batch"}
+    assert set(df["model_run_id"]) == {"run-1"}
+    assert (df["threshold"] == 0.5).all()
+    assert df["request_json"].iloc[0] == '{"SK_ID_CURR": 0, "AMT_CREDIT": 1000.0}'
+    assert "date" in df.columns
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_size_trigger_flushes_but_open_file_stays_hidden(tmp_path):
+    sink = AuditLogSink(str(tmp_path), COLUMNS, flush_rows=5, flush_interval_seconds=60)
+    sink.start()
+    submit_rows(sink, range(5))
+
+    assert wait_for(lambda: glob.glob(os.path.join(str(tmp_path), "date=*", ".*.inprogress")))
+    assert complete_files(str(tmp_path)) == []
+
+    sink.stop()
+    assert len(complete_files(str(tmp_path))) == 1
+
+
+def test_files_rotate_by_size(tmp_path):
+    sink = AuditLogSink(str(tmp_path), COLUMNS, flush_rows=3, flush_interval_seconds=60, rotate_bytes=1)
+    sink.start()
+    submit_rows(sink, range(3))
+    assert wait_for(lambda: len(complete_files(str(tmp_path))) == 1)
+    submit_rows(sink, range(3, 6))
+    sink.stop()
+
+    assert len(complete_files(str(tmp_path))) == 2
+    assert len(pd.read_parquet(str(tmp_path))) == 6
+
+
+def test_full_buffer_drops_and_counts(tmp_path):
+    def dropped():
+        return registry.get_sample_value("audit_records_total", {"outcome": "dropped"}) or 0.0
+
+    before = dropped()
+    sink = AuditLogSink(str(tmp_path), COLUMNS, max_buffered_rows=8)
+    assert submit_rows(sink, range(6))
+    assert not submit_rows(sink, range(6, 10))
+    assert dropped() == before + 4
+
+    sink.start()
+    sink.stop()
+    assert len(pd.read_parquet(str(tmp_path))) == 6
@@ -0,0 +1,146 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from feature_store.build_features import build_full, build_incremental, engineer_features, materialize
+
+
+@pytest.fixture
+def raw(tmp_path):
+    n_rows = 50
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "SK_ID_CURR": np.arange(100000, 100000 + n_rows),
+        "AMT_CREDIT": rng.uniform(1e5, 1e6, n_rows).round(1),
+        "AMT_INCOME_TOTAL": rng.uniform(5e4, 5e5, n_rows).round(1),
+        "AMT_ANNUITY": rng.uniform(1e4, 5e4, n_rows).round(1),
+        "AMT_GOODS_PRICE": rng.uniform(1e5, 1e6, n_rows).round(1),
+        "DAYS_BIRTH": rng.integers(-25000, -7000, n_rows),
+        "DAYS_EMPLOYED": rng.integers(-10000, 0, n_rows),
+        "CNT_FAM_MEMBERS": rng.integers(1, 5, n_rows).astype(float),
+        "EXT_SOURCE_1": np.where(np.arange(n_rows) < 20, np.nan, rng.uniform(0, 1, n_rows)),
+        "EXT_SOURCE_2": rng.uniform(0, 1, n_rows),
+        "EXT_SOURCE_3": rng.uniform(0, 1, n_rows),
+        "FLAG_OWN_CAR": np.where(np.arange(n_rows) < 20, None, "Y"),
+        "FLAG_OWN_REALTY": rng.choice(["Y", "N"], n_rows),
+        "NAME_CONTRACT_TYPE": "Cash loans"
+    })
+    paths = {
+        "raw_path": str(tmp_path / "raw.csv"),
+        "output_path": str(tmp_path / "customer_features"),
+        "state_path": str(tmp_path / "state")
+    }
+    df.to_csv(paths["raw_path"], index=False)
+    return df, paths
+
+
+def latest(output_path):
+    table = pd.read_parquet(output_path)
+    return table.sort_values("event_timestamp", kind="stable").drop_duplicates("SK_ID_CURR", keep="last")
+
+
+def test_full_build_streams_chunks_into_one_file(raw):
+    df, paths = raw
+
+    stats = build_full(**paths, chunk_rows=16)
+
+    files = glob.glob(f"{paths['output_path']}/date=*/*.parquet")
+    assert len(files) == 1
+    metadata = pq.ParquetFile(files[0]).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [16, 16, 16, 2]
+    assert stats["rows_written"] == len(df)
+
+    expected = engineer_features(df).set_index("SK_ID_CURR")
+    written = pd.read_parquet(files[0]).set_index("SK_ID_CURR")[expected.columns]
+    pd.testing.assert_frame_equal(written, expected)
+
+
+def test_failed_full_build_keeps_the_previous_table(raw, monkeypatch):
+    df, paths = raw
+    build_full(**paths)
+    before = pd.read_parquet(paths["output_path"])
+
+    def failing(chunk):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr("feature_store.build_features.engineer_features", failing)
+    with pytest.raises(RuntimeError):
+        build_full(**paths, chunk_rows=16)
+
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["output_path"]), before)
+    assert sorted(os.listdir(os.path.dirname(paths["output_path"]))) == ["customer_features", "raw.csv", "state"]
+
+
+def test_unchanged_input_writes_nothing(raw):
+    df, paths = raw
+    build_full(**paths)
+
+    # Small chunks make pandas infer different dtypes per chunk
+    stats = build_incremental(**paths, chunk_rows=7)
+
+    assert stats["rows_scanned"] == len(df)
+    assert stats["rows_written"] == 0
+
+
+def test_only_new_and_changed_applicants_are_appended(raw):
+    df, paths = raw
+    first = build_full(**paths)
+
+    df.loc[3, "AMT_CREDIT"] += 1000
+    df.loc[30, "FLAG_OWN_CAR"] = "N"
+    new_row = df.iloc[[10]].assign(SK_ID_CURR=200000)
+    df = pd.concat([df, new_row], ignore_index=True)
+    df.to_csv(paths["raw_path"], index=False)
+
+    stats = build_incremental(**paths, chunk_rows=16)
+
+    assert stats["rows_written"] == 3
+    assert stats["high_water_mark"] > first["high_water_mark"]
+
+    table = pd.read_parquet(paths["output_path"])
+    delta = table[table["event_timestamp"] > first["high_water_mark"]]
+    assert sorted(delta["SK_ID_CURR"]) == [100003, 100030, 200000]
+
+    expected = engineer_features(df).set_index("SK_ID_CURR").sort_index()
+    current = latest(paths["output_path"]).set_index("SK_ID_CURR").sort_index()[expected.columns]
+    pd.testing.assert_frame_equal(current, expected, check_dtype=False)
+
+    assert build_incremental(**paths)["rows_written"] == 0
+
+
+def test_source_timestamps_before_the_mark_are_moved_forward(raw):
+    df, paths = raw
+    df["updated_at"] = "2024-01-01T00:00:00Z"
+    df.to_csv(paths["raw_path"], index=False)
+    first = build_full(**paths, timestamp_column="updated_at")
+    assert first["high_water_mark"] == pd.Timestamp("2024-01-01", tz="UTC")
+
+    df.loc[0, "AMT_CREDIT"] += 1
+    df.loc[1, ["AMT_CREDIT", "updated_at"]] = [df.loc[1, "AMT_CREDIT"] + 1, "2025-06-01T00:00:00Z"]
+    df.to_csv(paths["raw_path"], index=False)
+    build_incremental(**paths, timestamp_column="updated_at")
+
+    current = latest(paths["output_path"]).set_index("SK_ID_CURR")["event_timestamp"]
+    assert current[100001] == pd.Timestamp("2025-06-01", tz="UTC")
+    assert current[100000] > pd.Timestamp("2025-06-01", tz="UTC")
+    assert current[100002] == pd.Timestamp("2024-01-01", tz="UTC")
+
+
+def test_materialize_is_incremental_up_to_the_mark(monkeypatch):
+    calls = []
+
+    class FakeStore:
+        def __init__(self, repo_path):
+            pass
+
+        def materialize_incremental(self, end_date, feature_views):
+            calls.append((end_date, feature_views))
+
+    monkeypatch.setattr("feast.FeatureStore", FakeStore)
+    materialize(pd.Timestamp("2026-01-01", tz="UTC"))
+
+    assert calls == [(pd.Timestamp("2026-01-01", tz="UTC").to_pydatetime(), ["applicant_risk_features"])]
@@ -0,0 +1,121 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.serving import bulk_score as module
+from src.serving.bulk_score import bulk_score, load_offline_features
+from src.serving.feature_assembly import build_feature_matrix, merge_features
+
+
+class FakeLoader:
+    run_id = "champion"
+    model = None
+
+    @property
+    def bundle(self):
+        return self
+
+    def snapshot(self):
+        return self
+
+    def predict_batch(self, features, bundle=None):
+        probabilities = 1 / (1 + np.exp(-features[:, 1:].sum(axis=1) / 10))
+        return (probabilities >= 0.5).astype(int), probabilities
+
+    def get_risk_level(self, probability):
+        return "high" if probability >= 0.5 else "low"
+
+
+@pytest.fixture
+def tables(tmp_path):
+    rng = np.random.default_rng(0)
+    n_rows = 1000
+    ids = np.arange(100000, 100000 + n_rows)
+
+    features = pd.DataFrame({
+        "SK_ID_CURR": np.concatenate([ids, ids[:10]]),
+        "age_years": rng.uniform(20, 60, n_rows + 10),
+        "years_employed": rng.uniform(0, 20, n_rows + 10),
+        "ext_source_mean": rng.uniform(-5, 5, n_rows + 10),
+        "flag_own_car": rng.integers(0, 2, n_rows + 10),
+        "event_timestamp": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(n_rows + 10), unit="s")
+    })
+    features.to_parquet(tmp_path / "features.parquet", row_group_size=300)
+
+    applications = pd.DataFrame({
+        "SK_ID_CURR": ids,
+        "AMT_CREDIT": rng.choice([0.0, 1000.0, 250000.0, np.nan], n_rows, p=[0.01, 0.49, 0.4, 0.1]),
+        "age_years": np.where(rng.random(n_rows) < 0.5, np.nan, 35.0),
+        "AMT_GOODS_PRICE": rng.uniform(0, 1000, n_rows)
+    })
+    applications.to_parquet(tmp_path / "applications.parquet", row_group_size=128)
+
+    return tmp_path, features, applications
+
+
+def expected_probabilities(features, applications):
+    online = features.sort_values("event_timestamp").drop_duplicates("SK_ID_CURR", keep="last").set_index("SK_ID_CURR")
+    online = online.drop(columns="event_timestamp")
+    probabilities = {}
+    for request in applications.to_dict("records"):
+        request = {k: v for k, v in request.items() if k in ("SK_ID_CURR", "AMT_CREDIT", "age_years") and pd.notna(v)}
+        feast = {k: float(np.float32(v)) for k, v in online.loc[request["SK_ID_CURR"]].items()}
+        _, probability = FakeLoader().predict_batch(build_feature_matrix([merge_features(request, feast)]))
+        probabilities[request["SK_ID_CURR"]] = probability[0]
+    return probabilities
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_bulk_scores_match_online_path(tables, workers):
+    tmp_path, features, applications = tables
+
+    stats = bulk_score(
+        str(tmp_path / "applications.parquet"), str(tmp_path / "scored"), FakeLoader(),
+        load_offline_features(str(tmp_path / "features.parquet")), chunk_rows=100, workers=workers
+    )
+
+    scored = pd.read_parquet(tmp_path / "scored").set_index("SK_ID_CURR").sort_index()
+    assert stats["rows"] == len(applications)
+    assert len(scored) == len(applications)
+
+    expected = expected_probabilities(features, applications)
+    np.testing.assert_array_equal(scored["probability"].to_numpy(), [expected[i] for i in scored.index])
+    assert (scored["risk_level"] == np.where(scored["probability"] >= 0.5, "high", "low")).all()
+    assert set(scored["model_run_id"]) == {"champion"}
+
+
+def test_missing_join_key_is_rejected(tmp_path):
+    pd.DataFrame({"AMT_CREDIT": [1.0]}).to_parquet(tmp_path / "applications.parquet")
+
+    with pytest.raises(ValueError):
+        bulk_score(str(tmp_path / "applications.parquet"), str(tmp_path / "scored"), FakeLoader(), pd.DataFrame())
+
+
+def test_rerun_replaces_the_previous_output(tables):
+    tmp_path, features, applications = tables
+    offline = load_offline_features(str(tmp_path / "features.parquet"))
+    bulk_score(str(tmp_path / "applications.parquet"), str(tmp_path / "scored"), FakeLoader(), offline, chunk_rows=100)
+
+    applications.head(150).to_parquet(tmp_path / "smaller.parquet")
+    bulk_score(str(tmp_path / "smaller.parquet"), str(tmp_path / "scored"), FakeLoader(), offline, chunk_rows=100)
+
+    assert len(pd.read_parquet(tmp_path / "scored")) == 150
+    assert sorted(os.listdir(tmp_path)) == ["applications.parquet", "features.parquet", "scored", "smaller.parquet"]
+
+
+def test_workers_are_limited_to_their_share_of_threads(monkeypatch):
+    from xgboost import XGBClassifier
+
+    X = np.random.default_rng(0).normal(size=(50, 3))
+    model = XGBClassifier(n_estimators=2).fit(X, X[:, 0] > 0)
+    loader = FakeLoader()
+    loader.model = model
+    monkeypatch.setitem(module._state, "model_loader", loader)
+
+    module._limit_threads(2)
+
+    assert model.n_jobs == 2
+    assert json.loads(model.get_booster().save_config())["learner"]["generic_param"]["nthread"] == "2"
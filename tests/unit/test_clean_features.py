@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from src.data_pipeline.clean_features import (
+    find_collinear_columns,
+    find_duplicate_columns,
+    find_near_constant_columns
+)
+
+
+def pairwise_duplicates(df):
+    """The pairwise Series.equals scan the hashing replaced."""
+    groups, checked = {}, set()
+    columns = list(df.columns)
+    for i, col1 in enumerate(columns):
+        if col1 in checked:
+            continue
+        duplicates = [col1] + [col2 for col2 in columns[i + 1:] if col2 not in checked and df[col1].equals(df[col2])]
+        if len(duplicates) > 1:
+            groups[col1] = duplicates
+            checked.update(duplicates)
+    return groups
+
+
+def test_duplicates_match_pairwise_scan():
+    rng = np.random.default_rng(0)
+    n_rows = 500
+    base = rng.normal(size=n_rows)
+    base[::7] = np.nan
+    df = pd.DataFrame({
+        "a": base,
+        "b": rng.normal(size=n_rows),
+        "a_copy": base.copy(),
+        "a_float32": base.astype(np.float32),
+        "flag": rng.integers(0, 2, n_rows).astype(np.int8),
+        "a_copy_2": base.copy(),
+        "flag_int64": None,
+        "flag_copy": None,
+        "city": rng.choice(["x", "y"], n_rows),
+        "city_copy": None,
+        "zero": np.zeros(n_rows),
+        "negative_zero": -np.zeros(n_rows)
+    })
+    df["flag_int64"] = df["flag"].astype(np.int64)
+    df["flag_copy"] = df["flag"].copy()
+    df["city_copy"] = df["city"].copy()
+    # Same values as `base` but a different NaN payload
+    df["a_other_nan"] = np.where(np.isnan(base), -np.float64("nan"), base)
+
+    groups = find_duplicate_columns(df, block_columns=2)
+
+    assert groups == pairwise_duplicates(df)
+    assert groups == {
+        "a": ["a", "a_copy", "a_copy_2", "a_other_nan"],
+        "flag": ["flag", "flag_copy"],
+        "city": ["city", "city_copy"],
+        "zero": ["zero", "negative_zero"]
+    }
+
+
+def test_near_constant_columns():
+    n_rows = 1000
+    df = pd.DataFrame({
+        "varied": np.arange(n_rows, dtype=float),
+        "mostly_zero": np.where(np.arange(n_rows) < 2, 1, 0),
+        "mostly_nan": np.where(np.arange(n_rows) < 1, 1.0, np.nan),
+        "constant_text": ["Y"] * n_rows,
+        "half": np.arange(n_rows) % 2
+    })
+
+    assert find_near_constant_columns(df, threshold=0.995) == {
+        "mostly_zero": 0.998, "mostly_nan": 0.999, "constant_text": 1.0
+    }
+
+
+def test_collinear_columns():
+    rng = np.random.default_rng(1)
+    n_rows = 2000
+    x = rng.normal(size=n_rows)
+    gappy = np.where(np.arange(n_rows) % 3 == 0, np.nan, rng.normal(size=n_rows))
+    df = pd.DataFrame({
+        "x": x,
+        "independent": rng.normal(size=n_rows),
+        "x_scaled": 3 * x + 1,
+        "x_negated": -x + rng.normal(scale=0.01, size=n_rows),
+        "x_noisy": x + rng.normal(scale=1.0, size=n_rows),
+        "constant": 1.0,
+        "text": "a",
+        "gappy": gappy,
+        "gappy_copy": gappy
+    })
+
+    assert find_collinear_columns(df, threshold=0.98) == {
+        "x": ["x", "x_scaled", "x_negated"], "gappy": ["gappy", "gappy_copy"]
+    }
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+from src.serving.compiled_predictor import (
+    CompiledTreeEnsemble,
+    InplacePredictor,
+    SizeDispatchPredictor,
+    build_predictor
+)
+
+TOLERANCE = 1e-6
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(3000, 21)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] - 0.5 * X[:, 3] > 0.3).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def model(data):
+    X, y = data
+    return XGBClassifier(n_estimators=60, max_depth=5, learning_rate=0.1, tree_method="hist",
+                         scale_pos_weight=3, random_state=42).fit(X, y)
+
+
+@pytest.mark.parametrize("mode", ["inplace", "compiled"])
+def test_matches_predict_proba(data, model, mode):
+    X, _ = data
+    reference = model.predict_proba(X)[:, 1]
+
+    predictor = build_predictor(model, mode)
+
+    np.testing.assert_allclose(predictor(X), reference, atol=TOLERANCE)
+    for row in X[:50]:
+        np.testing.assert_allclose(predictor(row.reshape(1, -1)), model.predict_proba(row.reshape(1, -1))[:, 1],
+                                   atol=TOLERANCE)
+
+
+def test_compiled_ensemble_alone_matches_on_large_batches(data, model):
+    X, _ = data
+    compiled = CompiledTreeEnsemble.from_booster(model.get_booster())
+
+    np.testing.assert_allclose(compiled(X), model.predict_proba(X)[:, 1], atol=TOLERANCE)
+
+
+def test_respects_best_iteration(data):
+    X, y = data
+    model = XGBClassifier(n_estimators=200, max_depth=3, early_stopping_rounds=3, eval_metric="logloss")
+    model.fit(X[:2000], y[:2000], eval_set=[(X[2000:], y[2000:])], verbose=False)
+    assert model.best_iteration < 199
+
+    compiled = build_predictor(model, "compiled").compiled
+
+    np.testing.assert_allclose(compiled(X), model.predict_proba(X)[:, 1], atol=TOLERANCE)
+
+
+def test_mode_selection(model):
+    assert build_predictor(model, "sklearn") is None
+    assert isinstance(build_predictor(model, "inplace"), InplacePredictor)
+    assert isinstance(build_predictor(model, "compiled"), SizeDispatchPredictor)
+    assert build_predictor(LogisticRegression(), "compiled") is None
+    with pytest.raises(ValueError):
+        build_predictor(model, "onnx")
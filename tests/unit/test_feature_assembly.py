@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from src.serving.feature_assembly import (
+    EXPECTED_COLUMNS,
+    FeatureVectorBuilder,
+    merge_features,
+    merge_feature_frames,
+    build_feature_matrix,
+    frame_to_feature_matrix
+)
+
+
+def legacy_feature_row(merged_features):
+    """Per-request pandas path previously used in app.predict."""
+    features_df = pd.DataFrame([merged_features])
+
+    for col in EXPECTED_COLUMNS:
+        if col not in features_df.columns:
+            features_df[col] = np.nan
+
+    features_df = features_df[EXPECTED_COLUMNS]
+
+    for col in features_df.columns:
+        features_df[col] = pd.to_numeric(features_df[col], errors='coerce')
+
+    features_df = features_df.fillna(0)
+
+    return features_df.to_numpy(dtype=np.float64)[0]
+
+
+SAMPLE_ROWS = [
+    ({"SK_ID_CURR": 100002, "AMT_CREDIT": 406597.5, "AMT_GOODS_PRICE": 351000.0},
+     {"age_years": 25.9, "ext_source_mean": 0.16, "years_employed": None}),
+    ({"SK_ID_CURR": 100003, "age_years": 41.0},
+     {}),
+    ({"SK_ID_CURR": 100004, "AMT_CREDIT": 135000.0, "ext_source_mean": None},
+     {"EXT_SOURCE_2": "0.62", "DAYS_BIRTH": "not-a-number", "FLAG_DOCUMENT_3": 1}),
+    ({"SK_ID_CURR": 100005, "AMT_CREDIT": 3.0, "AMT_GOODS_PRICE": 1.0},
+     {"age_years": np.float32(33.3), "years_employed": float("nan"), "EXT_SOURCE_1": float("inf"),
+      "DAYS_EMPLOYED": np.int64(-4542), "is_male": True, "EXT_SOURCE_3": " 1e-3 "}),
+]
+
+
+def test_merge_features_request_values_win():
+    merged = merge_features({"SK_ID_CURR": 1, "age_years": 40.0, "AMT_CREDIT": 2.0},
+                            {"age_years": 30.0, "ext_source_1": 0.5})
+
+    assert merged["age_years"] == 40.0
+    assert merged["ext_source_1"] == 0.5
+    assert np.isnan(merged["goods_price_to_credit_ratio"])
+    assert merged["ext_sources_sum"] == 0.5
+
+
+def test_request_time_features_fall_back_to_feast_values():
+    feast = {"goods_price_to_credit_ratio": 0.8}
+
+    assert merge_features({"SK_ID_CURR": 1}, feast)["goods_price_to_credit_ratio"] == 0.8
+    assert merge_features({"SK_ID_CURR": 1, "AMT_CREDIT": 0.0, "AMT_GOODS_PRICE": 5.0}, feast)["goods_price_to_credit_ratio"] == 0.8
+    assert merge_features({"SK_ID_CURR": 1, "AMT_CREDIT": 10.0, "AMT_GOODS_PRICE": 5.0}, feast)["goods_price_to_credit_ratio"] == 0.5
+
+
+def test_batch_matrix_matches_per_row_path():
+    records = [merge_features(request, feast) for request, feast in SAMPLE_ROWS]
+
+    matrix = build_feature_matrix(records)
+
+    assert matrix.shape == (len(SAMPLE_ROWS), len(EXPECTED_COLUMNS))
+    for row, record in zip(matrix, records):
+        np.testing.assert_array_equal(row, legacy_feature_row(record))
+
+
+def test_frame_merge_matches_per_row_path():
+    requests = pd.DataFrame.from_records([request for request, _ in SAMPLE_ROWS])
+    feast = pd.DataFrame.from_records(
+        [feast for _, feast in SAMPLE_ROWS], index=[request["SK_ID_CURR"] for request, _ in SAMPLE_ROWS]
+    )
+    feast = feast.drop(index=100003)
+
+    matrix = frame_to_feature_matrix(merge_feature_frames(requests, feast))
+
+    expected = build_feature_matrix([merge_features(request, feast) for request, feast in SAMPLE_ROWS])
+    np.testing.assert_array_equal(matrix, expected)
+
+
+def test_empty_batch():
+    assert build_feature_matrix([]).shape == (0, len(EXPECTED_COLUMNS))
+
+
+def test_vector_builder_is_byte_identical_to_pandas_path():
+    builder = FeatureVectorBuilder(EXPECTED_COLUMNS)
+
+    for request, feast in SAMPLE_ROWS:
+        merged = merge_features(request, feast)
+        expected = legacy_feature_row(merged)
+
+        row = builder.build(merged)
+
+        assert row.dtype == np.float64
+        assert row.tobytes() == expected.tobytes()
+        assert builder.to_dict(row) == dict(zip(EXPECTED_COLUMNS, expected.tolist()))
+
+
+def test_float32_builder_matches_cast_pandas_path():
+    builder = FeatureVectorBuilder(EXPECTED_COLUMNS, dtype=np.float32)
+    records = [merge_features(request, feast) for request, feast in SAMPLE_ROWS]
+
+    matrix = builder.build_matrix(records)
+
+    expected = np.vstack([legacy_feature_row(record) for record in records]).astype(np.float32)
+    assert matrix.dtype == np.float32
+    assert matrix.tobytes() == expected.tobytes()
@@ -0,0 +1,122 @@
+from datetime import datetime
+
+from src.serving.feature_cache import FeatureCache
+from src.serving.feature_service import FeatureService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def to_dict(self):
+        return self.data
+
+
+class FakeFeatureView:
+    def __init__(self, end_time):
+        self.most_recent_end_time = end_time
+
+
+class FakeStore:
+    """Stands in for the Feast online store and counts every round trip."""
+
+    def __init__(self):
+        self.requested = []
+        self.materialized_until = datetime(2026, 1, 1)
+
+    def get_online_features(self, features, entity_rows):
+        ids = [row["SK_ID_CURR"] for row in entity_rows]
+        self.requested.append(ids)
+        data = {"SK_ID_CURR": ids}
+        for ref in features:
+            data[ref.split(":")[-1]] = [float(entity_id) for entity_id in ids]
+        return FakeResponse(data)
+
+    def get_feature_view(self, name):
+        return FakeFeatureView(self.materialized_until)
+
+
+def make_service(cache, watermark_check_seconds=None):
+    return FeatureService(repo_path=None, store=FakeStore(), cache=cache,
+                          watermark_check_seconds=watermark_check_seconds)
+
+
+def test_cache_hits_never_touch_the_store():
+    service = make_service(FeatureCache())
+
+    first = service.get_online_features_batch([1, 2])
+    second = service.get_online_features_batch([2, 1, 3])
+
+    assert service.store.requested == [[1, 2], [3]]
+    assert second[0] == first[1] and second[1] == first[0]
+    assert second[2]["age_years"] == 3.0
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    service = make_service(FeatureCache(ttl_seconds=10, clock=clock))
+
+    service.get_online_features(1)
+    clock.now = 9.0
+    service.get_online_features(1)
+    clock.now = 10.0
+    service.get_online_features(1)
+
+    assert service.store.requested == [[1], [1]]
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = FeatureCache(max_entries=2)
+    for entity_id in (1, 2, 3):
+        cache.put(entity_id, {"age_years": float(entity_id)})
+    assert cache.get(1) is None and len(cache) == 2
+
+    cache.get(2)
+    cache.put(4, {"age_years": 4.0})
+    assert cache.get(3) is None and cache.get(2) is not None
+
+    one_entry = cache.size_bytes // len(cache)
+    small = FeatureCache(max_bytes=one_entry * 3)
+    for entity_id in range(10):
+        small.put(entity_id, {"age_years": float(entity_id)})
+    assert len(small) == 3 and small.size_bytes <= one_entry * 3
+
+
+def test_explicit_invalidation():
+    service = make_service(FeatureCache())
+    service.get_online_features_batch([1, 2, 3])
+
+    assert service.invalidate_cache([2, 99]) == 1
+    service.get_online_features_batch([1, 2, 3])
+    assert service.store.requested[-1] == [2]
+
+    assert service.invalidate_cache() == 3
+    service.get_online_features_batch([1, 2, 3])
+    assert service.store.requested[-1] == [1, 2, 3]
+
+
+def test_new_materialization_clears_the_cache():
+    service = make_service(FeatureCache(), watermark_check_seconds=0)
+    service.get_online_features(1)
+    service.get_online_features(1)
+    assert len(service.store.requested) == 1
+
+    service.store.materialized_until = datetime(2026, 1, 2)
+    service.get_online_features(1)
+    assert len(service.store.requested) == 2
+
+
+def test_failed_lookups_are_not_cached():
+    service = make_service(FeatureCache())
+    service.store.get_online_features = lambda features, entity_rows: 1 / 0
+
+    assert service.get_online_features(1) == {}
+    assert len(service.cache) == 0
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from src.data_pipeline.feature_definitions import (
+    FEATURE_VIEW_FEATURES,
+    REGISTRY,
+    REQUEST_TIME_FEATURES,
+    TRAINING_FEATURES,
+    compute_frame,
+    compute_row
+)
+
+RAW = pd.DataFrame({
+    "SK_ID_CURR": [1, 2, 3, 4],
+    "AMT_CREDIT": [406597.5, 0.0, 135000.0, np.nan],
+    "AMT_INCOME_TOTAL": [202500.0, 270000.0, 0.0, 67500.0],
+    "AMT_ANNUITY": [24700.5, 35698.5, 6750.0, 0.0],
+    "AMT_GOODS_PRICE": [351000.0, 1129500.0, np.nan, 297000.0],
+    "DAYS_BIRTH": [-9461, -16765, -19046, -19005],
+    "DAYS_EMPLOYED": [-637, 365243, -225, -3039],
+    "CNT_FAM_MEMBERS": [1.0, 2.0, 0.0, np.nan],
+    "CNT_CHILDREN": [0, 1, 0, 2],
+    "EXT_SOURCE_1": [0.083, np.nan, np.nan, 0.5],
+    "EXT_SOURCE_2": [0.263, 0.622, np.nan, 0.65],
+    "EXT_SOURCE_3": [0.139, np.nan, np.nan, 0.729],
+    "FLAG_OWN_CAR": ["N", "Y", "Y", None],
+    "FLAG_OWN_REALTY": ["Y", "N", "Y", "Y"],
+    "CODE_GENDER": ["M", "F", "M", "XNA"],
+    "NAME_CONTRACT_TYPE": ["Cash loans", "Cash loans", "Revolving loans", "Cash loans"]
+})
+
+
+def pandas_features(df):
+    """The per-column pandas code the definitions replaced, with inf as NaN."""
+    features = pd.DataFrame(index=df.index)
+    features['credit_to_income_ratio'] = df['AMT_CREDIT'] / df['AMT_INCOME_TOTAL']
+    features['annuity_to_income_ratio'] = df['AMT_ANNUITY'] / df['AMT_INCOME_TOTAL']
+    features['credit_term_approx'] = df['AMT_CREDIT'] / df['AMT_ANNUITY']
+    features['goods_price_to_credit_ratio'] = df['AMT_GOODS_PRICE'] / df['AMT_CREDIT']
+    features['age_years'] = df['DAYS_BIRTH'] / -365.25
+    features['years_employed'] = df['DAYS_EMPLOYED'].replace(365243, np.nan) / -365.25
+    features['employed_to_age_ratio'] = features['years_employed'] / features['age_years']
+    features['income_per_person'] = df['AMT_INCOME_TOTAL'] / df['CNT_FAM_MEMBERS']
+    features['ext_source_1'] = df['EXT_SOURCE_1']
+    features['ext_source_2'] = df['EXT_SOURCE_2']
+    features['ext_source_3'] = df['EXT_SOURCE_3']
+    features['ext_source_mean'] = df[['EXT_SOURCE_1', 'EXT_SOURCE_2', 'EXT_SOURCE_3']].mean(axis=1)
+    features['flag_own_car'] = df['FLAG_OWN_CAR'].apply(lambda x: 1 if x == 'Y' else 0)
+    features['flag_own_realty'] = df['FLAG_OWN_REALTY'].apply(lambda x: 1 if x == 'Y' else 0)
+    return features.replace([np.inf, -np.inf], np.nan)
+
+
+def test_frame_matches_previous_feature_store_code():
+    pd.testing.assert_frame_equal(compute_frame(RAW, FEATURE_VIEW_FEATURES), pandas_features(RAW))
+
+
+def test_training_features_on_joined_frame():
+    joined = pd.concat([RAW, compute_frame(RAW, FEATURE_VIEW_FEATURES)], axis=1)
+
+    derived = compute_frame(joined, TRAINING_FEATURES)
+
+    assert derived["is_male"].tolist() == [1, 0, 1, 0]
+    assert derived["is_cash_loan"].tolist() == [1, 1, 0, 1]
+    np.testing.assert_array_equal(derived["children_ratio"], [0.0, 0.5, np.nan, np.nan])
+    np.testing.assert_array_equal(
+        derived["ext_sources_sum"], joined[["ext_source_1", "ext_source_2", "ext_source_3"]].sum(axis=1)
+    )
+
+
+def test_row_kernels_match_frame_kernels():
+    names = list(REGISTRY)
+    frame = compute_frame(RAW, names).to_numpy(dtype=np.float64)
+
+    out = np.empty(len(names))
+    for i, record in enumerate(RAW.to_dict("records")):
+        row = compute_row(record, names, out=out)
+        assert row is out
+        np.testing.assert_array_equal(row, frame[i])
+
+
+def test_missing_inputs_are_nan():
+    row = compute_row({"SK_ID_CURR": 1, "AMT_CREDIT": "1000", "AMT_GOODS_PRICE": None}, REQUEST_TIME_FEATURES)
+    assert np.isnan(row[0]) and row[1] == 0.0 and np.isnan(row[2])
+
+    frame = compute_frame(pd.DataFrame({"SK_ID_CURR": [1, 2]}), ["age_years", "flag_own_car"])
+    assert frame["age_years"].isna().all() and frame["flag_own_car"].tolist() == [0, 0]
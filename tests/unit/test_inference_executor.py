@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import pytest
+
+from src.serving.inference_executor import InferenceExecutor, ExecutorSaturatedError
+
+
+def test_rejects_fast_when_queue_is_full():
+    release = threading.Event()
+
+    async def main():
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+        try:
+            running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert executor.pending == 2
+
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(sum, [1, 2])
+
+            release.set()
+            await asyncio.gather(*running)
+            assert executor.pending == 0
+            assert await executor.run(sum, [1, 2]) == 3
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_finishes():
+    release = threading.Event()
+
+    async def main():
+        executor = InferenceExecutor(max_workers=1, max_queue_size=0)
+        try:
+            caller = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            caller.cancel()
+            await asyncio.sleep(0.05)
+
+            # The job still occupies the only worker
+            assert executor.pending == 1
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(sum, [1, 2])
+
+            release.set()
+            for _ in range(100):
+                if executor.pending == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert executor.pending == 0
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(main())
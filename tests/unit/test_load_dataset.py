@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data_pipeline.load_dataset import downcast, load_csv_cached, load_dataset, save_dataset
+
+FRAME = pd.DataFrame({
+    "SK_ID_CURR": [100002, 100003, 456255],
+    "label": [1, 0, 0],
+    "CNT_CHILDREN": [0, 19, 2],
+    "AMT_CREDIT": [406597.5, 1293502.5, np.nan],
+    "CODE_GENDER": ["M", "F", "XNA"]
+})
+
+
+def test_downcast_dtypes():
+    compact = downcast(FRAME)
+
+    assert compact.dtypes.astype(str).to_dict() == {
+        "SK_ID_CURR": "int32", "label": "int8", "CNT_CHILDREN": "int8",
+        "AMT_CREDIT": "float32", "CODE_GENDER": "category"
+    }
+    pd.testing.assert_frame_equal(compact, FRAME, check_dtype=False, check_categorical=False)
+
+
+def test_saved_dataset_round_trips_with_projection(tmp_path):
+    path = str(tmp_path / "training" / "dataset.parquet")
+    save_dataset(FRAME, path)
+
+    assert os.listdir(tmp_path / "training") == ["dataset.parquet"]
+    pd.testing.assert_frame_equal(load_dataset(path, ext="parquet"), downcast(FRAME))
+    assert load_dataset(path, ext="parquet", columns=["label"]).columns.tolist() == ["label"]
+
+    save_dataset(FRAME, path, csv=True)
+    assert sorted(os.listdir(tmp_path / "training")) == ["dataset.csv", "dataset.parquet"]
+
+
+def test_csv_cache_is_rebuilt_when_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / "raw.csv")
+    FRAME.to_csv(csv_path, index=False)
+
+    first = load_csv_cached(csv_path, cache_dir=str(tmp_path / "cache"))
+    pd.testing.assert_frame_equal(first, downcast(FRAME))
+
+    # The cache is read as long as it is newer than the CSV
+    cache_path = tmp_path / "cache" / "raw.parquet"
+    cached_at = os.path.getmtime(cache_path)
+    load_csv_cached(csv_path, cache_dir=str(tmp_path / "cache"))
+    assert os.path.getmtime(cache_path) == cached_at
+
+    FRAME.assign(label=[0, 0, 1]).to_csv(csv_path, index=False)
+    os.utime(csv_path, (cached_at + 1, cached_at + 1))
+    assert load_csv_cached(csv_path, ["label"], cache_dir=str(tmp_path / "cache"))["label"].tolist() == [0, 0, 1]
+
+
+def test_excluded_columns_keep_csv_precision(tmp_path):
+    csv_path = str(tmp_path / "raw.csv")
+    FRAME.assign(AMT_ANNUITY=[24700.5, 35698.5, 0.1]).to_csv(csv_path, index=False)
+
+    compact = load_csv_cached(csv_path, cache_dir=str(tmp_path / "cache"))
+    exact = load_csv_cached(csv_path, cache_dir=str(tmp_path / "cache"), exclude=["AMT_ANNUITY"])
+
+    assert compact["AMT_ANNUITY"].dtype == np.float32
+    assert exact["AMT_ANNUITY"].dtype == np.float64 and exact["AMT_ANNUITY"].iloc[2] == 0.1
+    assert exact["AMT_CREDIT"].dtype == np.float32
+    assert len(os.listdir(tmp_path / "cache")) == 2
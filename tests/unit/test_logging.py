@@ -0,0 +1,78 @@
+import json
+import logging
+import queue
+
+from logger import log as log_module
+from logger.log import BatchingLogWriter, DroppingQueueHandler, SamplingFilter, process_log_file_path
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_written_as_json_lines(tmp_path):
+    log_queue = queue.Queue(maxsize=100)
+    handler = DroppingQueueHandler(log_queue)
+    writer = BatchingLogWriter(log_queue, str(tmp_path / "app.log"), handler, batch_size=8, flush_interval_ms=10)
+    logger = make_logger("test.json_lines", handler)
+
+    logger.info("scored %s", {"SK_ID_CURR": 1})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Prediction failed")
+    writer.stop()
+
+    lines = read_lines(tmp_path / "app.log")
+    assert lines[0]["message"] == "scored {'SK_ID_CURR': 1}"
+    assert lines[0]["level"] == "INFO"
+    assert lines[1]["level"] == "ERROR"
+    assert "ValueError: boom" in lines[1]["exception"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    log_queue = queue.Queue(maxsize=5)
+    handler = DroppingQueueHandler(log_queue)
+    logger = make_logger("test.dropping", handler)
+
+    for i in range(20):
+        logger.info("line %d", i)
+    assert handler.dropped == 15
+
+    writer = BatchingLogWriter(log_queue, str(tmp_path / "app.log"), handler, flush_interval_ms=10)
+    writer.stop()
+
+    lines = read_lines(tmp_path / "app.log")
+    assert [line["message"] for line in lines[:5]] == [f"line {i}" for i in range(5)]
+    assert lines[-1]["message"] == "15 log records dropped, queue full"
+
+
+def test_sampling_only_thins_info_of_the_named_logger(monkeypatch):
+    sampling = SamplingFilter("serving.request", 0.25)
+    monkeypatch.setattr("logger.log.random.random", lambda: 0.5)
+
+    def record(name, level):
+        return logging.LogRecord(name, level, __file__, 1, "msg", None, None)
+
+    assert not sampling.filter(record("serving.request", logging.INFO))
+    assert not sampling.filter(record("serving.request.batch", logging.INFO))
+    assert sampling.filter(record("serving.request", logging.ERROR))
+    assert sampling.filter(record("serving.requests", logging.INFO))
+    assert sampling.filter(record("root", logging.INFO))
+
+
+def test_each_process_writes_its_own_log_file(monkeypatch):
+    own = process_log_file_path()
+    monkeypatch.setattr(log_module.os, "getpid", lambda: 12345)
+
+    forked = process_log_file_path()
+    assert forked != own and forked.endswith("_12345.log")
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+WORKER = """
+from src.monitoring.metrics_exporter import track_prediction, track_latency, set_executor_capacity, mark_worker_dead
+for _ in range({n}):
+    track_prediction(is_fraud=False)
+    track_latency(0.003)
+set_executor_capacity(68)
+if {exited}:
+    mark_worker_dead()
+"""
+
+SCRAPE = """
+from src.monitoring.metrics_exporter import get_metrics
+print(get_metrics().body.decode())
+"""
+
+
+def run(code, multiproc_dir):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=multiproc_dir)
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    ).stdout
+
+
+def test_multiprocess_scrape_sums_all_workers(tmp_path):
+    run(WORKER.format(n=3, exited=True), str(tmp_path))
+    run(WORKER.format(n=5, exited=False), str(tmp_path))
+
+    lines = run(SCRAPE, str(tmp_path)).splitlines()
+
+    assert 'predictions_total{result="ok"} 8.0' in lines
+    assert "api_latency_seconds_count 8.0" in lines
+    assert 'api_latency_seconds_bucket{le="0.005"} 8.0' in lines
+    # Counters keep the samples of shut-down workers; live gauges drop them
+    assert "inference_executor_capacity_jobs 68.0" in lines
@@ -0,0 +1,94 @@
+import asyncio
+import numpy as np
+import pytest
+
+from src.serving.micro_batcher import MicroBatcher
+
+
+class RecordingModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, features):
+        self.batch_sizes.append(len(features))
+        probabilities = features[:, 0] / 100
+        return (probabilities >= 0.5).astype(int), probabilities
+
+
+def run_concurrent(batcher, n_requests):
+    async def main():
+        await batcher.start()
+        try:
+            return await asyncio.gather(*[
+                batcher.submit(np.array([float(i), 1.0])) for i in range(n_requests)
+            ])
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_are_coalesced_and_fanned_out():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=16, max_wait_us=50_000)
+
+    results = run_concurrent(batcher, 40)
+
+    assert [probability for _, probability in results] == [i / 100 for i in range(40)]
+    assert sum(model.batch_sizes) == 40
+    assert max(model.batch_sizes) <= 16
+    assert len(model.batch_sizes) < 40
+
+
+def test_model_errors_reach_every_caller():
+    def failing_predict(features):
+        raise ValueError("Model not loaded")
+
+    batcher = MicroBatcher(failing_predict, max_batch_size=8, max_wait_us=1000)
+
+    with pytest.raises(ValueError, match="Model not loaded"):
+        run_concurrent(batcher, 4)
+
+
+def test_stop_fails_queued_and_in_flight_requests():
+    class StuckExecutor:
+        async def run(self, fn, features):
+            await asyncio.Event().wait()
+
+    async def main():
+        batcher = MicroBatcher(RecordingModel().predict_batch, max_batch_size=2, max_wait_us=1000,
+                               executor=StuckExecutor())
+        await batcher.start()
+        callers = [asyncio.ensure_future(batcher.submit(np.array([1.0, 1.0]))) for _ in range(5)]
+        await asyncio.sleep(0.05)
+
+        await batcher.stop()
+
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+
+    results = asyncio.run(main())
+    assert len(results) == 5
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_rows_are_scored_with_the_bundle_they_were_submitted_with():
+    calls = []
+
+    def predict_batch(features, bundle=None):
+        calls.append((bundle, len(features)))
+        probabilities = np.full(len(features), 0.9 if bundle == "challenger" else 0.1)
+        return (probabilities >= 0.5).astype(int), probabilities
+
+    async def main():
+        batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait_us=50_000)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*[
+                batcher.submit(np.array([1.0, 1.0]), "challenger" if i % 2 else "champion") for i in range(6)
+            ])
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(main())
+    assert [prediction for prediction, _ in results] == [0, 1, 0, 1, 0, 1]
+    assert sorted(calls) == [("challenger", 3), ("champion", 3)]
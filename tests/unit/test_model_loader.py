@@ -0,0 +1,245 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.serving import model_loader as model_loader_module
+from src.serving.artifact_cache import ModelArtifactCache
+from src.serving.model_loader import ModelBundle, ModelLoader
+
+
+class FakeMlflow:
+    """Stands in for the mlflow module and counts every tracking server call."""
+
+    def __init__(self, model, run_id="run-1", threshold="0.42"):
+        self.model = model
+        self.run_id = run_id
+        self.threshold = threshold
+        self.fail = False
+        self.searches = 0
+        self.downloads = 0
+        self.sklearn = self
+
+    def set_tracking_uri(self, uri):
+        pass
+
+    def set_experiment(self, name):
+        if self.fail:
+            raise ConnectionError("tracking server unreachable")
+
+    def get_experiment_by_name(self, name):
+        return type("Experiment", (), {"experiment_id": "0"})()
+
+    def search_runs(self, **kwargs):
+        self.searches += 1
+        return pd.DataFrame([{"run_id": self.run_id, "params.best_threshold": self.threshold}])
+
+    def load_model(self, uri):
+        self.downloads += 1
+        return self.model
+
+
+@pytest.fixture
+def model():
+    X = pd.DataFrame(np.random.default_rng(0).normal(size=(200, 3)), columns=["a", "b", "c"])
+    return LogisticRegression().fit(X, X["a"] > 0)
+
+
+@pytest.fixture
+def fake_mlflow(monkeypatch, model):
+    fake = FakeMlflow(model)
+    monkeypatch.setattr(model_loader_module, "mlflow", fake)
+    return fake
+
+
+def make_loader(tmp_path, max_age_seconds=3600):
+    return ModelLoader("sqlite:///unused.db", "exp", artifact_cache=ModelArtifactCache(str(tmp_path), max_age_seconds))
+
+
+def test_first_load_downloads_and_caches(tmp_path, fake_mlflow):
+    loader = make_loader(tmp_path)
+
+    assert loader.load_model()
+    assert loader.model_source == "mlflow"
+    assert loader.threshold == 0.42
+    assert loader.feature_order == ["a", "b", "c"]
+    assert {"resolve_run", "download_model", "write_cache", "build_predictor", "total"} <= set(loader.load_timings)
+    assert ModelArtifactCache(str(tmp_path)).current()[0] == "run-1"
+
+
+def test_fresh_cache_skips_mlflow(tmp_path, fake_mlflow, model):
+    make_loader(tmp_path).load_model()
+
+    loader = make_loader(tmp_path)
+    assert loader.load_model()
+
+    assert fake_mlflow.searches == 1
+    assert fake_mlflow.downloads == 1
+    assert loader.model_source == "cache"
+    assert loader.threshold == 0.42
+    assert loader.feature_order == ["a", "b", "c"]
+    X = pd.DataFrame([[0.5, -1.0, 2.0]], columns=["a", "b", "c"])
+    np.testing.assert_array_equal(loader.predict_batch(X)[1], model.predict_proba(X)[:, 1])
+
+
+def test_stale_cache_checks_mlflow_but_reuses_cached_run(tmp_path, fake_mlflow):
+    make_loader(tmp_path).load_model()
+
+    loader = make_loader(tmp_path, max_age_seconds=0)
+    assert loader.load_model()
+
+    assert fake_mlflow.searches == 2
+    assert fake_mlflow.downloads == 1
+    assert loader.model_source == "cache"
+
+
+def test_stale_cache_picks_up_new_run(tmp_path, fake_mlflow):
+    make_loader(tmp_path).load_model()
+    fake_mlflow.run_id = "run-2"
+
+    loader = make_loader(tmp_path, max_age_seconds=0)
+    assert loader.load_model()
+
+    assert loader.run_id == "run-2"
+    assert loader.model_source == "mlflow"
+    assert ModelArtifactCache(str(tmp_path)).current()[0] == "run-2"
+
+
+def test_unreachable_mlflow_falls_back_to_stale_cache(tmp_path, fake_mlflow):
+    make_loader(tmp_path).load_model()
+    fake_mlflow.fail = True
+
+    loader = make_loader(tmp_path, max_age_seconds=0)
+    assert loader.load_model()
+    assert loader.run_id == "run-1"
+    assert loader.model_source == "cache"
+
+
+def test_unreachable_mlflow_without_cache_fails(tmp_path, fake_mlflow):
+    fake_mlflow.fail = True
+    assert not make_loader(tmp_path).load_model()
+    assert not ModelArtifactCache(str(tmp_path)).contains("run-1")
+
+
+class BlockingModel:
+    """Scores 1.0 for every row, but only once released."""
+
+    n_features_in_ = 3
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def predict_proba(self, X):
+        self.started.set()
+        self.release.wait(5)
+        return np.column_stack([np.zeros(len(X)), np.ones(len(X))])
+
+
+def test_refresh_keeps_active_run(tmp_path, fake_mlflow):
+    loader = make_loader(tmp_path)
+    loader.load_model()
+    bundle = loader.bundle
+
+    assert not loader.refresh()
+    assert loader.bundle is bundle
+    assert loader.last_swap is None
+
+
+def test_refresh_swaps_in_new_run(tmp_path, fake_mlflow, model):
+    loader = make_loader(tmp_path)
+    loader.load_model()
+    fake_mlflow.run_id, fake_mlflow.threshold = "run-2", "0.9"
+
+    assert loader.refresh()
+    assert loader.run_id == "run-2"
+    assert loader.threshold == 0.9
+    assert loader.last_swap["previous_run_id"] == "run-1"
+    assert "warmup" in loader.last_swap["timings"]
+
+
+def test_refresh_failure_keeps_serving(tmp_path, fake_mlflow):
+    loader = make_loader(tmp_path)
+    loader.load_model()
+    fake_mlflow.run_id = "run-2"
+    fake_mlflow.fail = True
+
+    assert not loader.refresh()
+    assert loader.run_id == "run-1"
+
+
+def test_refresh_from_artifact_cache_pointer(tmp_path, fake_mlflow, model):
+    loader = make_loader(tmp_path)
+    loader.load_model()
+
+    cache = ModelArtifactCache(str(tmp_path))
+    cache.store("run-9", model, 0.7, ["a", "b", "c"])
+    cache.mark_current("run-9")
+
+    assert loader.refresh(source="artifact_cache")
+    assert loader.run_id == "run-9"
+    assert loader.threshold == 0.7
+    assert fake_mlflow.searches == 1
+
+
+def test_in_flight_request_finishes_on_old_model(tmp_path, fake_mlflow):
+    loader = make_loader(tmp_path)
+    blocking = BlockingModel()
+    loader.bundle = ModelBundle("run-0", blocking, None, 0.5, None, "test", 0.0, {})
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(loader.predict_batch(np.zeros((2, 3)))))
+    worker.start()
+    assert blocking.started.wait(5)
+
+    assert loader.refresh()
+    blocking.release.set()
+    worker.join(5)
+
+    assert loader.run_id == "run-1"
+    predictions, probabilities = results[0]
+    np.testing.assert_array_equal(probabilities, [1.0, 1.0])
+    np.testing.assert_array_equal(predictions, [1, 1])
+
+
+def test_pinned_run_does_not_move_cache_pointer(tmp_path, fake_mlflow):
+    make_loader(tmp_path).load_model()
+    fake_mlflow.run_id = "run-7"
+
+    pinned = ModelLoader("sqlite:///unused.db", "exp", artifact_cache=ModelArtifactCache(str(tmp_path)),
+                         pinned_run_id="run-7")
+    assert pinned.load_model()
+    assert pinned.run_id == "run-7"
+    assert ModelArtifactCache(str(tmp_path)).current()[0] == "run-1"
+
+
+def test_store_keeps_the_first_cached_copy(tmp_path, model, monkeypatch):
+    cache = ModelArtifactCache(str(tmp_path))
+    cache.store("run-1", model, 0.3, ["a"])
+
+    cache.store("run-1", model, 0.9, ["b"])
+    assert cache.load("run-1")[1]["best_threshold"] == 0.3
+
+    # Another worker finishes between the check and the rename
+    contains = iter([False, True])
+    monkeypatch.setattr(cache, "contains", lambda run_id: next(contains))
+    cache.store("run-1", model, 0.9, ["b"])
+
+    assert cache.load("run-1")[1]["best_threshold"] == 0.3
+    assert sorted(os.listdir(tmp_path)) == ["run-1"]
+
+
+def test_snapshot_scores_with_its_own_threshold_after_a_swap(tmp_path, fake_mlflow):
+    loader = make_loader(tmp_path)
+    loader.bundle = ModelBundle("run-0", BlockingModel(), None, 2.0, None, "test", 0.0, {})
+    loader.bundle.model.release.set()
+    bundle = loader.snapshot()
+
+    assert loader.refresh()
+    predictions, _ = loader.predict_batch(np.zeros((2, 3)), bundle)
+
+    assert loader.run_id == "run-1"
+    np.testing.assert_array_equal(predictions, [0, 0])
@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+
+from src.monitoring import performance_monitor as module
+from src.monitoring.performance_monitor import RollingLatencyMonitor
+
+
+class FakeTime:
+    def __init__(self, monkeypatch, now=1_000_000.0):
+        self.now = now
+        monkeypatch.setattr(module.time, "time", lambda: self.now)
+
+
+def test_percentiles_are_within_bucket_precision():
+    monitor = RollingLatencyMonitor()
+    latencies = np.random.default_rng(0).lognormal(np.log(0.005), 0.8, 20000)
+    for latency in latencies:
+        monitor.record_request(float(latency))
+
+    window = monitor.get_stats()["windows"]["1m"]
+    for q, key in ((50, "p50_seconds"), (95, "p95_seconds"), (99, "p99_seconds")):
+        assert abs(window[key] / np.percentile(latencies, q) - 1) < 0.04
+    assert window["requests"] == 20000
+
+
+def test_windows_expire_old_slots(monkeypatch):
+    clock = FakeTime(monkeypatch)
+    monitor = RollingLatencyMonitor(slot_seconds=10)
+
+    monitor.record_request(0.5, success=False)
+    clock.now += 120
+    monitor.record_request(0.01)
+
+    stats = monitor.get_stats()
+    assert stats["windows"]["1m"]["requests"] == 1
+    assert stats["windows"]["1m"]["p99_seconds"] < 0.011
+    assert stats["windows"]["5m"]["requests"] == 2
+    assert stats["windows"]["5m"]["failed_requests"] == 1
+    assert stats["total_requests"] == 2
+
+    clock.now += 3700
+    stats = monitor.get_stats()
+    assert stats["windows"]["1h"]["requests"] == 0
+    assert stats["total_requests"] == 2
+
+
+def test_concurrent_records_are_not_lost():
+    monitor = RollingLatencyMonitor()
+
+    def record():
+        for _ in range(5000):
+            monitor.record_request(0.002)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert monitor.get_stats()["windows"]["1m"]["requests"] == 40000
+
+
+def test_workers_sharing_a_directory_are_merged(tmp_path, monkeypatch):
+    # Both "workers" need live pids, or the second would clean up the first's file
+    worker_pids = iter([module.os.getpid(), module.os.getppid()])
+    monkeypatch.setattr(module.os, "getpid", lambda: next(worker_pids))
+    first = RollingLatencyMonitor(shared_dir=str(tmp_path))
+    second = RollingLatencyMonitor(shared_dir=str(tmp_path))
+
+    for _ in range(90):
+        first.record_request(0.001)
+    for _ in range(10):
+        second.record_request(1.0, success=False)
+
+    stats = first.get_stats()
+    assert stats["workers"] == 2
+    assert stats["total_requests"] == 100
+    assert stats["failed_requests"] == 10
+    assert stats["windows"]["1m"]["p50_seconds"] < 0.0011
+    assert stats["windows"]["1m"]["p95_seconds"] > 0.95
+
+
+def test_unreadable_files_of_exited_workers(tmp_path, monkeypatch):
+    exited = 2 ** 31 - 1
+    corrupt = tmp_path / f"latency-{exited}.bin"
+    corrupt.write_bytes(b"abc")
+    RollingLatencyMonitor(shared_dir=str(tmp_path))
+    assert not corrupt.exists()
+
+    # Another worker starting at the same moment removed the file first
+    corrupt.write_bytes(b"abc")
+    remove = module.os.remove
+    def remove_first(path):
+        remove(path)
+        raise FileNotFoundError(path)
+    monkeypatch.setattr(module.os, "remove", remove_first)
+    RollingLatencyMonitor(shared_dir=str(tmp_path))
+    monkeypatch.undo()
+
+    # A file that cannot be opened is not a decode error and is kept
+    locked = tmp_path / f"latency-{exited - 1}.bin"
+    locked.write_bytes(b"abc")
+    memmap = np.memmap
+    def deny(path, *args, mode="r+", **kwargs):
+        if mode == "r":
+            raise PermissionError(path)
+        return memmap(path, *args, mode=mode, **kwargs)
+    monkeypatch.setattr(module.np, "memmap", deny)
+    RollingLatencyMonitor(shared_dir=str(tmp_path))
+    assert locked.exists()
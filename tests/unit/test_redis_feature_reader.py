@@ -0,0 +1,191 @@
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from feast import RepoConfig
+from feast.infra.online_stores.redis import RedisOnlineStore, RedisOnlineStoreConfig
+from feast.protos.feast.types.EntityKey_pb2 import EntityKey as EntityKeyProto
+from feast.protos.feast.types.Value_pb2 import Value as ValueProto
+
+from feature_store.feature_repo.features import applicant_risk_features
+from src.serving.async_feature_reader import AsyncRedisFeatureReader
+from src.serving.feature_service import FeatureService
+from src.serving.redis_feature_reader import RedisFeatureReader, _decode_value
+
+PROJECT = "loan_risk_prediction"
+
+
+@pytest.fixture
+def online_store(tmp_path):
+    """Feast's own Redis online store, backed by fakeredis."""
+    config = RepoConfig(
+        project=PROJECT,
+        provider="local",
+        registry=str(tmp_path / "registry.db"),
+        online_store=RedisOnlineStoreConfig(connection_string="localhost:6379"),
+        entity_key_serialization_version=3,
+    )
+    store = RedisOnlineStore()
+    store._client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    return config, store
+
+
+def entity_key(entity_id):
+    return EntityKeyProto(join_keys=["SK_ID_CURR"], entity_values=[ValueProto(int64_val=entity_id)])
+
+
+def feature_values(entity_id):
+    values = {}
+    for field in applicant_risk_features.features:
+        if field.name.startswith("flag_"):
+            values[field.name] = ValueProto(int64_val=entity_id % 2)
+        elif field.name == "ext_source_1" and entity_id % 3 == 0:
+            values[field.name] = ValueProto()
+        else:
+            values[field.name] = ValueProto(float_val=entity_id / 7 + len(field.name))
+    return values
+
+
+def write_rows(config, store, entity_ids, event_time):
+    data = [(entity_key(i), feature_values(i), event_time, None) for i in entity_ids]
+    store.online_write_batch(config, applicant_risk_features, data, progress=None)
+
+
+def sdk_matrix(config, store, feature_names, entity_ids):
+    rows = store.online_read(config, applicant_risk_features,
+                             [entity_key(i) for i in entity_ids], list(feature_names))
+    matrix = np.full((len(entity_ids), len(feature_names)), np.nan, dtype=np.float32)
+    for i, (_, values) in enumerate(rows):
+        for j, name in enumerate(feature_names):
+            value = values[name] if values else None
+            kind = value.WhichOneof("val") if value is not None else None
+            if kind is not None:
+                matrix[i, j] = getattr(value, kind)
+    return matrix
+
+
+def make_reader(config, store, feature_names):
+    return RedisFeatureReader(applicant_risk_features, feature_names, PROJECT,
+                              client=store._client, entity_key_serialization_version=3)
+
+
+def test_matches_feast_sdk_reads(online_store):
+    config, store = online_store
+    feature_names = [field.name for field in applicant_risk_features.features]
+    write_rows(config, store, range(100000, 100030), datetime.now(timezone.utc))
+
+    entity_ids = [100003, 100000, 999999, 100029, 100012]
+    reader = make_reader(config, store, feature_names)
+
+    expected = sdk_matrix(config, store, feature_names, entity_ids)
+    actual = reader.read(entity_ids)
+
+    assert actual.dtype == np.float32
+    assert actual.tobytes() == expected.tobytes()
+    assert np.isnan(actual[2]).all()
+
+
+def test_keys_match_feast_encoding(online_store):
+    config, store = online_store
+    reader = make_reader(config, store, ["age_years"])
+
+    keys = store._generate_redis_keys_for_entities(config, [entity_key(1), entity_key(-5), entity_key(2**40)])
+
+    assert keys == [reader.redis_key(1), reader.redis_key(-5), reader.redis_key(2**40)]
+
+
+def test_expired_rows_are_missing(online_store):
+    config, store = online_store
+    stale = datetime.now(timezone.utc) - applicant_risk_features.ttl - timedelta(days=1)
+    write_rows(config, store, [1], stale)
+    write_rows(config, store, [2], datetime.now(timezone.utc))
+
+    matrix = make_reader(config, store, ["age_years"]).read([1, 2])
+
+    assert math.isnan(matrix[0, 0]) and not math.isnan(matrix[1, 0])
+
+
+def test_decode_value_layouts():
+    for value, expected in [(ValueProto(float_val=1.5), 1.5), (ValueProto(double_val=-2.25), -2.25),
+                            (ValueProto(int64_val=-3), -3.0), (ValueProto(int64_val=0), 0.0),
+                            (ValueProto(int32_val=7), 7.0), (ValueProto(bool_val=True), 1.0)]:
+        assert _decode_value(value.SerializeToString()) == expected
+    assert math.isnan(_decode_value(ValueProto(string_val="x").SerializeToString()))
+
+
+def test_feature_service_uses_reader(online_store):
+    config, store = online_store
+    write_rows(config, store, [100002], datetime.now(timezone.utc))
+
+    service = FeatureService(repo_path=None, store=object())
+    service.reader = make_reader(config, store, [ref.split(":")[-1] for ref in service.feature_refs])
+
+    features = service.get_online_features(100002)
+
+    assert list(features) == [ref.split(":")[-1] for ref in service.feature_refs]
+    assert features["flag_own_car"] == 0.0
+    assert features["age_years"] == pytest.approx(100002 / 7 + len("age_years"))
+
+
+class HangingPipeline:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def hmget(self, key, fields):
+        pass
+
+    async def execute(self):
+        await asyncio.sleep(1)
+
+
+class HangingClient:
+    def pipeline(self, transaction=False):
+        return HangingPipeline()
+
+
+def test_async_reader_matches_sync_reader(online_store):
+    config, store = online_store
+    write_rows(config, store, range(10), datetime.now(timezone.utc))
+    reader = make_reader(config, store, ["age_years", "flag_own_car", "ext_source_1"])
+    client = fakeredis.FakeAsyncRedis(server=store._client.connection_pool.connection_kwargs["server"])
+    async_reader = AsyncRedisFeatureReader(reader, client, timeout_ms=1000)
+
+    matrix, degraded = asyncio.run(async_reader.read([3, 4, 42]))
+
+    assert not degraded
+    assert matrix.tobytes() == reader.read([3, 4, 42]).tobytes()
+
+
+def test_async_reader_imputes_when_over_budget(online_store):
+    config, store = online_store
+    reader = make_reader(config, store, ["age_years", "flag_own_car"])
+    async_reader = AsyncRedisFeatureReader(reader, HangingClient(), timeout_ms=5,
+                                           impute_values={"age_years": 40.0})
+
+    rows, degraded = asyncio.run(async_reader.read_dicts([1, 2]))
+
+    assert degraded
+    assert [row["age_years"] for row in rows] == [40.0, 40.0]
+    assert all(math.isnan(row["flag_own_car"]) for row in rows)
+
+
+def test_degraded_rows_are_not_cached(online_store):
+    from src.serving.feature_cache import FeatureCache
+
+    config, store = online_store
+    service = FeatureService(repo_path=None, store=object(), cache=FeatureCache(),
+                             watermark_check_seconds=None)
+    service.async_reader = AsyncRedisFeatureReader(make_reader(config, store, ["age_years"]),
+                                                   HangingClient(), timeout_ms=5)
+
+    _, degraded = asyncio.run(service.get_online_features_async(1))
+
+    assert degraded and len(service.cache) == 0
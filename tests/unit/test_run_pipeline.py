@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import yaml
+
+from src.data_pipeline.run_pipeline import PipelineRunner, Stage, default_stages
+
+
+def script_stage(name, code, **kwargs):
+    return Stage(name, (sys.executable, "-c", code), **kwargs)
+
+
+def copy(src, dst, suffix=""):
+    return f"import time; time.sleep(0.2); open('{dst}', 'w').write(open('{src}').read() + '{suffix}')"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "raw.txt").write_text("raw")
+    (tmp_path / "other.txt").write_text("other")
+    (tmp_path / "config.yaml").write_text(yaml.safe_dump({"model": {"depth": 3}, "serving": {"port": 1}}))
+    return tmp_path
+
+
+def stages():
+    return [
+        script_stage("features", copy("raw.txt", "features.txt", "+f"), deps=("raw.txt",), outs=("features.txt",)),
+        script_stage("dataset", copy("features.txt", "dataset.txt", "+d"), deps=("features.txt",), outs=("dataset.txt",)),
+        script_stage("other", copy("other.txt", "other_out.txt"), deps=("other.txt",), outs=("other_out.txt",),
+                     params=(("config.yaml", "model"),)),
+        script_stage("report", "open('report.txt', 'w').write('done')", outs=("report.txt",), after=("other",))
+    ]
+
+
+def statuses(results):
+    return {name: result["status"] for name, result in results.items()}
+
+
+def test_unchanged_stages_are_skipped_and_changes_rerun_downstream(workdir):
+    runner = PipelineRunner(stages(), state_dir="state", jobs=2)
+
+    first = runner.run()
+    assert set(statuses(first).values()) == {"ran"}
+    assert (workdir / "dataset.txt").read_text() == "raw+f+d"
+    assert all(result["seconds"] > 0 and result["max_rss_mb"] > 0 for result in first.values())
+    assert runner.load_state("dataset")["seconds"] == first["dataset"]["seconds"]
+
+    assert set(statuses(runner.run()).values()) == {"skipped"}
+
+    (workdir / "raw.txt").write_text("changed")
+    config = yaml.safe_load((workdir / "config.yaml").read_text())
+    config["serving"]["port"] = 2
+    (workdir / "config.yaml").write_text(yaml.safe_dump(config))
+    assert statuses(runner.run(dry_run=True)) == {
+        "features": "stale", "dataset": "stale", "other": "skipped", "report": "skipped"
+    }
+    assert statuses(runner.run()) == {"features": "ran", "dataset": "ran", "other": "skipped", "report": "skipped"}
+    assert (workdir / "dataset.txt").read_text() == "changed+f+d"
+
+    config["model"]["depth"] = 4
+    (workdir / "config.yaml").write_text(yaml.safe_dump(config))
+    os.remove(workdir / "dataset.txt")
+    assert statuses(runner.run(["report"])) == {"other": "ran", "report": "ran"}
+    assert statuses(runner.run(["dataset"])) == {"features": "skipped", "dataset": "ran"}
+
+
+def test_independent_stages_run_in_parallel(workdir):
+    sleep = "import time; time.sleep(0.5); open('{}', 'w').write('')"
+    runner = PipelineRunner(
+        [script_stage(name, sleep.format(name), outs=(name,)) for name in ("a", "b", "c")], state_dir="state", jobs=3
+    )
+
+    started = time.perf_counter()
+    assert set(statuses(runner.run()).values()) == {"ran"}
+
+    assert time.perf_counter() - started < 1.4
+
+
+def test_only_stage_processes_are_reaped(workdir):
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+    runner = PipelineRunner(stages()[:1], state_dir="state")
+
+    assert statuses(runner.run()) == {"features": "ran"}
+
+    pid, status = os.waitpid(other.pid, 0)
+    assert pid == other.pid and os.waitstatus_to_exitcode(status) == 0
+    other.returncode = 0
+
+
+def test_failed_stage_blocks_downstream(workdir):
+    broken = [script_stage("features", "raise SystemExit(3)", deps=("raw.txt",), outs=("features.txt",))] + stages()[1:]
+    runner = PipelineRunner(broken, state_dir="state")
+
+    results = runner.run()
+
+    assert statuses(results) == {"features": "failed", "dataset": "blocked", "other": "ran", "report": "ran"}
+    assert results["features"]["error"] == "exited with 3"
+    assert runner.load_state("features") == {}
+
+
+def test_cycles_and_unknown_stages_are_rejected():
+    with pytest.raises(ValueError):
+        PipelineRunner([Stage("a", ("true",), after=("b",)), Stage("b", ("true",), after=("a",))])
+    with pytest.raises(ValueError):
+        PipelineRunner([Stage("a", ("true",), after=("missing",))])
+
+
+def test_default_stages_form_the_expected_graph():
+    runner = PipelineRunner(default_stages())
+
+    assert runner.upstream == {
+        "build_features": set(),
+        "build_training_dataset": {"build_features"},
+        "clean_features": {"build_training_dataset"},
+        "publish_training_dataset": {"clean_features"},
+        "train": {"publish_training_dataset"},
+        "select_features": {"build_training_dataset", "train"}
+    }
@@ -0,0 +1,69 @@
+import numpy as np
+import pyarrow as pa
+
+from src.serving.shadow_scorer import ShadowScorer
+
+
+class FakeLoader:
+    def __init__(self, run_id, scale):
+        self.run_id = run_id
+        self.scale = scale
+        self.batch_sizes = []
+
+    def load_model(self):
+        return True
+
+    def is_loaded(self):
+        return True
+
+    def predict_batch(self, features):
+        self.batch_sizes.append(len(features))
+        probabilities = features[:, 0] * self.scale
+        return (probabilities >= 0.5).astype(int), probabilities
+
+
+def read_log(path):
+    return pa.ipc.open_stream(path).read_all().to_pydict()
+
+
+def test_shadow_rows_are_batched_and_logged(tmp_path):
+    loaders = [FakeLoader("challenger-a", 0.5), FakeLoader("challenger-b", 0.25)]
+    scorer = ShadowScorer(loaders, str(tmp_path), sample_rate=1.0, max_batch_size=64, max_wait_ms=200)
+    assert scorer.load() == [True, True]
+
+    scorer.start()
+    for entity_id in range(20):
+        assert scorer.submit([entity_id], np.array([[entity_id / 10, 1.0]]), "champion", [0.1])
+    scorer.stop()
+
+    log = read_log(scorer.log_path)
+    assert len(log["SK_ID_CURR"]) == 40
+    assert set(log["champion_run_id"]) == {"champion"}
+    for loader in loaders:
+        rows = [i for i, run_id in enumerate(log["shadow_run_id"]) if run_id == loader.run_id]
+        assert [log["SK_ID_CURR"][i] for i in rows] == list(range(20))
+        assert [log["shadow_probability"][i] for i in rows] == [i / 10 * loader.scale for i in range(20)]
+        assert sum(loader.batch_sizes) == 20
+        assert len(loader.batch_sizes) < 20
+
+
+def test_submissions_beyond_queue_limit_are_dropped(tmp_path):
+    scorer = ShadowScorer([FakeLoader("challenger", 1.0)], str(tmp_path), max_queue_rows=10)
+
+    assert scorer.submit(list(range(8)), np.zeros((8, 2)), "champion", np.zeros(8))
+    assert not scorer.submit(list(range(3)), np.zeros((3, 2)), "champion", np.zeros(3))
+
+    scorer.start()
+    scorer.stop()
+    assert len(read_log(scorer.log_path)["SK_ID_CURR"]) == 8
+
+
+def test_sampling_is_off_until_started(tmp_path):
+    scorer = ShadowScorer([FakeLoader("challenger", 1.0)], str(tmp_path), sample_rate=1.0)
+    assert not scorer.sampled()
+
+    scorer.start()
+    assert scorer.sampled()
+    scorer.sample_rate = 0.0
+    assert not scorer.sampled()
+    scorer.stop()
@@ -0,0 +1,40 @@
+from src.monitoring.metrics_exporter import registry
+from src.monitoring.stage_timer import StageTimer
+
+
+class FakeClock:
+    def __init__(self, monkeypatch, start):
+        self.now = start
+        monkeypatch.setattr("src.monitoring.stage_timer.time.perf_counter", lambda: self.now)
+
+
+def test_marks_charge_time_since_previous_mark(monkeypatch):
+    clock = FakeClock(monkeypatch, 10.0)
+    timer = StageTimer("predict", start=9.5)
+
+    timer.mark("validation")
+    clock.now = 10.25
+    timer.mark("feast_fetch")
+    clock.now = 10.5
+    timer.mark("feature_assembly")
+    clock.now = 10.75
+    timer.mark("feature_assembly")
+
+    assert timer.stages == {"validation": 0.5, "feast_fetch": 0.25, "feature_assembly": 0.5}
+    assert timer.server_timing() == "validation;dur=500.000, feast_fetch;dur=250.000, feature_assembly;dur=500.000"
+
+
+def test_observe_exports_labelled_histograms(monkeypatch):
+    clock = FakeClock(monkeypatch, 0.0)
+    timer = StageTimer("unit_test", start=0.0)
+    clock.now = 0.0003
+    timer.mark("inference")
+
+    def count():
+        return registry.get_sample_value(
+            "prediction_stage_seconds_bucket", {"endpoint": "unit_test", "stage": "inference", "le": "0.0005"}
+        ) or 0.0
+
+    before = count()
+    timer.observe()
+    assert count() == before + 1
@@ -0,0 +1,176 @@
+import json
+import socket
+
+import pytest
+
+from src.serving.stream_consumer import Checkpoint, FileSink, FileTailSource, SocketSource, StreamConsumer
+
+
+class FakeFeatureService:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def get_online_features_batch(self, entity_ids):
+        self.batch_sizes.append(len(entity_ids))
+        return [{"EXT_SOURCE_1": entity_id / 1000} if entity_id else {} for entity_id in entity_ids]
+
+
+class FakeLoader:
+    run_id = "champion"
+    threshold = 0.5
+
+    def snapshot(self):
+        return self
+
+    def predict_batch(self, features, bundle=None):
+        probabilities = features[:, 6]
+        return (probabilities >= 0.5).astype(int), probabilities
+
+    def get_risk_level(self, probability):
+        return "HIGH" if probability >= 0.5 else "LOW"
+
+
+class RecordingAuditLog:
+    def __init__(self):
+        self.submissions = []
+
+    def is_running(self):
+        return True
+
+    def submit(self, endpoint, requests, features, probabilities, predictions, threshold, model_run_id):
+        self.submissions.append((endpoint, requests, len(features), model_run_id))
+
+
+class FailingSink(FileSink):
+    def write(self, decisions):
+        raise OSError("disk full")
+
+
+def write_events(path, entity_ids):
+    with open(path, "a") as f:
+        for entity_id in entity_ids:
+            f.write(json.dumps({"SK_ID_CURR": entity_id, "AMT_CREDIT": 1000.0}) + "\n")
+
+
+def read_decisions(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def make_consumer(tmp_path, sink=None, batch_size=4, audit_log=None):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    return StreamConsumer(
+        source=FileTailSource(str(tmp_path / "events.ndjson"), checkpoint.load()),
+        sink=sink or FileSink(str(tmp_path / "decisions.ndjson")),
+        checkpoint=checkpoint,
+        feature_service=FakeFeatureService(),
+        model_loader=FakeLoader(),
+        batch_size=batch_size,
+        max_wait_ms=10,
+        audit_log=audit_log
+    )
+
+
+def test_events_are_scored_in_micro_batches(tmp_path):
+    write_events(tmp_path / "events.ndjson", range(100, 1000, 100))
+    with open(tmp_path / "events.ndjson", "a") as f:
+        f.write("not json\n")
+
+    consumer = make_consumer(tmp_path)
+    consumer.run(idle_timeout=0.05)
+    consumer.sink.close()
+
+    decisions = read_decisions(tmp_path / "decisions.ndjson")
+    assert [d["SK_ID_CURR"] for d in decisions] == list(range(100, 1000, 100)) + [None]
+    assert [d["prediction"] for d in decisions[:9]] == [0, 0, 0, 0, 1, 1, 1, 1, 1]
+    assert decisions[4]["risk_level"] == "HIGH" and decisions[4]["model_run_id"] == "champion"
+    assert "error" in decisions[9]
+    assert consumer.feature_service.batch_sizes == [4, 4, 1]
+    assert consumer.events_processed == 10
+
+
+def test_events_are_validated_like_predict_requests(tmp_path):
+    with open(tmp_path / "events.ndjson", "w") as f:
+        f.write(json.dumps({"SK_ID_CURR": 100, "EXT_SOURCE_1": 0.9}) + "\n")
+        f.write(json.dumps({"SK_ID_CURR": "abc"}) + "\n")
+        f.write(json.dumps({"SK_ID_CURR": 700}) + "\n")
+
+    consumer = make_consumer(tmp_path)
+    consumer.run(idle_timeout=0.05)
+    consumer.sink.close()
+
+    decisions = read_decisions(tmp_path / "decisions.ndjson")
+    # The extra key is dropped, so the online feature is scored
+    assert decisions[0]["prediction"] == 0 and decisions[0]["probability"] == 0.1
+    assert "Invalid event" in decisions[1]["error"] and "prediction" not in decisions[1]
+    assert decisions[2]["prediction"] == 1
+    assert consumer.feature_service.batch_sizes == [2]
+
+
+def test_events_without_online_features_are_not_scored(tmp_path):
+    write_events(tmp_path / "events.ndjson", [0, 600])
+    audit_log = RecordingAuditLog()
+
+    consumer = make_consumer(tmp_path, audit_log=audit_log)
+    consumer.run(idle_timeout=0.05)
+    consumer.sink.close()
+
+    decisions = read_decisions(tmp_path / "decisions.ndjson")
+    assert decisions[0]["error"] == "Online features unavailable" and "prediction" not in decisions[0]
+    assert decisions[1]["prediction"] == 1
+    assert audit_log.submissions == [("stream", [{"SK_ID_CURR": 600, "AMT_CREDIT": 1000.0}], 1, "champion")]
+
+
+def test_restart_resumes_from_checkpoint(tmp_path):
+    write_events(tmp_path / "events.ndjson", range(6))
+    consumer = make_consumer(tmp_path)
+    consumer.run(idle_timeout=0.05)
+    consumer.sink.close()
+
+    with open(tmp_path / "events.ndjson", "a") as f:
+        f.write('{"SK_ID_CURR": 6}\n{"SK_ID_CU')
+
+    consumer = make_consumer(tmp_path)
+    consumer.run(idle_timeout=0.05)
+    consumer.sink.close()
+
+    assert [d["SK_ID_CURR"] for d in read_decisions(tmp_path / "decisions.ndjson")] == list(range(7))
+    assert Checkpoint(str(tmp_path / "checkpoint.json")).load() == (tmp_path / "events.ndjson").stat().st_size - 10
+
+
+def test_failed_batch_is_replayed(tmp_path):
+    write_events(tmp_path / "events.ndjson", range(3))
+    consumer = make_consumer(tmp_path, sink=FailingSink(str(tmp_path / "decisions.ndjson")))
+    with pytest.raises(OSError):
+        consumer.process_batch()
+    assert Checkpoint(str(tmp_path / "checkpoint.json")).load() == 0
+
+    consumer = make_consumer(tmp_path)
+    consumer.run(idle_timeout=0.05)
+    consumer.sink.close()
+    assert [d["SK_ID_CURR"] for d in read_decisions(tmp_path / "decisions.ndjson")] == [0, 1, 2]
+
+
+def test_socket_source_acks_committed_offsets():
+    source = SocketSource("127.0.0.1", 0)
+    producer = socket.create_connection(source.address)
+    producer.sendall(b'{"SK_ID_CURR": 1}\n{"SK_ID_CURR": 2}\n{"SK_ID_CURR": 3}\n')
+
+    events = []
+    while len(events) < 3:
+        events += source.poll(3 - len(events), timeout=1)
+    assert [event.value["SK_ID_CURR"] for event in events] == [1, 2, 3]
+    assert [event.offset for event in events] == [1, 2, 3]
+
+    source.commit(events[-1].offset)
+    assert json.loads(producer.makefile().readline()) == {"ack": 3}
+
+    producer.close()
+    source.close()
+
+
+def test_checkpoint_defaults_to_start(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "missing" / "checkpoint.json"))
+    assert checkpoint.load() == 0
+    checkpoint.save(42)
+    assert checkpoint.load() == 42
@@ -0,0 +1,80 @@
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+import yaml
+
+import src.tuning.trial_context as trial_context
+from src.training.models import get_model
+from src.tuning.objective import create_objective
+from src.tuning.trial_context import TrialContext
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    X = rng.normal(size=(n_rows, 6))
+    df = pd.DataFrame(X, columns=[f"f{i}" for i in range(6)])
+    df["flag"] = rng.integers(0, 2, n_rows)
+    df["label"] = (X[:, 0] + X[:, 1] + rng.normal(scale=1.5, size=n_rows) > 2).astype(int)
+    df.loc[::11, "f2"] = np.nan
+    df.to_parquet(tmp_path / "training_dataset.parquet")
+
+    config = {
+        "model": {"name": "xgboost", "xgboost": {"n_estimators": 20, "max_depth": 3, "learning_rate": 0.1}},
+        "training": {"standardization": False}
+    }
+    (tmp_path / "training_config.yaml").write_text(yaml.safe_dump(config))
+    return {"data_path": str(tmp_path / "training_dataset.parquet"), "config_path": str(tmp_path / "training_config.yaml")}
+
+
+@pytest.fixture
+def preprocess_calls(monkeypatch):
+    calls = []
+    preprocess = trial_context.preprocess_data
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return preprocess(*args, **kwargs)
+
+    monkeypatch.setattr(trial_context, "preprocess_data", counting)
+    return calls
+
+
+def test_shared_matrices_match_a_classifier_fit(dataset):
+    context = TrialContext(**dataset)
+    trial_config = context.trial_config({"max_depth": 4, "subsample": 0.8})
+
+    model = get_model(trial_config, xgb_scale_pos_weight=context.imbalance_ratio)
+    model.fit(context.X_train, context.y_train)
+
+    np.testing.assert_allclose(
+        context.predict_val(trial_config), model.predict_proba(context.X_val)[:, 1], rtol=1e-5, atol=1e-6
+    )
+    assert context.dmatrices() is context.dmatrices()
+    assert context.training_config["model"]["xgboost"] == {"n_estimators": 20, "max_depth": 3, "learning_rate": 0.1}
+
+
+def test_preprocessed_splits_are_cached_as_memory_maps(dataset, tmp_path, preprocess_calls):
+    first = TrialContext(**dataset, cache_dir=str(tmp_path / "cache"))
+    second = TrialContext(**dataset, cache_dir=str(tmp_path / "cache"))
+
+    assert len(preprocess_calls) == 1
+    assert isinstance(second.X_train, np.memmap)
+    for name in ("X_train", "y_train", "X_val", "y_val"):
+        np.testing.assert_array_equal(getattr(first, name), getattr(second, name))
+
+    TrialContext(**dataset, cache_dir=str(tmp_path / "cache"), val_size=0.2)
+    assert len(preprocess_calls) == 2
+
+
+def test_study_preprocesses_once(dataset, preprocess_calls):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.create_study(direction="maximize", sampler=optuna.samplers.RandomSampler(seed=0))
+    objective = create_objective(**dataset)
+
+    study.optimize(objective, n_trials=3)
+
+    assert len(preprocess_calls) == 1
+    assert all(0 < trial.value <= 1 for trial in study.trials)